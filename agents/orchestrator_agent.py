@@ -3,29 +3,345 @@
 OrchestratorAgent: controls pipeline
 """
 
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+import queue
+import threading
+import time
 from agents.semantic_agent import SemanticAgent
-from agents.pattern_agent import PatternAgent
-from agents.summarizer_agent import SummarizerAgent
+from agents.pattern_agent import PatternAgent, PLOT_STAGES
+from agents.summarizer_agent import SummarizerAgent, FALLBACK_PREFIX
+from core_tools.stage_graph import SharedProcessPool, StageGraph
+from core_tools.report_cache import ReportCache, cache_key
+from core_tools.llm_connector import get_llm_model
+from core_tools.memory_budget import compact_frame, peak_rss_bytes
+from core_tools.incremental import describe_changes, locked_state
+from core_tools.correlation_engine import compute_correlations
+from core_tools.viz_engine import plot_correlation, plot_numeric_histogram, plot_segments, plot_time_series
+from core_tools.grouped_kpis import format_segments, grouped_kpis, resolve_roles, sample_file
+from core_tools.schema_engine import infer_schema
+from core_tools.streaming_profiler import profile_file
+from core_tools.scheduler import Ticket, WorkScheduler, get_scheduler
+from core_tools import telemetry
+from config.settings import SCHEDULER_ENABLED, ORCHESTRATOR_MAX_WORKERS, ORCHESTRATOR_PROCESS_WORKERS, REPORT_CACHE_ENABLED, LLM_BACKEND
+from config.settings import MEMORY_BUDGET_MODE, MEMORY_BUDGET_WORKERS, PROFILE_STAGES
+
+# bump when stage outputs change shape so older cached reports are not reused
+PIPELINE_VERSION = 3
+
+# stages reported under their own kind by run_progressive; other statistics are "stat"
+PROGRESS_KINDS = ("schema", "semantic_map", "kpis", "anomalies")
+FIGURE_STAGES = PLOT_STAGES + ("plot_segments",)
+
+
+@dataclass
+class ProgressUpdate:
+    """One partial result of run_progressive.
+
+    kind is "schema", "semantic_map", "kpis", "anomalies", "stat" (any other statistic,
+    named by `name`), "figure", "token" (a piece of the summary), "report" (the whole
+    summary) or "done" (value is the (report, plots) pair).
+    """
+    kind: str
+    name: str
+    value: Any
+
 
 class OrchestratorAgent:
-    def __init__(self):
+    def __init__(self, max_workers: int = ORCHESTRATOR_MAX_WORKERS,
+                 process_workers: int = ORCHESTRATOR_PROCESS_WORKERS, cache: ReportCache = None,
+                 memory_budget: bool = MEMORY_BUDGET_MODE, scheduler: WorkScheduler = None):
         self.semantic = SemanticAgent()
         self.pattern = PatternAgent()
         self.summarizer = SummarizerAgent()
+        self.max_workers = max_workers
+        self.process_workers = process_workers
+        # started on the first run that has a process stage, then reused by every run
+        self.process_pool = SharedProcessPool(process_workers) if process_workers > 0 else None
+        self.memory_budget = memory_budget
+        self.cache = cache if cache is not None else (ReportCache() if REPORT_CACHE_ENABLED else None)
+        self.scheduler = scheduler if scheduler is not None else (get_scheduler() if SCHEDULER_ENABLED else None)
+        self.last_timings = {}
+        self.last_stats = {}
+        self.last_semantic_map = {}
+        self.last_cache_hit = False
+        self.last_prompt_tokens = None
+        self.last_memory = {}
+        self.last_compaction = None
+        self.last_profile_dir = None
+        self.last_waits = {}
+        self.last_shape = None
+
+    def pipeline_config(self) -> dict:
+        """Everything besides the data that changes the result; part of the cache key."""
+        engine = self.semantic.engine
+        return {
+            "pipeline_version": PIPELINE_VERSION,
+            "embedding": [engine.backend, engine.model_name],
+            "concepts": [self.semantic.index.version, self.semantic.value_weight],
+            "llm": [LLM_BACKEND, get_llm_model()],
+            "prompt_template": self.summarizer.template_version,
+            "contamination": self.pattern.contamination,
+            # float32 compaction can move statistics in the last digits
+            "memory_budget": self.memory_budget,
+        }
+
+    def build_graph(self, df, source=None, on_token: Optional[Callable[[str], None]] = None,
+                    profile: dict = None) -> StageGraph:
+        self.last_profile_dir = telemetry.new_profile_dir() if PROFILE_STAGES else None
+        if self.memory_budget:
+            graph = StageGraph(max_workers=MEMORY_BUDGET_WORKERS, process_workers=0, track_memory=True,
+                               profile_dir=self.last_profile_dir, limiter=self._limiter())
+        else:
+            graph = StageGraph(max_workers=self.max_workers, process_pool=self.process_pool,
+                               profile_dir=self.last_profile_dir, limiter=self._limiter())
 
-    def run(self, df):
         # 1) semantic inference about columns
-        semantic_map = self.semantic.infer_columns(df)
-
-        # 2) pattern recognition & stats
-        stats = self.pattern.analyze(df)
-
-        # 3) build NLG summary
-        report = self.summarizer.summarize(profile=stats["profile_text"],
-                                           semantic_map=semantic_map,
-                                           kpis=stats["kpis"],
-                                           anomalies=stats["anomalies"],
-                                           sample=df.head(10))
-        # 4) prepare plots
-        plots = stats.get("plots", [])
+        graph.add("semantic_map", self.semantic.infer_columns, df)
+
+        # 2) pattern recognition, stats & plots
+        self.pattern.add_stages(graph, df, profile)
+
+        # 3) per-segment KPIs on the columns the semantic map recognised
+        graph.add("grouped", lambda semantic_map, schema: self.pattern.grouped(df, semantic_map, schema, source),
+                  deps=("semantic_map", "schema"))
+        graph.add("plot_segments", lambda grouped: plot_segments(grouped) if grouped else None, deps=("grouped",))
+
+        # 4) build NLG summary as soon as its inputs are ready (streamed when on_token is given);
+        # the prompt is its own stage so each run gets its prompt size from its own results
+        graph.add("prompt",
+                  lambda semantic_map, profile_text, kpis, anomalies, correlation, grouped: self.summarizer.build_prompt(
+                      profile=profile_text, semantic_map=semantic_map, kpis=kpis, anomalies=anomalies,
+                      sample=df.head(10), correlations=correlation.top_pairs,
+                      segments=format_segments(grouped) if grouped else None),
+                  deps=("semantic_map", "profile_text", "kpis", "anomalies", "correlation", "grouped"))
+
+        def report(prompt):
+            if on_token is None:
+                return self.summarizer.complete(*prompt)
+            parts = []
+            for tok in self.summarizer.stream_prompt(*prompt[:2]):
+                parts.append(tok)
+                on_token(tok)
+            return "".join(parts)
+
+        graph.add("report", report, deps=("prompt",))
+        return graph
+
+    def close(self):
+        """Stop the worker processes of the process pool, if one was started."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+    def _limiter(self):
+        return self.scheduler.stage_slot if self.scheduler is not None else None
+
+    def submit(self, df, session_id: str, source=None, dataset_id: str = None,
+               updates: "queue.Queue" = None) -> Ticket:
+        """Queue a run (or an append to `dataset_id`) on the shared scheduler.
+
+        Raises SchedulerBusy when the queue is full; the ticket shows the queue position
+        and ETA, and its result is the (report, plots) pair. With an `updates` queue the
+        run puts its ProgressUpdates there as they happen (not for appends). With `df`
+        None the run streams `source` instead (see run_file).
+        """
+        scheduler = self.scheduler or get_scheduler()
+        if dataset_id:
+            return scheduler.submit(session_id, self.run_append, df, dataset_id)
+        if df is None:
+            return scheduler.submit(session_id, self.run_file, source, None,
+                                    updates.put if updates is not None else None)
+        return scheduler.submit(session_id, self._traced_run, "orchestrator.run", df, source,
+                                updates.put if updates is not None else None)
+
+    def run(self, df, source=None):
+        """Report and plots for `df`; `source` is the file it was read from, if any."""
+        return self._traced_run("orchestrator.run", df, source)
+
+    def run_file(self, source, name: str = None, emit: Optional[Callable[[ProgressUpdate], None]] = None):
+        """Report and plots for a file too big to load: one streaming pass profiles every row,
+        the other stages run on a uniform row sample. Not cached (the key hashes a frame)."""
+        with telemetry.span("orchestrator.run_file") as sp:
+            t0 = time.perf_counter()
+            profile = profile_file(source, name)
+            profile_s = time.perf_counter() - t0
+            sample = profile.pop("sample")
+            report, plots = self._run(sample, source, emit, profile)
+            self.last_timings["stream_profile"] = profile_s
+            self.last_shape = (profile["rows"], len(sample.columns))
+            sp.set_attributes({"data.rows": profile["rows"], "data.sample_rows": len(sample),
+                               "plots": len(plots), "llm.prompt_tokens": self.last_prompt_tokens or 0})
+        if emit is not None:
+            emit(ProgressUpdate("done", "run", (report, plots)))
         return report, plots
+
+    def run_progressive(self, df, source=None) -> Iterator[ProgressUpdate]:
+        """Like run, but yields ProgressUpdates as stages finish; the last one is "done"."""
+        updates: "queue.Queue" = queue.Queue()
+        failed = []
+        parent = telemetry.capture()
+
+        def work():
+            token = telemetry.attach(parent)
+            try:
+                self._traced_run("orchestrator.run_progressive", df, source, updates.put)
+            except BaseException as e:
+                failed.append(e)
+                updates.put(None)
+            finally:
+                telemetry.detach(token)
+
+        threading.Thread(target=work, name="orchestrator-progressive", daemon=True).start()
+        while True:
+            update = updates.get()
+            if update is None:
+                raise failed[0]
+            yield update
+            if update.kind == "done":
+                return
+
+    def _traced_run(self, name: str, df, source=None, emit: Optional[Callable[[ProgressUpdate], None]] = None):
+        with telemetry.span(name, memory_budget=self.memory_budget, **telemetry.frame_attributes(df)) as sp:
+            report, plots = self._run(df, source, emit)
+            self.last_shape = df.shape
+            sp.set_attributes({"cache_hit": self.last_cache_hit, "plots": len(plots),
+                               "llm.prompt_tokens": self.last_prompt_tokens or 0,
+                               "memory.process_peak_mb": round(peak_rss_bytes() / 1024 / 1024, 1)})
+        if emit is not None:
+            emit(ProgressUpdate("done", "run", (report, plots)))
+        return report, plots
+
+    @staticmethod
+    def _stage_update(name: str, result) -> Optional[ProgressUpdate]:
+        if name == "prompt":
+            return None
+        if name in FIGURE_STAGES:
+            return ProgressUpdate("figure", name, result) if result is not None else None
+        if name == "report":
+            return ProgressUpdate("report", name, result)
+        return ProgressUpdate(name if name in PROGRESS_KINDS else "stat", name, result)
+
+    def _emit_cached(self, hit: dict, emit: Callable[[ProgressUpdate], None]):
+        emit(ProgressUpdate("semantic_map", "semantic_map", hit["semantic_map"]))
+        for name, value in hit["stats"].items():
+            if name != "plots":
+                emit(self._stage_update(name, value))
+        for fig in hit["plots"]:
+            emit(ProgressUpdate("figure", "cached", fig))
+        emit(ProgressUpdate("token", "report", hit["report"]))
+        emit(ProgressUpdate("report", "report", hit["report"]))
+
+    def _run(self, df, source=None, emit: Optional[Callable[[ProgressUpdate], None]] = None, profile: dict = None):
+        key = None
+        if self.cache is not None and profile is None:
+            key = cache_key(df, self.pipeline_config())
+            hit = self.cache.get(key)
+            if hit is not None:
+                self.last_cache_hit = True
+                self.last_timings, self.last_memory = {}, {}
+                self.last_stats, self.last_semantic_map = hit["stats"], hit["semantic_map"]
+                if emit is not None:
+                    self._emit_cached(hit, emit)
+                return hit["report"], hit["plots"]
+        self.last_cache_hit = False
+
+        compact_s = None
+        if self.memory_budget:
+            t0 = time.perf_counter()
+            self.last_compaction = compact_frame(df)
+            compact_s = time.perf_counter() - t0
+
+        on_result = on_token = None
+        if emit is not None:
+            def on_result(name, result):
+                update = self._stage_update(name, result)
+                if update is not None:
+                    emit(update)
+
+            def on_token(tok):
+                emit(ProgressUpdate("token", "report", tok))
+
+        graph = self.build_graph(df, source, on_token, profile)
+        try:
+            results = graph.run(on_result)
+        finally:
+            self.last_timings = dict(graph.timings)
+            self.last_memory = dict(graph.memory)
+            self.last_waits = dict(graph.waits)
+            if compact_s is not None:
+                self.last_timings["compact"] = compact_s
+        stats = self.pattern.collect(results)
+        stats["grouped"] = results["grouped"]
+        if results["plot_segments"] is not None:
+            stats["plots"].append(results["plot_segments"])
+        # prompt size next to the report latency, to track latency per token
+        self.last_prompt_tokens = results["prompt"][2]
+        self.last_stats, self.last_semantic_map = stats, results["semantic_map"]
+
+        # 5) prepare plots
+        plots = stats.get("plots", [])
+        # a fallback report means the LLM failed; retry it next time instead of caching
+        if key is not None and FALLBACK_PREFIX not in results["report"]:
+            self.cache.put(key, results["report"], stats, results["semantic_map"], plots)
+        return results["report"], plots
+
+    def grouped_file(self, path: str, sample_rows: int = 10000) -> dict:
+        """Segment KPIs over a CSV/Parquet file without loading it: columns are recognised
+        on the first `sample_rows` rows, DuckDB aggregates the whole file."""
+        sample = sample_file(path, sample_rows)
+        schema = infer_schema(sample)
+        semantic_map = self.semantic.infer_columns(sample)
+        return grouped_kpis(path, resolve_roles(semantic_map, schema), schema)
+
+    def run_append(self, df, dataset_id: str):
+        """Append `df` (new rows only) to `dataset_id` and report on the dataset so far."""
+        def apply():
+            # the dataset lock covers the update and the save only; the report works on this copy
+            with locked_state(dataset_id, contamination=self.pattern.contamination) as state:
+                return state, state.apply(df)
+
+        with telemetry.span("orchestrator.run_append", dataset_id=dataset_id, **telemetry.frame_attributes(df)):
+            graph = StageGraph(max_workers=self.max_workers, limiter=self._limiter())
+            graph.add("semantic_map", self.semantic.infer_columns, df)
+            graph.add("applied", apply)
+            graph.add("history", lambda applied: applied[0].stats(), deps=("applied",))
+            graph.add("changes_text", lambda applied: describe_changes(applied[1], applied[0]), deps=("applied",))
+            # correlations and plots describe the new rows
+            graph.add("correlation", lambda applied: compute_correlations(
+                df, [c for c in applied[0].schema.numeric_columns if c in df]), deps=("applied",))
+            graph.add("prompt",
+                      lambda semantic_map, applied, history, changes_text, correlation: self.summarizer.build_prompt(
+                          profile=f"{history['profile_text']}\n\nChanges in this batch:\n{changes_text}",
+                          semantic_map=semantic_map, kpis=history["kpis"], anomalies=applied[1]["anomalies"],
+                          correlations=correlation.top_pairs),
+                      deps=("semantic_map", "applied", "history", "changes_text", "correlation"))
+            graph.add("report", lambda prompt: self.summarizer.complete(*prompt), deps=("prompt",))
+            graph.add("plots", lambda applied, correlation: self._batch_plots(df, applied[0], correlation),
+                      deps=("applied", "correlation"))
+            results = graph.run()
+            self.last_timings = dict(graph.timings)
+
+        (state, append), history = results["applied"], results["history"]
+        self.last_cache_hit = False
+        self.last_prompt_tokens = results["prompt"][2]
+        self.last_semantic_map = results["semantic_map"]
+        self.last_stats = {**history, "schema": state.schema, "anomalies": append["anomalies"],
+                           "date_columns": state.date_columns, "correlation": results["correlation"],
+                           "changes": append["changes"], "append": {"batch": append["batch"],
+                                                                    "duplicate": append["duplicate"],
+                                                                    "batches": len(state.batches),
+                                                                    "date_range": dict(state.date_range)}}
+        return results["report"], results["plots"]
+
+    @staticmethod
+    def _batch_plots(df, state, correlation) -> list:
+        numeric = [c for c in state.schema.numeric_columns if c in df]
+        dates = [c for c in state.date_columns if c in df]
+        plots = []
+        if len(correlation.columns) > 1:
+            plots.append(plot_correlation(df, state.schema, corr=correlation))
+        if numeric:
+            plots.append(plot_numeric_histogram(df, numeric[0]))
+        if numeric and dates:
+            plots.append(plot_time_series(df, dates[0], numeric[0], date_format=state.schema.date_format(dates[0])))
+        return plots
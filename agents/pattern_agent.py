@@ -5,36 +5,94 @@ Pattern Agent: runs statistical EDA, anomalies detection, and builds plot list
 
 from core_tools.statistical_engine import summarize_numeric, detect_outliers_isolationforest, top_categorical_frequencies, detect_date_columns, compute_basic_kpis
 from core_tools.viz_engine import plot_correlation, plot_numeric_histogram, plot_time_series
+from core_tools.stage_graph import SharedProcessPool, StageGraph
+from core_tools.schema_engine import infer_schema
+from core_tools.correlation_engine import compute_correlations
+from core_tools.grouped_kpis import grouped_kpis, is_queryable_file, resolve_roles
+from config.settings import ORCHESTRATOR_MAX_WORKERS, ORCHESTRATOR_PROCESS_WORKERS, GROUPED_KPIS_ENABLED, GROUPED_THREADS
 import pandas as pd
 
+# stage names registered by PatternAgent.add_stages, in the order results are reported
+STAT_STAGES = ("schema", "profile_text", "numeric_summary", "kpis", "anomalies", "categorical_freq", "date_columns",
+               "correlation")
+PLOT_STAGES = ("plot_correlation", "plot_histogram", "plot_time_series")
+
 class PatternAgent:
-    def analyze(self, df: pd.DataFrame) -> dict:
-        profile = f"Rows: {len(df)}, Columns: {len(df.columns)}"
-        numeric_summary = summarize_numeric(df)
-        kpis = compute_basic_kpis(df)
-        anomalies = detect_outliers_isolationforest(df, contamination=0.03)
-        cat_freq = top_categorical_frequencies(df)
-        date_cols = detect_date_columns(df)
-
-        plots = []
+    def __init__(self, contamination: float = 0.03, n_jobs: int = None, grouped_threads: int = GROUPED_THREADS):
+        self.contamination = contamination
+        # threads for IsolationForest (None: ANOMALY_N_JOBS) and for DuckDB (0: all cores)
+        self.n_jobs = n_jobs
+        self.grouped_threads = grouped_threads
+        # for analyze(); the orchestrator runs these stages on its own pool
+        self.process_pool = SharedProcessPool(ORCHESTRATOR_PROCESS_WORKERS) if ORCHESTRATOR_PROCESS_WORKERS > 0 else None
+
+    def add_stages(self, graph: StageGraph, df: pd.DataFrame, profile: dict = None) -> StageGraph:
+        """Register the statistics and plot stages on `graph`.
+
+        Every stage consumes the shared "schema" stage instead of re-deriving dtypes; after
+        that, only the time series plot depends on another stage (date detection).
+        With a streaming `profile` of the whole file (streaming_profiler.profile_file), `df`
+        is its row sample and the profile supplies the summary statistics.
+        """
+        graph.add("schema", infer_schema, df)
+        if profile is None:
+            graph.add("profile_text", lambda: f"Rows: {len(df)}, Columns: {len(df.columns)}")
+            graph.add("numeric_summary", summarize_numeric, df, deps=("schema",))
+            graph.add("kpis", compute_basic_kpis, df, deps=("schema",))
+            graph.add("categorical_freq", top_categorical_frequencies, df, deps=("schema",))
+        else:
+            summary = profile["numeric_summary"]
+            graph.add("profile_text", lambda: profile["profile_text"])
+            graph.add("numeric_summary", lambda schema: summary.loc[[c for c in schema.numeric_columns
+                                                                     if c in summary.index]],
+                      deps=("schema",))
+            graph.add("kpis", lambda schema: {c: profile["kpis"][c] for c in schema.numeric_columns
+                                              if c in profile["kpis"]}, deps=("schema",))
+            graph.add("categorical_freq", lambda schema: {c: profile["categorical_freq"][c]
+                                                          for c in schema.categorical_columns
+                                                          if c in profile["categorical_freq"]},
+                      deps=("schema",))
+        graph.add("anomalies", detect_outliers_isolationforest, df, contamination=self.contamination,
+                  n_jobs=self.n_jobs, deps=("schema",), process=True)
+        graph.add("date_columns", detect_date_columns, df, deps=("schema",))
+        # computed once, shared by the heatmap and the summarizer
+        graph.add("correlation", lambda schema: compute_correlations(df, schema.numeric_columns), deps=("schema",))
+
         # correlation plot
-        if len(df.select_dtypes(include=["number"]).columns) > 1:
-            plots.append(plot_correlation(df))
+        graph.add("plot_correlation",
+                  lambda schema, correlation: plot_correlation(df, schema, corr=correlation)
+                  if len(schema.numeric_columns) > 1 else None,
+                  deps=("schema", "correlation"))
         # histogram of top numeric column
-        num_cols = df.select_dtypes(include=["number"]).columns
-        if len(num_cols) > 0:
-            plots.append(plot_numeric_histogram(df, num_cols[0]))
-
+        graph.add("plot_histogram",
+                  lambda schema: plot_numeric_histogram(df, schema.numeric_columns[0])
+                  if schema.numeric_columns else None,
+                  deps=("schema",))
         # if a date column exists and a numeric column exists, add time series of first pair
-        if date_cols and num_cols.any():
-            plots.append(plot_time_series(df, date_cols[0], num_cols[0]))
-
-        return {
-            "profile_text": profile,
-            "numeric_summary": numeric_summary,
-            "kpis": kpis,
-            "anomalies": anomalies,
-            "categorical_freq": cat_freq,
-            "date_columns": date_cols,
-            "plots": plots
-        }
+        graph.add("plot_time_series",
+                  lambda schema, date_columns: plot_time_series(df, date_columns[0], schema.numeric_columns[0],
+                                                                date_format=schema.date_format(date_columns[0]))
+                  if date_columns and schema.numeric_columns else None,
+                  deps=("schema", "date_columns"))
+        return graph
+
+    @staticmethod
+    def collect(results: dict) -> dict:
+        """Assemble the analyze() result dict from stage results."""
+        stats = {name: results[name] for name in STAT_STAGES}
+        stats["plots"] = [results[name] for name in PLOT_STAGES if results.get(name) is not None]
+        return stats
+
+    def analyze(self, df: pd.DataFrame, max_workers: int = ORCHESTRATOR_MAX_WORKERS) -> dict:
+        graph = StageGraph(max_workers=max_workers, process_pool=self.process_pool)
+        results = self.add_stages(graph, df).run()
+        self.last_timings = graph.timings
+        return self.collect(results)
+
+    def grouped(self, df: pd.DataFrame, semantic_map: dict, schema, source=None) -> dict:
+        """Best / worst segments; aggregated by DuckDB over `source` when it is a CSV/Parquet path,
+        else over the in-memory frame. {} when disabled or no airline columns were recognised."""
+        if not GROUPED_KPIS_ENABLED:
+            return {}
+        return grouped_kpis(source if is_queryable_file(source) else df, resolve_roles(semantic_map, schema), schema,
+                            threads=self.grouped_threads)
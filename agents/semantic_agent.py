@@ -1,44 +1,68 @@
 # agents/semantic_agent.py
 """
 Semantic Agent: uses embeddings to map column names and sample values
-to common airline concepts (revenue, passengers, delay, cancelled, route, flightno, date, time).
+to common airline concepts (revenue, passengers, delay, cancelled, route, flightno, carrier, date, time).
 """
 
-from core_tools.embedding_engine import EmbeddingEngine
+from core_tools import model_registry
+from core_tools.concept_index import load_dictionary, load_or_build
+from core_tools.telemetry import traced
+from config.settings import (CONCEPT_INDEX_PATH, CONCEPT_INDEX_DIR, SEMANTIC_TOP_K, SEMANTIC_VALUE_WEIGHT,
+                             SEMANTIC_VALUE_SAMPLES)
 from typing import Dict, Any
+import os
 import numpy as np
 
-# Known concept labels used to match against (can be extended)
+# Built-in concept labels, used when there is no data dictionary file
 CONCEPTS = [
     "revenue", "passengers", "delay", "cancel", "route", "flight number", "date", "time",
-    "origin", "destination", "seat_capacity", "load_factor", "fare"
+    "origin", "destination", "seat_capacity", "load_factor", "fare", "carrier"
 ]
 
+def _first_values(s, n: int = 5) -> list:
+    """First n non-null values as strings, scanning in blocks instead of copying the column."""
+    out = []
+    for start in range(0, len(s), 4096):
+        out += [str(v) for v in s.iloc[start:start + 4096].dropna().head(n - len(out))]
+        if len(out) >= n:
+            break
+    return out
+
 class SemanticAgent:
-    def __init__(self, backend: str = "auto"):
-        self.engine = EmbeddingEngine(backend)
+    def __init__(self, backend: str = "auto", concept_path: str = CONCEPT_INDEX_PATH,
+                 index_dir: str = CONCEPT_INDEX_DIR, value_weight: float = SEMANTIC_VALUE_WEIGHT,
+                 top_k: int = SEMANTIC_TOP_K):
+        # shared per process: the model is loaded once, not on every Streamlit rerun
+        self.engine = model_registry.get_embedding_engine(backend)
+        self.value_weight = value_weight
+        self.top_k = top_k
 
-        # precompute concept embeddings
-        self.concept_emb = self.engine.encode(CONCEPTS)
+        # concept embeddings: computed once per dictionary and model, then memory-mapped
+        def build():
+            dictionary = load_dictionary(concept_path) if concept_path and os.path.exists(concept_path) \
+                else {c: [] for c in CONCEPTS}
+            return load_or_build(dictionary, self.engine.encode_array,
+                                 f"{self.engine.backend}/{self.engine.model_name}", index_dir)
+        self.index = model_registry.get_or_create(
+            ("concept_index", self.engine.backend, self.engine.model_name, concept_path, index_dir), build)
 
+    @traced("semantic.infer_columns")
     def infer_columns(self, df) -> Dict[str, Any]:
         cols = list(df.columns)
-        col_map = {}
-        col_samples = {}
-        col_embs = self.engine.encode(cols)
+        if not cols:
+            return {"mapping": {}, "samples": {}}
+        col_samples = {c: _first_values(df[c], SEMANTIC_VALUE_SAMPLES) for c in cols}
+        texts = [str(c) for c in cols]
+        with_values = [i for i, c in enumerate(cols) if col_samples[c]] if self.value_weight > 0 else []
+        # column names and sampled values in one batched encode
+        texts += [", ".join(col_samples[cols[i]]) for i in with_values]
+        embs = np.asarray(self.engine.encode_array(texts), dtype=np.float32)
 
-        for i, c in enumerate(cols):
-            # compute cosine similarity with concept embeddings
-            v = np.array(col_embs[i], dtype=float)
-            sims = []
-            for j, ce in enumerate(self.concept_emb):
-                ce_v = np.array(ce, dtype=float)
-                sim = float(np.dot(v, ce_v) / (np.linalg.norm(v) * np.linalg.norm(ce_v) + 1e-10))
-                sims.append((CONCEPTS[j], sim))
-            sims_sorted = sorted(sims, key=lambda x: x[1], reverse=True)
-            col_map[c] = {"best_match": sims_sorted[0][0], "score": sims_sorted[0][1],
-                          "top_matches": sims_sorted[:3]}
-            # sample value type hint
-            sample_vals = df[c].dropna().astype(str).head(5).tolist()
-            col_samples[c] = sample_vals
+        sims = self.index.similarities(embs[:len(cols)])
+        if with_values:
+            w = self.value_weight
+            sims[with_values] = (1 - w) * sims[with_values] + w * self.index.similarities(embs[len(cols):])
+        col_map = {}
+        for c, top in zip(cols, self.index.top_k(sims, self.top_k)):
+            col_map[c] = {"best_match": top[0][0], "score": top[0][1], "top_matches": top}
         return {"mapping": col_map, "samples": col_samples}
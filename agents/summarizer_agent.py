@@ -3,54 +3,87 @@
 Summarizer Agent: builds a prompt and asks the LLM for a human-friendly report.
 """
 
-from core_tools.llm_connector import generate_text
+from core_tools.llm_connector import generate_text, stream_text
+from core_tools import telemetry
+from core_tools.prompt_builder import build_prompt as build_budgeted_prompt
+from config.settings import PROMPT_TOKEN_BUDGET
+from typing import Iterator
+import hashlib
 import yaml
 import os
 
-PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "prompts", "summarizer_prompts.yaml")
+# prefix of reports produced without the LLM (these are never cached)
+FALLBACK_PREFIX = "Automated summary could not be generated by LLM"
+
+PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "prompts", "prompts.yaml")
 
 def _load_prompt_template():
     try:
         with open(PROMPT_PATH, "r", encoding="utf-8") as f:
             data = yaml.safe_load(f)
-            return data.get("summary_prompt") or data.get("example_template")
+            # instructions followed by the data blocks
+            parts = [data.get("summary_prompt"), data.get("example_template")]
+            template = "\n\n".join(p.strip() for p in parts if p)
+            if "{kpis}" not in template:
+                raise ValueError("prompt template has no {kpis} placeholder")
+            return template
     except Exception:
         # fallback template
         return (
             "You are an expert airline data analyst. Using the profile, semantic mapping, KPIs and anomalies below, "
             "write a short executive summary with headings, one-sentence recommendations, and an action list.\n\n"
-            "Profile:\n{profile}\n\nSemantic mapping:\n{semantic}\n\nKPIs:\n{kpis}\n\nAnomalies:\n{anomalies}\n\nWrite the summary now."
+            "Profile:\n{profile}\n\nSemantic mapping:\n{semantic}\n\nKPIs:\n{kpis}\n\nAnomalies:\n{anomalies}\n\n"
+            "Strongest correlations:\n{correlations}\n\nSegments (routes, flights, carriers, days):\n{segments}\n\n"
+            "Write the summary now."
         )
 
 class SummarizerAgent:
-    def __init__(self):
+    def __init__(self, token_budget: int = PROMPT_TOKEN_BUDGET):
         self.template = _load_prompt_template()
+        self.token_budget = token_budget
 
-    def summarize(self, profile: str, semantic_map: dict, kpis: dict, anomalies: dict, sample=None) -> str:
-        # Prepare text blocks
-        semantic_text = []
-        for col, m in semantic_map.get("mapping", {}).items():
-            semantic_text.append(f"{col} -> {m['best_match']} (score {m['score']:.2f})")
-        semantic_block = "\n".join(semantic_text[:50])
-
-        # kpis into short table
-        kpi_lines = []
-        for col, v in list(kpis.items())[:20]:
-            kpi_lines.append(f"{col}: mean={v['mean']}, std={v['std']}, min={v['min']}, max={v['max']}")
-        kpi_block = "\n".join(kpi_lines) if kpi_lines else "No numeric KPIs."
-
-        anomaly_block = f"Anomaly count: {anomalies.get('count', 0)}"
-
-        prompt = self.template.format(
-            profile=profile,
-            semantic=semantic_block,
-            kpis=kpi_block,
-            anomalies=anomaly_block
-        )
+    @property
+    def template_version(self) -> str:
+        """Short hash of the prompt template; part of the report cache key."""
+        return hashlib.sha1(self.template.encode("utf-8")).hexdigest()[:12]
+
+    def build_prompt(self, profile: str, semantic_map: dict, kpis: dict, anomalies: dict, sample=None,
+                     correlations=None, segments=None) -> tuple:
+        """Return (prompt, fallback_text, prompt_tokens) for the given pipeline outputs.
+
+        Columns are ranked by informativeness and added until the token budget is used up.
+        """
+        built = build_budgeted_prompt(self.template, profile, semantic_map, kpis, anomalies,
+                                      correlations=correlations, segments=segments, budget=self.token_budget)
+        fallback = f"Profile:\n{profile}\n\nKPIs:\n{built.kpi_block}\n\nAnomalies:\n{built.anomaly_block}"
+        return built.prompt, fallback, built.tokens
+
+    def summarize(self, profile: str, semantic_map: dict, kpis: dict, anomalies: dict, sample=None,
+                  correlations=None, segments=None) -> str:
+        return self.complete(*self.build_prompt(profile, semantic_map, kpis, anomalies, sample, correlations,
+                                                segments))
+
+    def complete(self, prompt: str, fallback: str, prompt_tokens: int = None) -> str:
+        """The LLM's report for a prompt from build_prompt (the fallback text if the call fails)."""
+        with telemetry.span("summarizer.summarize", **{"llm.prompt_tokens": prompt_tokens}) as sp:
+            try:
+                return generate_text(prompt)
+            except Exception as e:
+                sp.record_exception(e)
+                sp.set_attribute("summarizer.fallback", True)
+                # fallback minimal summary
+                return f"{FALLBACK_PREFIX} due to: {e}\n\n{fallback}"
+
+    def stream(self, profile: str, semantic_map: dict, kpis: dict, anomalies: dict, sample=None,
+               correlations=None, segments=None) -> Iterator[str]:
+        """Like summarize, but yields the report token by token as the LLM produces it."""
+        prompt, fallback, _ = self.build_prompt(profile, semantic_map, kpis, anomalies, sample, correlations, segments)
+        return self.stream_prompt(prompt, fallback)
 
-        # call LLM
+    def stream_prompt(self, prompt: str, fallback: str) -> Iterator[str]:
+        """Like complete, token by token."""
         try:
-            return generate_text(prompt)
+            for tok in stream_text(prompt):
+                yield tok
         except Exception as e:
-            # fallback minimal summary
-            return f"Automated summary could not be generated by LLM due to: {e}\n\nProfile:\n{profile}\n\nKPIs:\n{kpi_block}\n\nAnomalies:\n{anomaly_block}"
+            yield f"\n\n{FALLBACK_PREFIX} due to: {e}\n\n{fallback}"
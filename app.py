@@ -1,45 +1,143 @@
 # app.py
-import streamlit as st
+import queue
+import time
+import uuid
 import pandas as pd
+import streamlit as st
 from agents.orchestrator_agent import OrchestratorAgent
-from config.settings import DEBUG_MODE
+from core_tools.ingestion import SUPPORTED_SUFFIXES, read_table
+from core_tools.scheduler import SchedulerBusy
+from core_tools.grouped_kpis import format_segments
+from config.settings import DEBUG_MODE, PROFILE_STREAM_MIN_MB
 
 st.set_page_config(page_title="Airline AI Agent - Smart Summarizer", layout="wide")
 st.title("✈️ Airline AI Agent — Smart Summarizer")
 
 st.markdown("""
-Upload an airline CSV (or Excel) dataset. The AI agent will:
+Upload an airline dataset (CSV, Excel, Parquet or Arrow/Feather). The AI agent will:
 - infer column meanings (semantic inference),
 - detect patterns & anomalies (statistical + isolation forest),
 - generate a reader-friendly executive summary (LLM).
 """)
 
-u = st.file_uploader("Upload CSV or Excel", type=["csv", "xlsx", "xls"])
+# append mode: each upload is a batch of new rows for this dataset (see core_tools/incremental.py)
+dataset_id = st.sidebar.text_input("Append to dataset", help="Name of a dataset that grows in batches. "
+                                   "Each upload is added to it and only the new rows are analysed.")
+
+u = st.file_uploader("Upload a dataset", type=[s.lstrip(".") for s in SUPPORTED_SUFFIXES])
 if u:
-    try:
-        if u.name.endswith(".csv"):
-            df = pd.read_csv(u)
-        else:
-            df = pd.read_excel(u)
-    except Exception as e:
-        st.error(f"Error reading file: {e}")
-        st.stop()
+    # Streamlit reruns this script on every interaction; the submitted run lives in the
+    # session state, keyed by the upload and the target dataset, so a rerun resumes
+    # polling it (and replays what it already showed) instead of submitting it again
+    job_key = (getattr(u, "file_id", None), u.name, u.size, dataset_id)
+    job = st.session_state.get("job")
+    if job is None or job["key"] != job_key:
+        # a large upload is profiled in one streaming pass instead of loaded (not in append mode)
+        df = None
+        if dataset_id or u.size < PROFILE_STREAM_MIN_MB * 1024 * 1024:
+            try:
+                df = read_table(u, name=u.name)
+            except Exception as e:
+                st.error(f"Error reading file: {e}")
+                st.stop()
 
-    st.success(f"Loaded {len(df)} rows × {len(df.columns)} columns")
-    if DEBUG_MODE:
-        st.subheader("Data preview")
-        st.dataframe(df.head())
+        orchestrator = OrchestratorAgent()
+        # runs from all sessions share one worker pool (core_tools/scheduler.py); a full run reports
+        # its statistics, figures and summary tokens as they are produced
+        session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+        updates = None if dataset_id else queue.Queue()
+        try:
+            ticket = orchestrator.submit(df, session_id, source=u if df is None else None,
+                                         dataset_id=dataset_id or None, updates=updates)
+        except SchedulerBusy as e:
+            st.error(f"The analysis service is busy: {e}")
+            st.stop()
+        job = {"key": job_key, "orchestrator": orchestrator, "ticket": ticket, "updates": updates,
+               "seen": [], "shape": df.shape if df is not None else None,
+               "head": df.head() if df is not None else None}
+        st.session_state["job"] = job
+    orchestrator, ticket, updates = job["orchestrator"], job["ticket"], job["updates"]
 
-    orchestrator = OrchestratorAgent()
-    with st.spinner("Running AI agents…"):
-        report, plots = orchestrator.run(df)
+    if job["shape"] is not None:
+        st.success(f"Loaded {job['shape'][0]} rows × {job['shape'][1]} columns")
+    else:
+        st.success(f"Streaming {u.size / 1024 / 1024:.0f} MB upload; statistics cover every row, "
+                   f"anomalies and charts a sample")
+    if DEBUG_MODE and job["head"] is not None:
+        st.subheader("Data preview")
+        st.dataframe(job["head"])
 
+    status = st.empty()
     st.subheader("Executive Summary")
-    st.markdown(report, unsafe_allow_html=True)
-
+    summary = st.empty()
+    key_figures = st.container()
     st.subheader("Visualizations")
-    for fig in plots:
-        st.plotly_chart(fig, use_container_width=True)
+    figures = st.container()
+    summary_text, started = "", False
+    replay = list(job["seen"])
+
+    with st.spinner("Running AI agents…"):
+        while True:
+            if replay:
+                update = replay.pop(0)
+            else:
+                try:
+                    update = updates.get(timeout=0.2) if updates is not None else None
+                except queue.Empty:
+                    update = None
+                if update is not None:
+                    job["seen"].append(update)
+            if update is None:
+                # every update is queued before the ticket completes, but may have arrived
+                # after the get above timed out: stop only once the queue is drained too
+                if ticket.done() and (updates is None or updates.empty()):
+                    break
+                position, eta = ticket.position(), ticket.eta()
+                wait = f", about {eta:.0f}s to go" if eta is not None else ""
+                if position >= 0:
+                    status.info(f"Queued: {position} analyses ahead of yours{wait}.")
+                elif not started:
+                    status.info(f"Running{wait}.")
+                if updates is None:
+                    time.sleep(0.5)
+                continue
+            if update.kind == "done":
+                break
+            if not started:
+                status.empty()
+                started = True
+            if update.kind == "kpis" and update.value:
+                key_figures.subheader("Key figures")
+                key_figures.dataframe(pd.DataFrame(update.value).T)
+            elif update.kind == "anomalies":
+                key_figures.metric("Anomalous rows", update.value.get("count", 0))
+            elif update.kind == "stat" and update.name == "grouped" and update.value:
+                key_figures.text(format_segments(update.value))
+            elif update.kind == "figure":
+                figures.plotly_chart(update.value, use_container_width=True)
+            elif update.kind == "token":
+                summary_text += update.value
+                summary.markdown(summary_text + " ▌")
+            elif update.kind == "report":
+                summary.markdown(update.value, unsafe_allow_html=True)
+    status.empty()
+    try:
+        report, plots = ticket.result()
+    except Exception as e:
+        summary.empty()
+        st.error(f"The analysis failed: {e}")
+        st.stop()
+    if dataset_id:
+        append = orchestrator.last_stats["append"]
+        if append["duplicate"]:
+            st.warning("This file was already added to the dataset; the report covers the existing data.")
+        else:
+            st.caption(f"Batch {append['batch']} of '{dataset_id}' ({append['batches']} batches so far).")
+    # the finished report replaces the streamed text (and its cursor) in any case
+    summary.markdown(report, unsafe_allow_html=True)
+    if dataset_id:
+        for fig in plots:
+            figures.plotly_chart(fig, use_container_width=True)
 
 else:
     st.info("Please upload a dataset to begin analysis.")
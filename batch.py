@@ -0,0 +1,255 @@
+# batch.py
+"""
+Headless batch runner: summarise many dataset files without Streamlit.
+
+    python batch.py "data/stations/*.csv" --out reports/nightly --workers 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Iterable, List, Optional
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+import numpy as np
+import pandas as pd
+from core_tools.ingestion import SUPPORTED_SUFFIXES, read_table
+from config.settings import BATCH_WORKERS, BATCH_OUTPUT_DIR, MEMORY_BUDGET_MODE, PROFILE_STREAM_MIN_MB
+
+MANIFEST = "manifest.jsonl"
+
+# one orchestrator per worker process, created by _init_worker
+_agent = None
+# threadpoolctl limits of this worker, kept alive for its lifetime
+_thread_limits = None
+
+
+def find_inputs(patterns: Iterable[str]) -> List[str]:
+    """Expand files, directories and glob patterns into a sorted list of supported files."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            candidates = glob.glob(pattern, recursive=True) or [pattern]
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_SUFFIXES):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def output_name(path: str, root: str) -> str:
+    """Directory name for a file's outputs: its path relative to the common root, flattened."""
+    rel = os.path.relpath(path, root)
+    return rel.replace(os.sep, "__")
+
+
+def to_jsonable(obj):
+    """Statistics contain frames, numpy values and dataclasses; convert them for json.dump."""
+    if isinstance(obj, pd.DataFrame):
+        return to_jsonable(obj.to_dict(orient="index"))
+    if isinstance(obj, pd.Series):
+        return to_jsonable(obj.to_dict())
+    if is_dataclass(obj) and not isinstance(obj, type):
+        # the correlation matrix is already in the heatmap; keep the pairs only
+        return to_jsonable({k: v for k, v in asdict(obj).items() if k != "matrix"})
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, set)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return to_jsonable(obj.tolist())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
+def inner_threads(workers: int) -> int:
+    """Threads each of `workers` worker processes may use without oversubscribing the CPUs."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(memory_budget: bool = MEMORY_BUDGET_MODE, threads: Optional[int] = None):
+    global _agent, _thread_limits
+    from agents.orchestrator_agent import OrchestratorAgent
+    # the batch pool already uses every core; stages run on threads inside each worker
+    if threads is None:
+        _agent = OrchestratorAgent(process_workers=0, memory_budget=memory_budget)
+        return
+    from threadpoolctl import threadpool_limits
+    _thread_limits = threadpool_limits(limits=threads)
+    _agent = OrchestratorAgent(max_workers=threads, process_workers=0, memory_budget=memory_budget)
+    _agent.pattern.n_jobs = threads
+    _agent.pattern.grouped_threads = threads
+
+
+def _write_json(path: str, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def process_file(path: str, out_dir: str) -> Dict:
+    """Run the pipeline on one file and write its outputs. Never raises; errors are reported."""
+    if _agent is None:
+        _init_worker()
+    t0 = time.perf_counter()
+    entry = {"source": path, "output": out_dir, "pid": os.getpid()}
+    try:
+        if os.path.getsize(path) >= PROFILE_STREAM_MIN_MB * 1024 * 1024:
+            load_s = 0.0  # read while profiling; see the stream_profile timing
+            report, plots = _agent.run_file(path)
+        else:
+            df = read_table(path)
+            load_s = time.perf_counter() - t0
+            report, plots = _agent.run(df, source=path)
+        rows, columns = _agent.last_shape[0], list(_agent.last_stats["schema"].columns)
+
+        os.makedirs(out_dir, exist_ok=True)
+        plot_files = []
+        for i, fig in enumerate(plots):
+            name = f"plot_{i}.html"
+            fig.write_html(os.path.join(out_dir, name), include_plotlyjs="cdn", full_html=True)
+            plot_files.append(name)
+        with open(os.path.join(out_dir, "report.md"), "w", encoding="utf-8") as f:
+            f.write(report)
+        stats = dict(_agent.last_stats)
+        stats.pop("plots", None)
+        anomalies = dict(stats.get("anomalies") or {})
+        anomalies.pop("scores", None)  # one score per row; not useful in a report
+        stats["anomalies"] = anomalies
+        timings = {"load": round(load_s, 4), **{k: round(v, 4) for k, v in _agent.last_timings.items()}}
+        _write_json(os.path.join(out_dir, "result.json"), to_jsonable({
+            "source": path, "rows": rows, "columns": columns, "report": report,
+            "stats": stats, "semantic_map": _agent.last_semantic_map, "timings": timings,
+            "prompt_tokens": _agent.last_prompt_tokens, "cache_hit": _agent.last_cache_hit,
+            "memory": _agent.last_memory, "compaction": _agent.last_compaction, "plots": plot_files,
+        }))
+        entry.update(status="ok", rows=rows, timings=timings, cache_hit=_agent.last_cache_hit,
+                     peak_mb=_agent.last_memory.get("total", {}).get("peak_mb"))
+    except Exception as e:
+        entry.update(status="error", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    entry["seconds"] = round(time.perf_counter() - t0, 4)
+    return entry
+
+
+def _file_state(path: str) -> Dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_manifest(out_root: str) -> Dict[str, Dict]:
+    """Latest manifest entry per source file."""
+    done = {}
+    path = os.path.join(out_root, MANIFEST)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                done[entry["source"]] = entry
+    return done
+
+
+def _is_done(state: Dict, entry: Optional[Dict]) -> bool:
+    return (entry is not None and entry.get("status") == "ok"
+            and {k: entry.get(k) for k in ("size", "mtime_ns")} == state
+            and os.path.exists(os.path.join(entry["output"], "result.json")))
+
+
+def _crashed(path: str, out_dir: str) -> Dict:
+    return {"source": path, "output": out_dir, "status": "error", "seconds": 0.0,
+            "error": "BrokenProcessPool: the worker process died while running this file"}
+
+
+def _run_pool(jobs: List[tuple], workers: int, initargs: tuple, record) -> List[tuple]:
+    """Run jobs on one pool; returns the jobs whose results were lost to a broken pool."""
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(process_file, path, out_dir): (path, out_dir, state) for path, out_dir, state in jobs}
+        for fut in as_completed(futures):
+            try:
+                record(fut.result(), futures[fut][2])
+            except BrokenProcessPool:
+                broken.append(futures[fut])
+    return broken
+
+
+def run_batch(inputs: Iterable[str], out_root: str = BATCH_OUTPUT_DIR, workers: int = BATCH_WORKERS,
+              resume: bool = True, memory_budget: bool = MEMORY_BUDGET_MODE, log=print) -> List[Dict]:
+    """Process every input file and return one manifest entry per file run in this call."""
+    files = find_inputs(inputs)
+    os.makedirs(out_root, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(p) for p in files]) if files else ""
+    previous = load_manifest(out_root) if resume else {}
+    # size and mtime as of now: a file changed while it runs is not marked done in its new state
+    states = {}
+    for p in files:
+        try:
+            states[p] = _file_state(p)
+        except FileNotFoundError:
+            continue  # removed since it was listed
+    todo = [p for p in states if not _is_done(states[p], previous.get(p))]
+    log(f"{len(files)} files, {len(files) - len(todo)} already done, {len(todo)} to run on {workers} worker(s)")
+
+    entries = []
+    manifest = open(os.path.join(out_root, MANIFEST), "a", encoding="utf-8")
+
+    def record(entry: Dict, state: Dict):
+        entry.update(state)
+        manifest.write(json.dumps(entry) + "\n")
+        manifest.flush()
+        entries.append(entry)
+        detail = f"{entry['rows']} rows" if entry["status"] == "ok" else entry["error"]
+        log(f"[{len(entries)}/{len(todo)}] {entry['status']:5} {entry['seconds']:8.2f}s  "
+            f"{os.path.relpath(entry['source'], root)}  ({detail})")
+
+    t0 = time.perf_counter()
+    try:
+        jobs = [(p, os.path.join(out_root, output_name(p, root)), states[p]) for p in todo]
+        if workers <= 1 or len(jobs) <= 1:
+            if jobs:
+                _init_worker(memory_budget)
+            for path, out_dir, state in jobs:
+                record(process_file(path, out_dir), state)
+        else:
+            broken = _run_pool(jobs, workers, (memory_budget, inner_threads(workers)), record)
+            # a worker died (e.g. killed for memory) and took the pool's pending results with it:
+            # rerun those files one per pool, so only the file that kills its worker fails
+            for job in broken:
+                for lost in _run_pool([job], 1, (memory_budget, inner_threads(workers)), record):
+                    record(_crashed(lost[0], lost[1]), lost[2])
+    finally:
+        manifest.close()
+    failed = sum(e["status"] != "ok" for e in entries)
+    log(f"done in {time.perf_counter() - t0:.1f}s: {len(entries) - failed} ok, {failed} failed")
+    return entries
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    ap.add_argument("--out", default=BATCH_OUTPUT_DIR, help="output directory")
+    ap.add_argument("--workers", type=int, default=BATCH_WORKERS, help="worker processes")
+    ap.add_argument("--no-resume", dest="resume", action="store_false", help="rerun files already done")
+    ap.add_argument("--memory-budget", action="store_true", default=MEMORY_BUDGET_MODE,
+                    help="compact dtypes and record peak memory per stage")
+    args = ap.parse_args(argv)
+    entries = run_batch(args.inputs, args.out, args.workers, resume=args.resume, memory_budget=args.memory_budget)
+    return 1 if any(e["status"] != "ok" for e in entries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmarks/bench_concepts.py
+"""
+Concept matching benchmark: nested-loop matching vs the ConceptIndex matrix multiply.
+
+    python benchmarks/bench_concepts.py --concepts 500 5000 --synonyms 3 --columns 200 2000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_stages import HashingEngine  # noqa: E402
+from core_tools.concept_index import _entries, load_index, load_or_build  # noqa: E402
+
+WORDS = ["fuel", "crew", "gate", "taxi", "block", "hours", "revenue", "cost", "seat", "mile", "cargo", "tax",
+         "fee", "fare", "yield", "delay", "turn", "slot", "tail", "lease", "maint", "check", "ancillary",
+         "baggage", "lounge", "loyalty", "points", "route", "sector", "hub", "spill", "load", "margin", "ebit"]
+
+
+def make_dictionary(n: int, synonyms: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    out = {}
+    while len(out) < n:
+        name = " ".join(rng.choice(WORDS, int(rng.integers(2, 4)))) + f" {len(out)}"
+        out[name] = [" ".join(rng.choice(WORDS, int(rng.integers(1, 4)))) for _ in range(synonyms)]
+    return out
+
+
+def loop_match(col_embs, concept_emb, labels):
+    """The former SemanticAgent.infer_columns inner loops (best synonym per concept)."""
+    best = []
+    for v_raw in col_embs:
+        v = np.array(v_raw, dtype=float)
+        scores = {}
+        for j, ce in enumerate(concept_emb):
+            ce_v = np.array(ce, dtype=float)
+            sim = float(np.dot(v, ce_v) / (np.linalg.norm(v) * np.linalg.norm(ce_v) + 1e-10))
+            scores[labels[j]] = max(sim, scores.get(labels[j], -1.0))
+        label = max(scores, key=scores.get)
+        best.append((label, scores[label]))
+    return best
+
+
+def run_case(engine, n_concepts: int, n_columns: int, args) -> dict:
+    dictionary = make_dictionary(n_concepts, args.synonyms, args.seed)
+    columns = [f"{' '.join(np.random.default_rng(args.seed + i).choice(WORDS, 2))}_{i}" for i in range(n_columns)]
+    col_embs = engine.encode_array(columns)
+    root = tempfile.mkdtemp(prefix="bench_concepts_")
+    try:
+        model_id = f"{engine.backend}/{engine.model_name}"
+        t0 = time.perf_counter()
+        index = load_or_build(dictionary, engine.encode_array, model_id, root)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index = load_index(os.path.join(root, index.version))
+        load_s = time.perf_counter() - t0
+        match_s = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            matches = index.match(col_embs, 3)
+            match_s = min(match_s, time.perf_counter() - t0)
+        result = {"concepts": n_concepts, "entries": int(index.matrix.shape[0]), "columns": n_columns,
+                  "build_s": round(build_s, 4), "load_s": round(load_s, 5), "match_s": round(match_s, 5)}
+        if not args.no_loop:
+            _, labels = _entries(dictionary)
+            sample = min(n_columns, args.loop_columns)
+            concept_emb = np.asarray(index.matrix)
+            t0 = time.perf_counter()
+            best = loop_match(col_embs[:sample], concept_emb, labels)
+            loop_s = (time.perf_counter() - t0) * n_columns / sample
+            result["loop_s"] = round(loop_s, 3)
+            result["speedup"] = round(loop_s / max(match_s, 1e-9), 1)
+            result["agree"] = round(float(np.mean([abs(b[1] - m[0][1]) < 1e-5 for b, m in zip(best, matches)])), 4)
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concepts", type=int, nargs="+", default=[500, 5000])
+    ap.add_argument("--synonyms", type=int, default=3)
+    ap.add_argument("--columns", type=int, nargs="+", default=[200])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--loop-columns", type=int, default=20)
+    ap.add_argument("--no-loop", action="store_true")
+    ap.add_argument("--real-embeddings", action="store_true")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    if args.real_embeddings:
+        from core_tools import model_registry
+        engine = model_registry.get_embedding_engine()
+    else:
+        engine = HashingEngine()
+    results = [run_case(engine, n, m, args) for n in args.concepts for m in args.columns]
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_embeddings.py
+"""
+Embedding backend benchmark: cold start, throughput and memory of local (torch) vs ONNX.
+
+    python benchmarks/bench_embeddings.py --backends local onnx onnx-int8 --texts 2000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# backend name on the command line -> (EMBEDDING_BACKEND, ONNX_EMBEDDING_QUANTIZED)
+BACKENDS = {"local": ("local", "0"), "onnx": ("onnx", "0"), "onnx-int8": ("onnx", "1"), "openai": ("openai", "0")}
+
+
+def make_texts(n: int, seed: int = 0) -> list:
+    """Column headers of the kind the semantic agent embeds."""
+    from core_tools.synthetic_data import CORE_COLUMNS
+    rng = np.random.default_rng(seed)
+    words = ["dep", "arr", "delay", "minutes", "flight", "number", "origin", "dest", "airport", "revenue",
+             "pax", "passengers", "seats", "load", "factor", "fare", "cancelled", "date", "time", "route",
+             "carrier", "tail", "gate", "taxi", "out", "in", "block", "hours", "fuel", "crew"]
+    texts = list(CORE_COLUMNS)
+    while len(texts) < n:
+        k = int(rng.integers(1, 5))
+        sep = "_" if rng.random() < 0.7 else " "
+        text = sep.join(rng.choice(words, k))
+        texts.append(text.upper() if rng.random() < 0.5 else text)
+    return texts[:n]
+
+
+def worker(args) -> dict:
+    t0 = time.perf_counter()
+    from core_tools.embedding_engine import EmbeddingEngine
+    from core_tools.memory_budget import current_rss_bytes, peak_rss_bytes
+    engine = EmbeddingEngine(os.environ["EMBEDDING_BACKEND"], cache=None)
+    load_s = time.perf_counter() - t0
+    rss_loaded = current_rss_bytes()
+
+    t1 = time.perf_counter()
+    engine.encode_array(["DEP_DELAY"])
+    first_s = time.perf_counter() - t1
+
+    texts = make_texts(args.texts, args.seed)
+    best = float("inf")
+    for _ in range(args.repeat):
+        t1 = time.perf_counter()
+        vecs = engine.encode_array(texts)
+        best = min(best, time.perf_counter() - t1)
+    from agents.semantic_agent import CONCEPTS
+    np.save(args.vectors, np.vstack([vecs, engine.encode_array(CONCEPTS)]).astype(np.float32))
+    return {"model": engine.model_name, "load_s": round(load_s, 3), "first_s": round(first_s, 4),
+            "rss_loaded_mb": round(rss_loaded / 1024 / 1024, 1), "texts": len(texts),
+            "texts_per_s": round(len(texts) / best, 1), "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1),
+            "dim": int(vecs.shape[1])}
+
+
+def run_backend(name: str, args, vectors: str) -> dict:
+    backend, quantized = BACKENDS[name]
+    env = dict(os.environ, EMBEDDING_BACKEND=backend, ONNX_EMBEDDING_QUANTIZED=quantized,
+               EMBEDDING_CACHE_ENABLED="0")
+    if args.threads:
+        env["ONNX_INTRA_OP_THREADS"] = str(args.threads)
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--vectors", vectors,
+           "--texts", str(args.texts), "--repeat", str(args.repeat), "--seed", str(args.seed)]
+    proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"backend": name, "error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return {"backend": name, **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def agreement(a: np.ndarray, b: np.ndarray, n_concepts: int) -> dict:
+    def unit(x):
+        return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+    a, b = unit(a), unit(b)
+    cos = (a[:-n_concepts] * b[:-n_concepts]).sum(axis=1)
+    best_a = (a[:-n_concepts] @ a[-n_concepts:].T).argmax(axis=1)
+    best_b = (b[:-n_concepts] @ b[-n_concepts:].T).argmax(axis=1)
+    return {"cosine_mean": round(float(cos.mean()), 5), "cosine_min": round(float(cos.min()), 5),
+            "same_best_concept": round(float((best_a == best_b).mean()), 4)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", nargs="+", default=["local", "onnx", "onnx-int8"], choices=sorted(BACKENDS))
+    ap.add_argument("--texts", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--threads", type=int, default=0, help="ONNX_INTRA_OP_THREADS for the onnx backends")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--vectors", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return None
+
+    from agents.semantic_agent import CONCEPTS
+    tmp = tempfile.mkdtemp(prefix="bench_embeddings_")
+    results, reference = [], None
+    try:
+        for name in args.backends:
+            path = os.path.join(tmp, f"{name}.npy")
+            result = run_backend(name, args, path)
+            if "error" not in result:
+                vecs = np.load(path)
+                if reference is None:
+                    reference = (name, vecs)
+                elif reference[1].shape == vecs.shape:
+                    result[f"vs_{reference[0]}"] = agreement(reference[1], vecs, len(CONCEPTS))
+            results.append(result)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_llm.py
+"""
+LLM connector benchmark: throughput and tail latency against the offline LocalBackend.
+
+    python benchmarks/bench_llm.py --requests 200 --concurrency 8 --rate-limit 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_tools.async_llm import AsyncLLMConnector, LocalBackend  # noqa: E402
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def _run(args) -> dict:
+    backend = LocalBackend(latency_s=args.latency, tokens_per_s=args.tokens_per_s,
+                           rate_limit_prob=args.rate_limit, seed=args.seed)
+    conn = AsyncLLMConnector(backend, max_concurrency=args.concurrency, timeout=args.timeout,
+                             backoff_base=args.backoff)
+    rng = random.Random(args.seed)
+    n_unique = max(1, int(args.requests * (1 - args.duplicates)))
+    prompts = [f"Summarise dataset #{rng.randrange(n_unique)} " + "KPI " * 200 for _ in range(args.requests)]
+
+    latencies, errors = [], 0
+
+    async def one(p):
+        nonlocal errors
+        t0 = time.perf_counter()
+        try:
+            await conn.generate(p, max_tokens=args.max_tokens)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in prompts))
+    wall = time.perf_counter() - t0
+
+    ttft = []
+    for p in prompts[:min(20, len(prompts))]:
+        t1 = time.perf_counter()
+        async for _ in conn.stream(p, max_tokens=args.max_tokens):
+            ttft.append(time.perf_counter() - t1)
+            break
+
+    return {
+        "requests": args.requests, "concurrency": args.concurrency, "errors": errors,
+        "wall_s": round(wall, 3), "throughput_rps": round(args.requests / wall, 2),
+        "p50_s": round(_pct(latencies, 0.50), 3), "p95_s": round(_pct(latencies, 0.95), 3),
+        "p99_s": round(_pct(latencies, 0.99), 3),
+        "stream_ttft_median_s": round(statistics.median(ttft), 3) if ttft else None,
+        **conn.stats,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.3, help="median backend time-to-first-token (s)")
+    ap.add_argument("--tokens-per-s", type=float, default=400.0)
+    ap.add_argument("--max-tokens", type=int, default=200)
+    ap.add_argument("--rate-limit", type=float, default=0.05, help="probability of a simulated 429")
+    ap.add_argument("--duplicates", type=float, default=0.2, help="fraction of repeated prompts")
+    ap.add_argument("--timeout", type=float, default=10.0)
+    ap.add_argument("--backoff", type=float, default=0.2)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    result = asyncio.run(_run(args))
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_memory.py
+"""
+Long-term memory benchmark: ANN (HNSW) vs exact recall on random unit vectors.
+
+    python benchmarks/bench_memory.py --sizes 10000 1000000 --dim 384 --queries 200
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_tools.long_term_memory import VectorStore  # noqa: E402
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def bench_size(n: int, args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    # the store embeds query text; here the "text" is an index into the query matrix
+    embed = lambda texts: queries[[int(t) for t in texts]]
+    path = tempfile.mkdtemp(prefix="bench_memory_")
+    try:
+        store = VectorStore(path, embedding_fn=embed)
+        t0 = time.perf_counter()
+        for start in range(0, n, args.batch):
+            m = min(args.batch, n - start)
+            store.add_embeddings(rng.standard_normal((m, args.dim)).astype(np.float32),
+                                 [""] * m, ids=[str(start + i) for i in range(m)])
+        insert_s = time.perf_counter() - t0
+
+        ann_lat, exact_lat, hits = [], [], 0
+        for i in range(args.queries):
+            t1 = time.perf_counter()
+            ann = store.query(str(i), n_results=args.k)["ids"][0]
+            ann_lat.append(time.perf_counter() - t1)
+
+            q = queries[i] / np.linalg.norm(queries[i])
+            t1 = time.perf_counter()
+            _, rows = store._exact_search(q, args.k)
+            exact_lat.append(time.perf_counter() - t1)
+            hits += len(set(ann) & {str(int(r)) for r in rows})
+        return {
+            "size": n, "dim": args.dim, "insert_s": round(insert_s, 2),
+            "ann_p50_ms": round(_pct(ann_lat, 0.50) * 1000, 3), "ann_p95_ms": round(_pct(ann_lat, 0.95) * 1000, 3),
+            "exact_p50_ms": round(_pct(exact_lat, 0.50) * 1000, 3),
+            "exact_p95_ms": round(_pct(exact_lat, 0.95) * 1000, 3),
+            f"recall@{args.k}": round(hits / (args.queries * args.k), 4),
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 1000000])
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--batch", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    results = [bench_size(n, args) for n in args.sizes]
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
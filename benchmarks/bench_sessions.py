@@ -0,0 +1,142 @@
+# benchmarks/bench_sessions.py
+"""
+Load test: N analysts uploading at once, with and without the shared work scheduler.
+
+    python benchmarks/bench_sessions.py --sessions 12 --uploads 2 --rows 50000 --llm-latency 2
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("REPORT_CACHE_ENABLED", "0")
+
+from bench_stages import HashingEngine  # noqa: E402
+from core_tools import model_registry  # noqa: E402
+from core_tools.synthetic_data import generate_airline_table  # noqa: E402
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(q * (len(values) - 1))))], 3)
+
+
+def _install_stubs(llm_latency: float):
+    import agents.summarizer_agent as summarizer_agent
+
+    def generate_text(prompt, **kwargs):
+        time.sleep(llm_latency)
+        return "## Executive summary\n\nStub report for load testing."
+    summarizer_agent.generate_text = generate_text
+    model_registry._instances[("embedding_engine", "auto")] = HashingEngine()
+
+
+def session(index: int, args, scheduler, out: dict):
+    from agents.orchestrator_agent import OrchestratorAgent
+    from core_tools.scheduler import SchedulerBusy
+    rng = random.Random(args.seed * 1000 + index)
+    frames = [generate_airline_table(args.rows, columns=args.columns, seed=args.seed * 1000 + index * 10 + k)
+              for k in range(args.uploads)]
+    agent = OrchestratorAgent(scheduler=scheduler)
+    # direct mode: no shared stage slots either
+    agent.scheduler = scheduler
+    for df in frames:
+        time.sleep(rng.uniform(0, args.think))
+        t0 = time.perf_counter()
+        if scheduler is None:
+            agent.run(df)
+            out["latency"].append(time.perf_counter() - t0)
+            continue
+        while True:
+            try:
+                ticket = agent.submit(df, f"session-{index}")
+                break
+            except SchedulerBusy:
+                out["rejected"] += 1
+                time.sleep(args.retry_after)
+        while not ticket.done():
+            out["max_position"] = max(out["max_position"], ticket.position())
+            time.sleep(0.05)
+        ticket.result()
+        out["latency"].append(time.perf_counter() - t0)
+        out["wait"].append(ticket.wait_s)
+
+
+def run_mode(mode: str, args) -> dict:
+    from core_tools.memory_budget import peak_rss_bytes
+    from core_tools.scheduler import WorkScheduler
+    scheduler = None
+    if mode == "scheduler":
+        scheduler = WorkScheduler(workers=args.workers, max_queue=args.max_queue, max_per_session=args.per_session,
+                                  cpu_slots=args.cpu_slots, embedding_slots=1, llm_slots=args.llm_slots)
+    out = {"latency": [], "wait": [], "rejected": 0, "max_position": 0}
+    lock = threading.Lock()
+    results = []
+
+    def target(i):
+        mine = {"latency": [], "wait": [], "rejected": 0, "max_position": 0}
+        session(i, args, scheduler, mine)
+        with lock:
+            results.append(mine)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(args.sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    for r in results:
+        out["latency"] += r["latency"]
+        out["wait"] += r["wait"]
+        out["rejected"] += r["rejected"]
+        out["max_position"] = max(out["max_position"], r["max_position"])
+    report = {
+        "mode": mode, "sessions": args.sessions, "uploads": len(out["latency"]), "wall_s": round(wall, 3),
+        "uploads_per_s": round(len(out["latency"]) / wall, 3),
+        "latency_p50_s": _pct(out["latency"], 0.5), "latency_p95_s": _pct(out["latency"], 0.95),
+        "latency_max_s": round(max(out["latency"]), 3) if out["latency"] else None,
+        "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1),
+    }
+    if scheduler is not None:
+        report.update({"wait_p50_s": _pct(out["wait"], 0.5), "wait_p95_s": _pct(out["wait"], 0.95),
+                       "rejected": out["rejected"], "max_position": out["max_position"],
+                       "scheduler": {k: v for k, v in scheduler.stats().items() if k not in ("waiting", "running")}})
+        scheduler.shutdown()
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--modes", nargs="+", default=["direct", "scheduler"], choices=["direct", "scheduler"])
+    ap.add_argument("--sessions", type=int, default=12)
+    ap.add_argument("--uploads", type=int, default=2, help="uploads per session")
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--columns", type=int, default=17)
+    ap.add_argument("--llm-latency", type=float, default=2.0)
+    ap.add_argument("--think", type=float, default=1.0, help="max pause before each upload (s)")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--max-queue", type=int, default=16)
+    ap.add_argument("--per-session", type=int, default=1)
+    ap.add_argument("--cpu-slots", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--llm-slots", type=int, default=4)
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    _install_stubs(args.llm_latency)
+    results = [run_mode(mode, args) for mode in args.modes]
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
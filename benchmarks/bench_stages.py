@@ -0,0 +1,201 @@
+# benchmarks/bench_stages.py
+"""
+Stage benchmark: time and memory of every pipeline stage on synthetic airline tables.
+
+    python benchmarks/bench_stages.py --rows 10000 1000000 --columns 17 200 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core_tools import model_registry  # noqa: E402
+from core_tools.synthetic_data import generate_airline_table  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+STUB_REPORT = "## Executive summary\n\nStub report for benchmarking."
+
+
+class HashingEngine:
+    """Stand-in for EmbeddingEngine when no local model is installed."""
+    backend = "hashing"
+    model_name = "hashing-512"
+
+    def __init__(self):
+        from core_tools.long_term_memory import HashingEmbedder
+        self._embed = HashingEmbedder(512)
+
+    def encode_array(self, texts):
+        # column names use underscores; split them so related names share features
+        return self._embed([str(t).replace("_", " ") for t in texts])
+
+    def encode(self, texts):
+        return self.encode_array(texts).tolist()
+
+
+def _install_stubs(real_embeddings: bool):
+    import agents.summarizer_agent as summarizer_agent
+    summarizer_agent.generate_text = lambda prompt, **kwargs: STUB_REPORT
+    if not real_embeddings:
+        model_registry._instances[("embedding_engine", "auto")] = HashingEngine()
+
+
+def stages(df) -> list:
+    """(name, callable) pairs; inputs shared between stages are computed once up front."""
+    from agents.semantic_agent import SemanticAgent
+    from agents.summarizer_agent import SummarizerAgent
+    from core_tools import statistical_engine as se
+    from core_tools import viz_engine as ve
+    from core_tools.correlation_engine import compute_correlations
+    from core_tools.schema_engine import infer_schema
+
+    semantic, summarizer = SemanticAgent(), SummarizerAgent()
+    schema = infer_schema(df)
+    numeric = schema.numeric_columns
+    dates = se.detect_date_columns(df, schema)
+    corr = compute_correlations(df, numeric)
+    kpis = se.compute_basic_kpis(df, schema)
+    anomalies = se.detect_outliers_isolationforest(df, schema=schema)
+    semantic_map = semantic.infer_columns(df)
+    profile = f"Rows: {len(df)}, Columns: {len(df.columns)}"
+
+    out = [
+        ("semantic.infer_columns", lambda: semantic.infer_columns(df)),
+        ("schema.infer_schema", lambda: infer_schema(df)),
+        ("stats.summarize_numeric", lambda: se.summarize_numeric(df, schema)),
+        ("stats.compute_basic_kpis", lambda: se.compute_basic_kpis(df, schema)),
+        ("stats.detect_outliers_isolationforest", lambda: se.detect_outliers_isolationforest(df, schema=schema)),
+        ("stats.top_categorical_frequencies", lambda: se.top_categorical_frequencies(df, schema=schema)),
+        ("stats.detect_date_columns", lambda: se.detect_date_columns(df, schema)),
+        ("correlation.compute_correlations", lambda: compute_correlations(df, numeric)),
+    ]
+    if len(numeric) > 1:
+        out.append(("viz.plot_correlation", lambda: ve.plot_correlation(df, schema, corr=corr)))
+    if numeric:
+        out.append(("viz.plot_numeric_histogram", lambda: ve.plot_numeric_histogram(df, numeric[0])))
+    if dates and numeric:
+        out.append(("viz.plot_time_series", lambda: ve.plot_time_series(
+            df, dates[0], numeric[0], date_format=schema.date_format(dates[0]))))
+    out.append(("summarizer.summarize", lambda: summarizer.summarize(
+        profile=profile, semantic_map=semantic_map, kpis=kpis, anomalies=anomalies,
+        correlations=corr.top_pairs)))
+    return out
+
+
+def measure(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"median_s": round(statistics.median(times), 5), "min_s": round(min(times), 5),
+            "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def bench_case(df, args) -> dict:
+    result = {"rows": len(df), "columns": len(df.columns), "stages": {}}
+    for name, fn in stages(df):
+        if args.only and not any(s in name for s in args.only):
+            continue
+        result["stages"][name] = m = measure(fn, args.repeat)
+        print(f"{len(df):>10} x {len(df.columns):<5} {name:40} {m['median_s']:10.4f}s {m['peak_mb']:10.1f} MB",
+              file=sys.stderr)
+    return result
+
+
+def _git(*cmd) -> str:
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    import pandas as pd
+    import pyarrow
+    import sklearn
+    return {
+        "commit": _git("rev-parse", "HEAD"), "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+        "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+        "pyarrow": pyarrow.__version__, "sklearn": sklearn.__version__,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Print current/baseline median-time ratios for the cases and stages both files have."""
+    base = {(c["rows"], c["columns"]): c["stages"] for c in baseline["cases"]}
+    print(f"\n{current['label']} vs {baseline['label']} (ratio < 1 is faster)")
+    for case in current["cases"]:
+        old = base.get((case["rows"], case["columns"]))
+        if old is None:
+            continue
+        print(f"{case['rows']} rows x {case['columns']} columns")
+        for name, m in case["stages"].items():
+            if name in old and old[name]["median_s"] > 0:
+                ratio = m["median_s"] / old[name]["median_s"]
+                print(f"  {name:40} {old[name]['median_s']:10.4f}s -> {m['median_s']:10.4f}s  x{ratio:.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--columns", type=int, nargs="+", default=[17])
+    ap.add_argument("--data", help="benchmark this file instead of generated tables")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="+", help="run only stages whose name contains one of these")
+    ap.add_argument("--real-embeddings", action="store_true", help="use the configured embedding engine")
+    ap.add_argument("--label", help="results file name (default: git short hash)")
+    ap.add_argument("--out", default=RESULTS_DIR)
+    ap.add_argument("--no-save", dest="save", action="store_false")
+    ap.add_argument("--compare", help="earlier results file to compare against")
+    args = ap.parse_args(argv)
+
+    _install_stubs(args.real_embeddings)
+    cases = []
+    if args.data:
+        from core_tools.ingestion import read_table
+        cases.append(bench_case(read_table(args.data), args))
+    else:
+        for columns in args.columns:
+            for rows in args.rows:
+                df = generate_airline_table(rows, columns=columns, seed=args.seed)
+                cases.append(bench_case(df, args))
+                del df
+
+    label = args.label or _git("rev-parse", "--short", "HEAD") or time.strftime("%Y%m%d-%H%M%S")
+    results = {"label": label, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": args.repeat,
+               "data": args.data, "seed": args.seed, "environment": environment(), "cases": cases}
+    print(json.dumps(results, indent=2))
+    if args.save:
+        os.makedirs(args.out, exist_ok=True)
+        path = os.path.join(args.out, f"{label}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {path}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return results
+
+
+if __name__ == "__main__":
+    main()
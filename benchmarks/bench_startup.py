@@ -0,0 +1,105 @@
+# benchmarks/bench_startup.py
+"""
+Startup benchmark: cold import time of the agent pipeline and first-report latency.
+
+    python benchmarks/bench_startup.py --ref HEAD~1 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import io
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("torch", "sentence_transformers", "sklearn", "plotly", "openai", "streamlit")
+
+_IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import agents.orchestrator_agent
+elapsed = time.perf_counter() - t0
+print(json.dumps({"import_s": elapsed,
+                  "heavy_loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+_REPORT_PROBE = """
+import json, sys, time, types
+# stub the LLM so the probe never touches the network (and works without Streamlit secrets)
+stub = types.ModuleType("core_tools.llm_connector")
+stub.generate_text = lambda prompt, **kw: "stub report"
+stub.generate_short_bullets = stub.generate_text
+sys.modules["core_tools.llm_connector"] = stub
+import numpy as np, pandas as pd
+rng = np.random.default_rng(0)
+df = pd.DataFrame({"FLIGHT_DATE": pd.date_range("2024-01-01", periods=2000, freq="h").astype(str),
+                   "ORIGIN": rng.choice(["JFK", "LAX", "ORD"], 2000),
+                   "DEP_DELAY": rng.exponential(12, 2000), "PAX": rng.integers(50, 300, 2000)})
+t0 = time.perf_counter()
+from agents.orchestrator_agent import OrchestratorAgent
+t1 = time.perf_counter()
+report, plots = OrchestratorAgent().run(df)
+t2 = time.perf_counter()
+report, plots = OrchestratorAgent().run(df)
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_report_s": t2 - t1, "second_report_s": t3 - t2}))
+"""
+
+
+def _export_ref(ref: str, dest: str) -> str:
+    data = subprocess.run(["git", "-C", ROOT, "archive", "--format=tar", ref],
+                          check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        tar.extractall(dest)
+    return dest
+
+
+def _probe(code: str, cwd: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=cwd)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()
+        return {"error": err[-1] if err else f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _summarise(samples: list) -> dict:
+    ok = [s for s in samples if "error" not in s]
+    if not ok:
+        return {"error": samples[0]["error"]}
+    out = {}
+    for key, val in ok[0].items():
+        if isinstance(val, float):
+            out[key] = round(statistics.median(s[key] for s in ok), 4)
+        else:
+            out[key] = val
+    return out
+
+
+def bench_tree(cwd: str, repeat: int) -> dict:
+    return {
+        "cold_import": _summarise([_probe(_IMPORT_PROBE, cwd) for _ in range(repeat)]),
+        "report": _summarise([_probe(_REPORT_PROBE, cwd) for _ in range(repeat)]),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--ref", action="append", default=[], help="git ref to compare against (repeatable)")
+    ap.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement (median reported)")
+    args = ap.parse_args(argv)
+
+    results = {"working-tree": bench_tree(ROOT, args.repeat)}
+    for ref in args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[ref] = bench_tree(_export_ref(ref, tmp), args.repeat)
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# benchmarks/gen_airline_data.py
+"""
+Write a synthetic airline dataset to disk, one chunk at a time.
+
+    python benchmarks/gen_airline_data.py data/airline_50m.parquet --rows 50000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core_tools.synthetic_data import CORE_COLUMNS, write_airline_dataset  # noqa: E402
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="output .parquet or .csv file")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--columns", type=int, default=len(CORE_COLUMNS))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--anomaly-rate", type=float, default=0.005)
+    ap.add_argument("--chunk-rows", type=int, default=1_000_000)
+    ap.add_argument("--label", action="store_true", help="add the IS_ANOMALY ground-truth column")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    write_airline_dataset(args.path, args.rows, args.columns, args.seed, chunk_rows=args.chunk_rows,
+                          days=args.days, anomaly_rate=args.anomaly_rate, label=args.label)
+    result = {"path": args.path, "rows": args.rows, "columns": args.columns, "seed": args.seed,
+              "seconds": round(time.perf_counter() - t0, 2),
+              "size_mb": round(os.path.getsize(args.path) / 1024 / 1024, 1)}
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
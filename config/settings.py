@@ -6,7 +6,138 @@ load_dotenv()
 
 DEBUG_MODE = os.getenv("DEBUG_MODE", "True").lower() in ("1", "true", "yes")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")  # "auto", "local", "openai"
-LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")  # change as available
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")  # "auto", "local", "onnx", "openai"
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")  # change as available; Streamlit secrets take precedence
 EMBEDDING_MODEL_OPENAI = os.getenv("EMBEDDING_MODEL_OPENAI", "text-embedding-3-small")
 LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# ONNX Runtime embedding backend: prepared model directory (see core_tools/onnx_embedding.py),
+# int8 model, batch size, max tokens per text, and intra-op threads (0 = onnxruntime default)
+ONNX_EMBEDDING_DIR = os.getenv("ONNX_EMBEDDING_DIR", os.path.join(".cache", "onnx", LOCAL_EMBEDDING_MODEL))
+ONNX_EMBEDDING_QUANTIZED = os.getenv("ONNX_EMBEDDING_QUANTIZED", "True").lower() in ("1", "true", "yes")
+ONNX_EMBEDDING_BATCH_SIZE = int(os.getenv("ONNX_EMBEDDING_BATCH_SIZE", "64"))
+ONNX_EMBEDDING_MAX_LENGTH = int(os.getenv("ONNX_EMBEDDING_MAX_LENGTH", "256"))
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# Semantic agent: data dictionary (YAML or CSV of concept + synonyms; built-in concepts if missing),
+# directory of precomputed concept matrices, matches kept per column, weight of sampled cell values
+# against the column name (0 = names only), values sampled per column
+CONCEPT_INDEX_PATH = os.getenv("CONCEPT_INDEX_PATH", os.path.join(os.path.dirname(__file__), "concepts.yaml"))
+CONCEPT_INDEX_DIR = os.getenv("CONCEPT_INDEX_DIR", os.path.join(".cache", "concept_index"))
+SEMANTIC_TOP_K = int(os.getenv("SEMANTIC_TOP_K", "3"))
+SEMANTIC_VALUE_WEIGHT = float(os.getenv("SEMANTIC_VALUE_WEIGHT", "0.0"))
+SEMANTIC_VALUE_SAMPLES = int(os.getenv("SEMANTIC_VALUE_SAMPLES", "5"))
+
+# Streaming profiler: rows per chunk when profiling files that may not fit in memory
+PROFILE_CHUNK_ROWS = int(os.getenv("PROFILE_CHUNK_ROWS", "500000"))
+# Files at least this large are profiled in one streaming pass instead of being loaded whole;
+# the stages that need rows (anomalies, correlations, plots) get a uniform sample of this many rows
+PROFILE_STREAM_MIN_MB = float(os.getenv("PROFILE_STREAM_MIN_MB", "512"))
+PROFILE_SAMPLE_ROWS = int(os.getenv("PROFILE_SAMPLE_ROWS", "200000"))
+
+# Persistent embedding cache (SQLite file keyed by backend/model/text)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # "float16" or "float32"
+
+# Orchestrator stage executor: thread workers, and optional process workers for CPU-bound stages
+ORCHESTRATOR_MAX_WORKERS = int(os.getenv("ORCHESTRATOR_MAX_WORKERS", str(min(8, (os.cpu_count() or 2) + 2))))
+ORCHESTRATOR_PROCESS_WORKERS = int(os.getenv("ORCHESTRATOR_PROCESS_WORKERS", "0"))
+
+# Schema inference: rows sampled per object column, and max distinct values for "categorical"
+SCHEMA_SAMPLE_ROWS = int(os.getenv("SCHEMA_SAMPLE_ROWS", "2000"))
+SCHEMA_CATEGORICAL_MAX_UNIQUE = int(os.getenv("SCHEMA_CATEGORICAL_MAX_UNIQUE", "50"))
+
+# Anomaly engine: rows used to fit IsolationForest, rows scored per chunk, cores, model persistence
+ANOMALY_FIT_SAMPLE_ROWS = int(os.getenv("ANOMALY_FIT_SAMPLE_ROWS", "100000"))
+ANOMALY_SCORE_CHUNK_ROWS = int(os.getenv("ANOMALY_SCORE_CHUNK_ROWS", "200000"))
+ANOMALY_N_JOBS = int(os.getenv("ANOMALY_N_JOBS", "-1"))
+ANOMALY_MODEL_DIR = os.getenv("ANOMALY_MODEL_DIR", os.path.join(".cache", "anomaly_models"))
+ANOMALY_REUSE_MODEL = os.getenv("ANOMALY_REUSE_MODEL", "False").lower() in ("1", "true", "yes")
+
+# LLM connector: backend ("openai" or offline "local" stand-in), concurrency, timeout, retries
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+
+# Work scheduler (shared by all sessions of a process): job workers, waiting jobs before new ones are
+# rejected (in total and per session), concurrent CPU-heavy / embedding / LLM stages across all runs
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "True").lower() in ("1", "true", "yes")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "16"))
+SCHEDULER_MAX_PER_SESSION = int(os.getenv("SCHEDULER_MAX_PER_SESSION", "2"))
+SCHEDULER_CPU_SLOTS = int(os.getenv("SCHEDULER_CPU_SLOTS", str(os.cpu_count() or 1)))
+SCHEDULER_EMBEDDING_SLOTS = int(os.getenv("SCHEDULER_EMBEDDING_SLOTS", "1"))
+SCHEDULER_LLM_SLOTS = int(os.getenv("SCHEDULER_LLM_SLOTS", os.getenv("LLM_MAX_CONCURRENCY", "4")))
+
+# Report cache: finished results keyed by dataset fingerprint + pipeline configuration
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "True").lower() in ("1", "true", "yes")
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(".cache", "reports"))
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", "512"))
+REPORT_CACHE_TTL_S = float(os.getenv("REPORT_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+# Append mode: per-dataset state directory, past-row sample kept for anomaly refits, refit once
+# the dataset grew by this fraction, exact category counters per column, change lines in the summary
+APPEND_STATE_DIR = os.getenv("APPEND_STATE_DIR", os.path.join(".cache", "append_state"))
+APPEND_SAMPLE_ROWS = int(os.getenv("APPEND_SAMPLE_ROWS", "50000"))
+APPEND_REFIT_GROWTH = float(os.getenv("APPEND_REFIT_GROWTH", "1.0"))
+APPEND_HEAVY_HITTERS = int(os.getenv("APPEND_HEAVY_HITTERS", "1024"))
+APPEND_MAX_CHANGES = int(os.getenv("APPEND_MAX_CHANGES", "8"))
+
+# Grouped KPIs (DuckDB): memory cap before spilling to disk, spill directory, threads (0 = all cores),
+# segments shown per dimension, minimum flights for a segment to be ranked, on-time threshold in minutes
+GROUPED_KPIS_ENABLED = os.getenv("GROUPED_KPIS_ENABLED", "True").lower() in ("1", "true", "yes")
+GROUPED_MEMORY_LIMIT = os.getenv("GROUPED_MEMORY_LIMIT", "2GB")
+GROUPED_TEMP_DIR = os.getenv("GROUPED_TEMP_DIR", os.path.join(".cache", "duckdb_tmp"))
+GROUPED_THREADS = int(os.getenv("GROUPED_THREADS", "0"))
+GROUPED_TOP_N = int(os.getenv("GROUPED_TOP_N", "5"))
+GROUPED_MIN_FLIGHTS = int(os.getenv("GROUPED_MIN_FLIGHTS", "20"))
+GROUPED_ONTIME_MINUTES = float(os.getenv("GROUPED_ONTIME_MINUTES", "15"))
+
+# Summarizer prompt: token budget for the assembled prompt (columns are dropped lowest-rank first)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+
+# Figures: point budget per time series, histogram bins, downsampling method ("lttb", "minmax", "resample")
+VIZ_MAX_POINTS = int(os.getenv("VIZ_MAX_POINTS", "2000"))
+VIZ_HIST_BINS = int(os.getenv("VIZ_HIST_BINS", "30"))
+VIZ_TS_METHOD = os.getenv("VIZ_TS_METHOD", "lttb")
+
+# Correlations: row sample, column block size, top-k pairs reported, heatmap column cap
+CORR_SAMPLE_ROWS = int(os.getenv("CORR_SAMPLE_ROWS", "200000"))
+CORR_BLOCK_COLUMNS = int(os.getenv("CORR_BLOCK_COLUMNS", "256"))
+CORR_TOP_K = int(os.getenv("CORR_TOP_K", "10"))
+VIZ_CORR_MAX_COLUMNS = int(os.getenv("VIZ_CORR_MAX_COLUMNS", "30"))
+
+# Long-term memory: store directory, embedding ("hashing" needs no model, "engine" uses the shared EmbeddingEngine), HNSW graph degree
+MEMORY_PERSIST_DIR = os.getenv("MEMORY_PERSIST_DIR", os.path.join("memory", "vector_store"))
+MEMORY_EMBEDDING = os.getenv("MEMORY_EMBEDDING", "hashing")
+MEMORY_HNSW_M = int(os.getenv("MEMORY_HNSW_M", "32"))
+
+# Batch runner: worker processes and default output directory for batch.py
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "batch_output")
+
+# Ingestion: DataFrame dtype backend ("pyarrow" or "numpy"), Excel->Parquet cache directory, CSV read block size
+INGEST_DTYPE_BACKEND = os.getenv("INGEST_DTYPE_BACKEND", "pyarrow")
+INGEST_CACHE_DIR = os.getenv("INGEST_CACHE_DIR", os.path.join(".cache", "ingest"))
+INGEST_CSV_BLOCK_MB = int(os.getenv("INGEST_CSV_BLOCK_MB", "16"))
+
+# Memory budget mode (opt-in): compact dtypes in place, run stages one at a time without a process pool,
+# record peak RSS per stage; categorical threshold is distinct values / rows
+MEMORY_BUDGET_MODE = os.getenv("MEMORY_BUDGET_MODE", "False").lower() in ("1", "true", "yes")
+MEMORY_BUDGET_WORKERS = int(os.getenv("MEMORY_BUDGET_WORKERS", "1"))
+MEMORY_CATEGORY_MAX_RATIO = float(os.getenv("MEMORY_CATEGORY_MAX_RATIO", "0.5"))
+MEMORY_FLOAT32 = os.getenv("MEMORY_FLOAT32", "True").lower() in ("1", "true", "yes")
+
+# Tracing (OpenTelemetry): off by default; exporter "file" (JSON lines), "otlp" (OTEL_EXPORTER_OTLP_ENDPOINT) or "console"
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() in ("1", "true", "yes")
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE = os.getenv("TRACING_FILE", os.path.join(".cache", "traces.jsonl"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "airline-summarizer")
+
+# Stage profiler (opt-in): sampling interval and where per-stage collapsed stacks are written
+PROFILE_STAGES = os.getenv("PROFILE_STAGES", "False").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(".cache", "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
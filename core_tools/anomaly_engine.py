@@ -0,0 +1,154 @@
+# core_tools/anomaly_engine.py
+"""
+Anomaly Engine: IsolationForest fitted on a row sample, scoring every row in chunks.
+"""
+
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from core_tools.telemetry import traced
+from config.settings import (ANOMALY_FIT_SAMPLE_ROWS, ANOMALY_SCORE_CHUNK_ROWS, ANOMALY_N_JOBS,
+                             ANOMALY_MODEL_DIR, ANOMALY_REUSE_MODEL)
+
+
+def schema_key(columns: Sequence[str], dtypes: Sequence[str], **params) -> str:
+    """Stable identifier for a model trained on these columns with these parameters."""
+    payload = json.dumps({"columns": [str(c) for c in columns], "dtypes": [str(d) for d in dtypes],
+                          "params": params}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class AnomalyEngine:
+    def __init__(self, contamination: float = 0.03, max_fit_rows: int = ANOMALY_FIT_SAMPLE_ROWS,
+                 chunk_rows: int = ANOMALY_SCORE_CHUNK_ROWS, n_jobs: int = ANOMALY_N_JOBS,
+                 n_estimators: int = 100, random_state: int = 42):
+        self.contamination = contamination
+        self.max_fit_rows = max_fit_rows
+        self.chunk_rows = chunk_rows
+        self.n_jobs = n_jobs
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.columns: List[str] = []
+        self.model = None
+        self.medians: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+
+    @property
+    def params(self) -> dict:
+        return {"contamination": self.contamination, "n_estimators": self.n_estimators,
+                "random_state": self.random_state}
+
+    def _matrix(self, df: pd.DataFrame) -> np.ndarray:
+        X = df[self.columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        mask = np.isnan(X)
+        if mask.any():
+            X[mask] = np.take(self.medians, np.nonzero(mask)[1])
+        return X
+
+    @traced()
+    def fit(self, df: pd.DataFrame, columns: Sequence[str]) -> "AnomalyEngine":
+        from sklearn.ensemble import IsolationForest  # lazy: sklearn is slow to import
+        self.columns = list(columns)
+        n = len(df)
+        if n > self.max_fit_rows:
+            rng = np.random.default_rng(self.random_state)
+            sample = df.iloc[np.sort(rng.choice(n, size=self.max_fit_rows, replace=False))]
+        else:
+            sample = df
+        raw = sample[self.columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        # all-missing columns warn ("All-NaN slice") and fall back to median 0 / scale 1
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            med = np.nanmedian(raw, axis=0)
+            med = np.where(np.isnan(med), 0.0, med).astype(np.float32)
+            mad = np.nanmedian(np.abs(raw - med), axis=0) * 1.4826
+            std = np.nanstd(raw, axis=0)
+        # fall back to std for columns with a degenerate MAD (mostly-constant columns)
+        scale = np.where(np.isfinite(mad) & (mad > 0), mad, std)
+        self.medians = med
+        self.scales = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0).astype(np.float32)
+
+        self.model = IsolationForest(n_estimators=self.n_estimators, contamination=self.contamination,
+                                     n_jobs=self.n_jobs, random_state=self.random_state)
+        self.model.fit(self._matrix(sample))
+        return self
+
+    @traced()
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        """Anomaly score per row (higher = more anomalous; > 0 means flagged as outlier)."""
+        from joblib import parallel_backend
+        scores = np.empty(len(df), dtype=np.float32)
+        # score_samples honours the joblib context, not the estimator's n_jobs
+        with parallel_backend("threading", n_jobs=self.n_jobs):
+            for start in range(0, len(df), self.chunk_rows):
+                chunk = df.iloc[start:start + self.chunk_rows]
+                scores[start:start + len(chunk)] = -self.model.decision_function(self._matrix(chunk))
+        return scores
+
+    def contributions(self, df: pd.DataFrame, positions: Sequence[int], top_k: int = 3) -> List[List[tuple]]:
+        """Top `top_k` (column, robust z-score) pairs for each row position."""
+        if len(positions) == 0:
+            return []
+        z = (self._matrix(df.iloc[list(positions)]) - self.medians) / self.scales
+        out = []
+        for row in z:
+            order = np.argsort(-np.abs(row))[:top_k]
+            out.append([(self.columns[j], round(float(row[j]), 2)) for j in order])
+        return out
+
+    def detect(self, df: pd.DataFrame, top_n: int = 10) -> dict:
+        scores = self.score(df)
+        outlier_idxs = np.flatnonzero(scores > 0)
+        ranked = outlier_idxs[np.argsort(-scores[outlier_idxs])][:top_n]
+        top = [{"index": int(i), "score": round(float(scores[i]), 4), "contributors": contrib}
+               for i, contrib in zip(ranked, self.contributions(df, ranked))]
+        return {"indices": outlier_idxs.tolist(), "count": int(len(outlier_idxs)),
+                "scores": scores, "top": top, "columns": list(self.columns)}
+
+    # ---- persistence -------------------------------------------------------------
+
+    def model_path(self, key: str, model_dir: str = ANOMALY_MODEL_DIR) -> str:
+        return os.path.join(model_dir, f"iforest_{key}.joblib")
+
+    def save(self, path: str):
+        import joblib
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump({"columns": self.columns, "model": self.model, "medians": self.medians,
+                     "scales": self.scales, "params": self.params}, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "AnomalyEngine":
+        import joblib
+        state = joblib.load(path)
+        engine = cls(**{**state["params"], **kwargs})
+        engine.columns, engine.model = state["columns"], state["model"]
+        engine.medians, engine.scales = state["medians"], state["scales"]
+        return engine
+
+
+@traced()
+def detect_anomalies(df: pd.DataFrame, columns: Sequence[str], contamination: float = 0.03,
+                     reuse_model: bool = ANOMALY_REUSE_MODEL, model_dir: str = ANOMALY_MODEL_DIR,
+                     top_n: int = 10, **engine_kwargs) -> Dict:
+    """Fit (or reuse a persisted model for this schema) and score every row of `df`."""
+    engine = AnomalyEngine(contamination=contamination, **engine_kwargs)
+    if not columns:
+        return {}
+    key = schema_key(columns, [df[c].dtype for c in columns], **engine.params)
+    path = engine.model_path(key, model_dir)
+    if reuse_model and os.path.exists(path):
+        engine = AnomalyEngine.load(path, **engine_kwargs)
+        result = engine.detect(df, top_n=top_n)
+        result["model_reused"] = True
+    else:
+        engine.fit(df, columns)
+        result = engine.detect(df, top_n=top_n)
+        result["model_reused"] = False
+        if reuse_model:
+            engine.save(path)
+    result["model_key"] = key
+    return result
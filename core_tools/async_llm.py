@@ -0,0 +1,309 @@
+# core_tools/async_llm.py
+"""
+Async LLM connector: retries, timeouts, bounded concurrency, streaming and coalescing
+in front of a chat-completion backend.
+"""
+
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+import asyncio
+import hashlib
+import queue
+import random
+import threading
+import time
+import weakref
+from core_tools import telemetry
+from config.settings import LLM_MAX_CONCURRENCY, LLM_TIMEOUT_S, LLM_MAX_RETRIES, LLM_BACKEND
+
+DEFAULT_SYSTEM = "You are a helpful expert data analyst who writes concise, reader-friendly reports."
+
+_RETRYABLE_NAMES = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+
+class LLMRateLimitError(Exception):
+    """Raised by backends when the provider asks us to slow down."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (LLMRateLimitError, asyncio.TimeoutError)):
+        return True
+    # match openai's exception classes by name so openai is not imported eagerly
+    return any(cls.__name__ in _RETRYABLE_NAMES for cls in type(exc).__mro__)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    if getattr(exc, "retry_after", None) is not None:
+        return float(exc.retry_after)
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+
+def _messages(prompt: str, system: Optional[str]) -> List[dict]:
+    return [{"role": "system", "content": system or DEFAULT_SYSTEM},
+            {"role": "user", "content": prompt}]
+
+
+class OpenAIBackend:
+    """Chat completions through openai.AsyncOpenAI (one client per event loop)."""
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        self._model = model
+        self._api_key = api_key
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            from core_tools.llm_connector import get_api_key
+            # retries are handled by the connector so backoff and limits stay in one place
+            client = AsyncOpenAI(api_key=self._api_key or get_api_key(), max_retries=0)
+            self._clients[loop] = client
+        return client
+
+    @property
+    def model(self) -> str:
+        if self._model is None:
+            from core_tools.llm_connector import get_llm_model
+            self._model = get_llm_model()
+        return self._model
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> str:
+        resp = await self._client().chat.completions.create(
+            model=self.model, messages=messages, max_tokens=max_tokens, temperature=temperature)
+        return resp.choices[0].message.content.strip()
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        stream = await self._client().chat.completions.create(
+            model=self.model, messages=messages, max_tokens=max_tokens, temperature=temperature, stream=True)
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+class LocalBackend:
+    """Offline stand-in: simulated latency, token rate and rate limits, no network."""
+
+    def __init__(self, latency_s: float = 0.3, latency_sigma: float = 0.5, tokens_per_s: float = 150.0,
+                 rate_limit_prob: float = 0.0, seed: int = 0,
+                 responder: Optional[Callable[[str], str]] = None):
+        self.latency_s = latency_s
+        self.latency_sigma = latency_sigma
+        self.tokens_per_s = tokens_per_s
+        self.rate_limit_prob = rate_limit_prob
+        self.responder = responder
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _reply(self, messages: List[dict], max_tokens: int) -> List[str]:
+        prompt = messages[-1]["content"]
+        text = self.responder(prompt) if self.responder else (
+            "Executive summary (local stand-in). " + " ".join(prompt.split()[:max_tokens]))
+        return [w + " " for w in text.split()][:max_tokens]
+
+    async def _first_token_delay(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s * self.rng.lognormvariate(0.0, self.latency_sigma))
+        if self.rng.random() < self.rate_limit_prob:
+            raise LLMRateLimitError("local backend: simulated 429", retry_after=None)
+
+    async def complete(self, messages: List[dict], max_tokens: int, temperature: float) -> str:
+        await self._first_token_delay()
+        tokens = self._reply(messages, max_tokens)
+        await asyncio.sleep(len(tokens) / self.tokens_per_s)
+        return "".join(tokens).strip()
+
+    async def stream(self, messages: List[dict], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        await self._first_token_delay()
+        for tok in self._reply(messages, max_tokens):
+            await asyncio.sleep(1.0 / self.tokens_per_s)
+            yield tok
+
+
+class _LoopState:
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+
+class AsyncLLMConnector:
+    def __init__(self, backend=None, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT_S, max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0):
+        self.backend = backend if backend is not None else (LocalBackend() if LLM_BACKEND == "local" else OpenAIBackend())
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"calls": 0, "retries": 0, "coalesced": 0, "timeouts": 0}
+        self._states = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    # ---- async API ------------------------------------------------------------------
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        st = self._states.get(loop)
+        if st is None:
+            st = self._states[loop] = _LoopState(self.max_concurrency)
+        return st
+
+    async def _backoff(self, attempt: int, exc: BaseException):
+        self.stats["retries"] += 1
+        delay = _retry_after(exc)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        await asyncio.sleep(delay)
+
+    def _span_attributes(self, messages: List[dict], max_tokens: int) -> dict:
+        from core_tools.prompt_builder import count_tokens
+        return {"llm.backend": type(self.backend).__name__, "llm.model": getattr(self.backend, "model", None),
+                "llm.prompt_tokens": sum(count_tokens(m["content"]) for m in messages),
+                "llm.max_tokens": max_tokens}
+
+    async def _complete(self, messages: List[dict], max_tokens: int, temperature: float) -> str:
+        st = self._state()
+        attrs = self._span_attributes(messages, max_tokens) if telemetry.enabled() else {}
+        with telemetry.span("llm.complete", **attrs) as sp:
+            t0 = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with st.semaphore:
+                        self.stats["calls"] += 1
+                        text = await asyncio.wait_for(
+                            self.backend.complete(messages, max_tokens, temperature), self.timeout)
+                    if attrs:
+                        from core_tools.prompt_builder import count_tokens
+                        sp.set_attributes({"llm.completion_tokens": count_tokens(text), "llm.attempts": attempt + 1,
+                                           "llm.latency_s": round(time.perf_counter() - t0, 4)})
+                    return text
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.stats["timeouts"] += 1
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    await self._backoff(attempt, e)
+
+    async def generate(self, prompt: str, system: Optional[str] = None, max_tokens: int = 450,
+                       temperature: float = 0.3) -> str:
+        """Full completion; identical concurrent requests share a single backend call."""
+        messages = _messages(prompt, system)
+        key = hashlib.sha256(repr((messages, max_tokens, temperature)).encode("utf-8")).hexdigest()
+        st = self._state()
+        fut = st.inflight.get(key)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+        task = asyncio.ensure_future(self._complete(messages, max_tokens, temperature))
+        st.inflight[key] = task
+        task.add_done_callback(lambda _t: st.inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def generate_many(self, prompts: List[str], **kwargs) -> List[str]:
+        return await asyncio.gather(*(self.generate(p, **kwargs) for p in prompts))
+
+    async def stream(self, prompt: str, system: Optional[str] = None, max_tokens: int = 450,
+                     temperature: float = 0.3) -> AsyncIterator[str]:
+        """Yield tokens as they arrive. Retries only happen before the first token;
+        `timeout` bounds the wait for each token rather than the whole completion."""
+        messages = _messages(prompt, system)
+        st = self._state()
+        # not made current: the consumer may resume this generator from another context
+        traced = telemetry.enabled()
+        sp = telemetry.start_span("llm.stream", **(self._span_attributes(messages, max_tokens) if traced else {}))
+        t0 = time.perf_counter()
+        n_tokens = 0
+        try:
+            for attempt in range(self.max_retries + 1):
+                emitted = False
+                try:
+                    async with st.semaphore:
+                        self.stats["calls"] += 1
+                        it = self.backend.stream(messages, max_tokens, temperature).__aiter__()
+                        while True:
+                            try:
+                                tok = await asyncio.wait_for(it.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                return
+                            if not emitted and traced:
+                                sp.set_attribute("llm.ttft_s", round(time.perf_counter() - t0, 4))
+                            emitted = True
+                            n_tokens += 1
+                            yield tok
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.stats["timeouts"] += 1
+                    if emitted or attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    await self._backoff(attempt, e)
+        finally:
+            if traced:
+                sp.set_attributes({"llm.completion_tokens": n_tokens,
+                                   "llm.latency_s": round(time.perf_counter() - t0, 4)})
+            sp.end()
+
+    # ---- sync bridge ----------------------------------------------------------------
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-connector", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def generate_sync(self, prompt: str, **kwargs) -> str:
+        ctx = telemetry.capture()
+
+        async def _run():
+            token = telemetry.attach(ctx)
+            try:
+                return await self.generate(prompt, **kwargs)
+            finally:
+                telemetry.detach(token)
+
+        fut = asyncio.run_coroutine_threadsafe(_run(), self._background_loop())
+        return fut.result()
+
+    def stream_sync(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Blocking iterator over streamed tokens (for Streamlit's write_stream etc.)."""
+        q: "queue.Queue" = queue.Queue()
+        done = object()
+        ctx = telemetry.capture()
+
+        async def _pump():
+            token = telemetry.attach(ctx)
+            try:
+                async for tok in self.stream(prompt, **kwargs):
+                    q.put(tok)
+            except BaseException as e:
+                q.put(e)
+            finally:
+                q.put(done)
+                telemetry.detach(token)
+
+        asyncio.run_coroutine_threadsafe(_pump(), self._background_loop())
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+def get_connector() -> AsyncLLMConnector:
+    """Process-wide connector for the configured backend (LLM_BACKEND)."""
+    from core_tools import model_registry
+    return model_registry.get_or_create(("llm_connector", LLM_BACKEND), AsyncLLMConnector)
@@ -0,0 +1,150 @@
+# core_tools/concept_index.py
+"""
+Concept Index: the data dictionary the semantic agent matches columns against,
+embedded once and memory-mapped.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import csv
+import hashlib
+import json
+import os
+import numpy as np
+import yaml
+from config.settings import CONCEPT_INDEX_DIR
+
+MATRIX_FILE = "matrix.npy"
+META_FILE = "meta.json"
+# query rows per similarity block (block x entries float32)
+MATCH_BLOCK_ROWS = 1024
+
+
+def load_dictionary(path: str) -> Dict[str, List[str]]:
+    """{concept: [synonyms]} from a YAML or CSV data dictionary."""
+    if path.lower().endswith((".yaml", ".yml")):
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        raw = data.get("concepts", data)
+        if isinstance(raw, list):
+            raw = {c: [] for c in raw}
+        return {str(c): [str(s) for s in (syn or [])] for c, syn in raw.items()}
+    out: Dict[str, List[str]] = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            concept = (row.get("concept") or "").strip()
+            if concept:
+                syn = [s.strip() for s in (row.get("synonyms") or "").split("|") if s.strip()]
+                out.setdefault(concept, []).extend(syn)
+    return out
+
+
+def _entries(dictionary: Dict[str, Iterable[str]]) -> Tuple[List[str], List[str]]:
+    """(texts, concept per text), grouped by concept, each concept's own name first."""
+    texts, labels = [], []
+    for concept, synonyms in dictionary.items():
+        seen = set()
+        for text in [concept, *synonyms]:
+            if text.lower() not in seen:
+                seen.add(text.lower())
+                texts.append(text)
+                labels.append(concept)
+    return texts, labels
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+@dataclass
+class ConceptIndex:
+    concepts: List[str]      # one per concept, in matrix order
+    offsets: np.ndarray      # first matrix row of each concept
+    texts: List[str]         # one per matrix row
+    matrix: np.ndarray       # (entries, dim) float32, L2-normalised; a memmap when loaded from disk
+    version: str = ""
+
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    def similarities(self, vectors: np.ndarray) -> np.ndarray:
+        """(queries, concepts) cosine similarity, the best synonym per concept."""
+        q = _normalize(vectors)
+        out = np.empty((len(q), len(self.concepts)), dtype=np.float32)
+        for start in range(0, len(q), MATCH_BLOCK_ROWS):
+            sims = q[start:start + MATCH_BLOCK_ROWS] @ self.matrix.T
+            out[start:start + MATCH_BLOCK_ROWS] = np.maximum.reduceat(sims, self.offsets, axis=1)
+        return out
+
+    def top_k(self, sims: np.ndarray, k: int = 3) -> List[List[Tuple[str, float]]]:
+        """Best k (concept, score) pairs per row of a similarities() matrix, best first."""
+        k = min(k, sims.shape[1])
+        if k == 0:
+            return [[] for _ in range(len(sims))]
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-part, axis=1, kind="stable")
+        idx, part = np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+        return [[(self.concepts[j], float(s)) for j, s in zip(row_i, row_s)] for row_i, row_s in zip(idx, part)]
+
+    def match(self, vectors: np.ndarray, k: int = 3) -> List[List[Tuple[str, float]]]:
+        return self.top_k(self.similarities(vectors), k)
+
+
+def build_index(dictionary: Dict[str, Iterable[str]], encode: Callable[[Sequence[str]], np.ndarray],
+                version: str = "") -> ConceptIndex:
+    """Embed every entry in one encode call."""
+    texts, labels = _entries(dictionary)
+    matrix = _normalize(encode(texts))
+    # rows are contiguous per concept (see _entries): a concept starts where the label changes
+    offsets = [i for i, label in enumerate(labels) if i == 0 or label != labels[i - 1]]
+    return ConceptIndex([labels[i] for i in offsets], np.asarray(offsets, dtype=np.int64), texts, matrix, version)
+
+
+def index_version(dictionary: Dict[str, Iterable[str]], model_id: str) -> str:
+    texts, labels = _entries(dictionary)
+    payload = json.dumps([model_id, texts, labels], ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def save_index(index: ConceptIndex, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{MATRIX_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(index.matrix, dtype=np.float32))
+    os.replace(tmp, os.path.join(directory, MATRIX_FILE))
+    meta = {"concepts": index.concepts, "offsets": index.offsets.tolist(), "texts": index.texts,
+            "version": index.version}
+    tmp = os.path.join(directory, f".{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(directory, META_FILE))
+    return directory
+
+
+def load_index(directory: str) -> ConceptIndex:
+    with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode="r")
+    return ConceptIndex(meta["concepts"], np.asarray(meta["offsets"], dtype=np.int64), meta["texts"], matrix,
+                        meta.get("version", ""))
+
+
+def load_or_build(dictionary: Dict[str, Iterable[str]], encode: Callable[[Sequence[str]], np.ndarray],
+                  model_id: str, root: Optional[str] = CONCEPT_INDEX_DIR) -> ConceptIndex:
+    """Memory-mapped index for this dictionary and model, built and saved on first use.
+
+    With root=None the index is built in memory only.
+    """
+    version = index_version(dictionary, model_id)
+    if root is None:
+        return build_index(dictionary, encode, version)
+    directory = os.path.join(root, version)
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        try:
+            return load_index(directory)
+        except (OSError, ValueError, KeyError):
+            pass  # a partial or corrupt index is rebuilt
+    save_index(build_index(dictionary, encode, version), directory)
+    return load_index(directory)
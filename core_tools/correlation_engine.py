@@ -0,0 +1,101 @@
+# core_tools/correlation_engine.py
+"""
+Correlation Engine: Pearson correlations for wide tables, computed once per run.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Sequence
+import numpy as np
+import pandas as pd
+from core_tools.telemetry import traced
+from config.settings import CORR_SAMPLE_ROWS, CORR_BLOCK_COLUMNS, CORR_TOP_K
+
+
+@dataclass
+class CorrelationResult:
+    columns: List[str]
+    matrix: np.ndarray  # float32, len(columns) x len(columns)
+    top_pairs: List[dict] = field(default_factory=list)
+    rows_used: int = 0
+
+    def to_frame(self, columns: Sequence[str] = None) -> pd.DataFrame:
+        if columns is None:
+            return pd.DataFrame(self.matrix, index=self.columns, columns=self.columns)
+        pos = [self.columns.index(c) for c in columns]
+        return pd.DataFrame(self.matrix[np.ix_(pos, pos)], index=list(columns), columns=list(columns))
+
+    def heatmap_columns(self, max_columns: int) -> List[str]:
+        """At most `max_columns` columns, the most correlated ones, in clustered order."""
+        p = len(self.columns)
+        if p <= max_columns:
+            chosen = list(range(p))
+        else:
+            chosen = []
+            for pair in self.top_pairs:
+                for c in (pair["a"], pair["b"]):
+                    i = self.columns.index(c)
+                    if i not in chosen and len(chosen) < max_columns:
+                        chosen.append(i)
+            if len(chosen) < max_columns:
+                off = np.abs(self.matrix) - np.eye(p, dtype=np.float32)
+                strength = np.max(off, axis=1)
+                for i in np.argsort(-strength):
+                    if len(chosen) >= max_columns:
+                        break
+                    if int(i) not in chosen:
+                        chosen.append(int(i))
+        return [self.columns[i] for i in _cluster_order(self.matrix[np.ix_(chosen, chosen)], chosen)]
+
+
+def _cluster_order(sub: np.ndarray, chosen: List[int]) -> List[int]:
+    if len(chosen) < 3:
+        return chosen
+    try:
+        from scipy.cluster.hierarchy import leaves_list, linkage
+        from scipy.spatial.distance import squareform
+        dist = np.clip(1.0 - np.abs(sub.astype(np.float64)), 0.0, 2.0)
+        np.fill_diagonal(dist, 0.0)
+        order = leaves_list(linkage(squareform(dist, checks=False), method="average"))
+    except ImportError:
+        order = np.argsort(-np.abs(sub).sum(axis=1))
+    return [chosen[i] for i in order]
+
+
+@traced()
+def compute_correlations(df: pd.DataFrame, columns: Sequence[str], max_rows: int = CORR_SAMPLE_ROWS,
+                         block_size: int = CORR_BLOCK_COLUMNS, top_k: int = CORR_TOP_K,
+                         seed: int = 0) -> CorrelationResult:
+    """Pearson r on a row sample; missing values are mean-imputed, not pairwise-deleted as in DataFrame.corr."""
+    columns = list(columns)
+    p = len(columns)
+    if p < 2:
+        return CorrelationResult(columns, np.ones((p, p), dtype=np.float32))
+
+    n = len(df)
+    rows = np.sort(np.random.default_rng(seed).choice(n, size=max_rows, replace=False)) if n > max_rows else None
+    # take the sampled rows before selecting columns, so only the sample is copied
+    sample = df[columns] if rows is None else df.take(rows)[columns]
+    X = sample.to_numpy(dtype=np.float32, na_value=np.nan)
+
+    with np.errstate(all="ignore"):
+        mean = np.nanmean(X, axis=0)
+        X -= mean
+        np.nan_to_num(X, copy=False, nan=0.0)
+        norm = np.sqrt(np.einsum("ij,ij->j", X, X))
+    norm[~np.isfinite(norm) | (norm == 0)] = np.inf  # constant columns correlate 0 with everything
+    X /= norm
+
+    corr = np.empty((p, p), dtype=np.float32)
+    for start in range(0, p, block_size):
+        stop = min(p, start + block_size)
+        corr[start:stop] = X[:, start:stop].T @ X
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, 1.0)
+
+    iu, ju = np.triu_indices(p, k=1)
+    vals = corr[iu, ju]
+    k = min(top_k, len(vals))
+    best = np.argpartition(-np.abs(vals), k - 1)[:k]
+    best = best[np.argsort(-np.abs(vals[best]))]
+    pairs = [{"a": columns[iu[i]], "b": columns[ju[i]], "r": round(float(vals[i]), 4)} for i in best]
+    return CorrelationResult(columns, corr, pairs, rows_used=len(X))
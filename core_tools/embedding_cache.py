@@ -0,0 +1,108 @@
+# core_tools/embedding_cache.py
+"""
+Embedding Cache: persistent, content-addressed store for embedding vectors.
+"""
+
+from typing import Callable, Dict, List, Sequence
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from config.settings import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_DTYPE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    dim INTEGER NOT NULL,
+    dtype TEXT NOT NULL,
+    vec BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+def cache_key(backend: str, model: str, text: str) -> str:
+    return hashlib.sha256(f"{backend}\x00{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 dtype: str = EMBEDDING_CACHE_DTYPE):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.path = path
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return the cached float32 vectors for the keys that are present."""
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            # stay below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = list(keys[i:i + 500])
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, dtype, vec FROM embeddings WHERE key IN ({marks})", batch).fetchall()
+                for key, dim, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype, count=dim).astype(np.float32)
+                if rows:
+                    self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                           [(now, r[0]) for r in rows])
+        return found
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=self.dtype)
+        now = time.time()
+        rows = [(k, int(v.shape[0]), self.dtype.name, v.tobytes(), now) for k, v in zip(keys, vectors)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, dtype, vec, last_used) VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+
+    def _evict(self):
+        (n,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = n - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)", (excess,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+
+    def encode(self, backend: str, model: str, texts: List[str],
+               encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Batch-encode `texts`, calling `encode_fn` only for unique cache misses."""
+        keys = [cache_key(backend, model, t) for t in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+        missing = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+        if missing:
+            fresh = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            self.put_many(list(missing.keys()), fresh)
+            # round-trip through the storage dtype so hits and misses are identical
+            for k, v in zip(missing.keys(), fresh.astype(self.dtype).astype(np.float32)):
+                found[k] = v
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([found[k] for k in keys])
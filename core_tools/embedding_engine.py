@@ -1,49 +1,84 @@
 # core_tools/embedding_engine.py
 """
 Embedding Engine:
-- Preferred local sentence-transformers for embeddings (fast offline)
+- Preferred local sentence-transformers for embeddings (fast offline), or the same model on ONNX Runtime
 - Fallback to OpenAI embeddings if OPENAI_API_KEY is available and local model not present
 """
 
-from typing import List
+from typing import List, Optional
+import importlib.util
 import os
+import threading
 import numpy as np
-from config.settings import EMBEDDING_BACKEND, EMBEDDING_MODEL_OPENAI, LOCAL_EMBEDDING_MODEL, OPENAI_API_KEY
-try:
-    from sentence_transformers import SentenceTransformer
-    _has_sbert = True
-except Exception:
-    _has_sbert = False
-
-# If openai present
-try:
-    from openai import OpenAI
-    _openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-except Exception:
-    _openai_client = None
+from config.settings import (EMBEDDING_BACKEND, EMBEDDING_MODEL_OPENAI, LOCAL_EMBEDDING_MODEL, OPENAI_API_KEY,
+                             EMBEDDING_CACHE_ENABLED, ONNX_EMBEDDING_QUANTIZED)
+from core_tools.embedding_cache import EmbeddingCache
+from core_tools import model_registry
+from core_tools import telemetry
+from core_tools import onnx_embedding
+
+# availability checks only; the packages themselves are imported on first use
+_has_sbert = importlib.util.find_spec("sentence_transformers") is not None
+_has_openai = importlib.util.find_spec("openai") is not None and bool(OPENAI_API_KEY)
 
 class EmbeddingEngine:
-    def __init__(self, backend: str = "auto"):
+    def __init__(self, backend: str = "auto", cache: Optional[EmbeddingCache] = None):
         self.backend = backend or EMBEDDING_BACKEND or "auto"
         if self.backend == "auto":
-            self.backend = "local" if _has_sbert else ("openai" if _openai_client else "local")
+            if _has_sbert:
+                self.backend = "local"
+            elif onnx_embedding.is_available():
+                self.backend = "onnx"
+            else:
+                self.backend = "openai" if _has_openai else "local"
 
+        # torch modules are not guaranteed re-entrant; serialise forward passes
+        self._lock = threading.Lock()
         if self.backend == "local":
             if not _has_sbert:
                 raise RuntimeError("Local SBERT model requested but sentence-transformers not available.")
+            from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer(LOCAL_EMBEDDING_MODEL)
+            self.model_name = LOCAL_EMBEDDING_MODEL
+        elif self.backend == "onnx":
+            # onnxruntime sessions are thread-safe; no lock needed around run()
+            self.model = onnx_embedding.OnnxEmbedder()
+            # int8 vectors differ slightly from fp32 ones; keep them apart in the cache
+            self.model_name = LOCAL_EMBEDDING_MODEL + ("-int8" if ONNX_EMBEDDING_QUANTIZED else "")
         else:
-            if not _openai_client:
+            if not _has_openai:
                 raise RuntimeError("OpenAI client not available for embeddings.")
-            self.model = None  # use openai client
+            self.model = model_registry.get_openai_client(OPENAI_API_KEY)
+            self.model_name = EMBEDDING_MODEL_OPENAI
 
-    def encode(self, texts: List[str]) -> List[List[float]]:
+        if cache is None and EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache()
+        self.cache = cache
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        # the batch that actually reaches the model (cache misses only)
+        with telemetry.span("embedding.model_encode", **{"embedding.backend": self.backend,
+                                                        "embedding.model": self.model_name,
+                                                        "embedding.batch_size": len(texts)}):
+            if self.backend == "local":
+                with self._lock:
+                    return self.model.encode(texts, convert_to_numpy=True)
+            if self.backend == "onnx":
+                return self.model.encode(texts)
+            # OpenAI embeddings
+            resp = self.model.embeddings.create(model=self.model_name, input=texts)
+            return np.asarray([d.embedding for d in resp.data], dtype=np.float32)
+
+    def encode_array(self, texts: List[str]) -> np.ndarray:
+        """Encode to a float32 (n, dim) array, only computing embeddings for cache misses."""
         if isinstance(texts, str):
             texts = [texts]
-        if self.backend == "local":
-            emb = self.model.encode(texts, convert_to_numpy=True)
-            return emb.tolist()
-        else:
-            # OpenAI embeddings
-            resp = _openai_client.embeddings.create(model=EMBEDDING_MODEL_OPENAI, input=texts)
-            return [d.embedding for d in resp.data]
+        texts = list(texts)
+        with telemetry.span("embedding.encode", **{"embedding.batch_size": len(texts),
+                                                  "embedding.cached": self.cache is not None}):
+            if self.cache is None:
+                return np.asarray(self._encode_uncached(texts), dtype=np.float32)
+            return self.cache.encode(self.backend, self.model_name, texts, self._encode_uncached)
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        return self.encode_array(texts).tolist()
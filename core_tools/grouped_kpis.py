@@ -0,0 +1,234 @@
+# core_tools/grouped_kpis.py
+"""
+Grouped KPIs: operational breakdowns per route, flight number, carrier and day,
+computed in embedded DuckDB.
+"""
+
+from typing import Dict, List, Optional, Union
+import os
+import time
+import pandas as pd
+from core_tools.schema_engine import BOOLEAN, CATEGORICAL, DATETIME, IDENTIFIER, NUMERIC, DatasetSchema
+from core_tools.telemetry import traced
+from config.settings import (GROUPED_MEMORY_LIMIT, GROUPED_TEMP_DIR, GROUPED_THREADS, GROUPED_TOP_N,
+                             GROUPED_MIN_FLIGHTS, GROUPED_ONTIME_MINUTES)
+
+# role -> (semantic concepts, accepted schema kinds)
+ROLES = {
+    "route": (("route",), (CATEGORICAL, IDENTIFIER)),
+    "origin": (("origin",), (CATEGORICAL, IDENTIFIER)),
+    "destination": (("destination",), (CATEGORICAL, IDENTIFIER)),
+    "flight_number": (("flight number",), (CATEGORICAL, IDENTIFIER, NUMERIC)),
+    "carrier": (("carrier",), (CATEGORICAL, IDENTIFIER)),
+    "date": (("date",), (DATETIME,)),
+    "delay": (("delay",), (NUMERIC,)),
+    "cancelled": (("cancel",), (BOOLEAN, NUMERIC, CATEGORICAL)),
+    "load_factor": (("load_factor",), (NUMERIC,)),
+    "passengers": (("passengers",), (NUMERIC,)),
+    "seats": (("seat_capacity",), (NUMERIC,)),
+}
+DIMENSIONS = ("route", "flight_number", "carrier", "day")
+METRICS = ("on_time_rate", "mean_delay", "cancellation_rate", "load_factor")
+# ranking metric, in order of preference, and whether higher is better
+RANKING = (("on_time_rate", True), ("cancellation_rate", False), ("load_factor", True))
+CSV_SUFFIXES = (".csv", ".txt")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def resolve_roles(semantic_map: dict, schema: DatasetSchema) -> Dict[str, str]:
+    """Column for each role, from the semantic matches (best score first, one role per column)."""
+    candidates = []
+    for col, m in semantic_map.get("mapping", {}).items():
+        cs = schema.columns.get(col)
+        if cs is None:
+            continue
+        for rank, (concept, score) in enumerate(m.get("top_matches") or [(m["best_match"], m["score"])]):
+            for role, (concepts, kinds) in ROLES.items():
+                # time-of-day columns match "date" too but cannot give a day
+                if concept in concepts and cs.kind in kinds and not (role == "date" and _time_only(cs.date_format)):
+                    candidates.append((rank, -float(score), role, col))
+    roles: Dict[str, str] = {}
+    for _, _, role, col in sorted(candidates):
+        if role not in roles and col not in roles.values():
+            roles[role] = col
+    return roles
+
+
+def _time_only(fmt: Optional[str]) -> bool:
+    return bool(fmt) and "%d" not in fmt and "%Y" not in fmt
+
+
+def _ident(col: str) -> str:
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _expressions(roles: Dict[str, str], schema: DatasetSchema, ontime_minutes: float) -> Dict[str, str]:
+    """SQL expression per dimension / measure for the roles that are present."""
+    q = {r: _ident(c) for r, c in roles.items()}
+    ex = {}
+    if "route" in roles:
+        ex["route"] = f"CAST({q['route']} AS VARCHAR)"
+    elif "origin" in roles and "destination" in roles:
+        ex["route"] = f"CAST({q['origin']} AS VARCHAR) || '-' || CAST({q['destination']} AS VARCHAR)"
+    if "flight_number" in roles:
+        ex["flight_number"] = f"CAST({q['flight_number']} AS VARCHAR)"
+    if "carrier" in roles:
+        ex["carrier"] = f"CAST({q['carrier']} AS VARCHAR)"
+    if "date" in roles:
+        fmt = schema.date_format(roles["date"])
+        if schema.columns[roles["date"]].dtype.startswith(("datetime", "timestamp", "date")) or not fmt:
+            ex["day"] = f"TRY_CAST({q['date']} AS DATE)"
+        else:
+            # a file scan may already have parsed the column (DuckDB's sniffer) where pandas did not
+            ex["day"] = (f"COALESCE(TRY_CAST({q['date']} AS DATE), "
+                         f"CAST(try_strptime(CAST({q['date']} AS VARCHAR), {_literal(fmt)}) AS DATE))")
+    if "delay" in roles:
+        delay = f"TRY_CAST({q['delay']} AS DOUBLE)"
+        ex["mean_delay"] = f"AVG({delay})"
+        ex["on_time_rate"] = f"AVG(CASE WHEN {delay} IS NULL THEN NULL WHEN {delay} <= {float(ontime_minutes)} " \
+                             f"THEN 1.0 ELSE 0.0 END)"
+    if "cancelled" in roles:
+        ex["cancellation_rate"] = (f"AVG(CASE WHEN lower(CAST({q['cancelled']} AS VARCHAR)) "
+                                   f"IN ('1', '1.0', 'true', 't', 'y', 'yes') THEN 1.0 ELSE 0.0 END)")
+    if "load_factor" in roles:
+        ex["load_factor"] = f"AVG(TRY_CAST({q['load_factor']} AS DOUBLE))"
+    elif "passengers" in roles and "seats" in roles:
+        ex["load_factor"] = (f"SUM(TRY_CAST({q['passengers']} AS DOUBLE)) / "
+                             f"NULLIF(SUM(TRY_CAST({q['seats']} AS DOUBLE)), 0)")
+    return ex
+
+
+def build_query(relation: str, roles: Dict[str, str], schema: DatasetSchema,
+                ontime_minutes: float = GROUPED_ONTIME_MINUTES) -> Optional[tuple]:
+    """(sql, dimensions, metrics) for one GROUPING SETS scan, or None if nothing can be computed."""
+    ex = _expressions(roles, schema, ontime_minutes)
+    dims = [d for d in DIMENSIONS if d in ex]
+    metrics = [m for m in METRICS if m in ex]
+    if not dims or not metrics:
+        return None
+    select = [f"{ex[d]} AS {d}" for d in dims] + [f"GROUPING({ex[d]}) AS g_{d}" for d in dims]
+    select += ["COUNT(*) AS flights"] + [f"{ex[m]} AS {m}" for m in metrics]
+    sets = ", ".join(f"({ex[d]})" for d in dims) + ", ()"
+    sql = f"SELECT {', '.join(select)} FROM {relation} GROUP BY GROUPING SETS ({sets})"
+    return sql, dims, metrics
+
+
+def _relation(source) -> str:
+    path = os.fspath(source)
+    suffix = os.path.splitext(path.lower())[1]
+    if suffix in PARQUET_SUFFIXES:
+        return f"read_parquet({_literal(path)})"
+    if suffix in CSV_SUFFIXES:
+        return f"read_csv_auto({_literal(path)})"
+    raise ValueError(f"Grouped KPIs read CSV or Parquet files, not '{suffix}'.")
+
+
+def is_queryable_file(source) -> bool:
+    return isinstance(source, (str, os.PathLike)) and os.fspath(source).lower().endswith(CSV_SUFFIXES + PARQUET_SUFFIXES)
+
+
+def connect(memory_limit: str = GROUPED_MEMORY_LIMIT, temp_dir: str = GROUPED_TEMP_DIR, threads: int = GROUPED_THREADS):
+    import duckdb
+    os.makedirs(temp_dir, exist_ok=True)
+    config = {"memory_limit": memory_limit, "temp_directory": temp_dir, "preserve_insertion_order": False}
+    if threads > 0:
+        config["threads"] = threads
+    return duckdb.connect(config=config)
+
+
+def sample_file(path: str, rows: int = 10000) -> pd.DataFrame:
+    """First rows of a CSV/Parquet file, to infer the schema and semantics of a file too big to load."""
+    con = connect()
+    try:
+        return con.execute(f"SELECT * FROM {_relation(path)} LIMIT {int(rows)}").df()
+    finally:
+        con.close()
+
+
+def _records(frame: pd.DataFrame, dim: str, metrics: List[str]) -> List[dict]:
+    out = []
+    for row in frame.itertuples(index=False):
+        key = getattr(row, dim)
+        # DATE groups come back as midnight timestamps
+        rec = {"key": str(key.date()) if isinstance(key, pd.Timestamp) else str(key), "flights": int(row.flights)}
+        for m in metrics:
+            v = getattr(row, m)
+            rec[m] = None if pd.isna(v) else round(float(v), 4)
+        out.append(rec)
+    return out
+
+
+@traced()
+def grouped_kpis(source: Union[pd.DataFrame, str], roles: Dict[str, str], schema: DatasetSchema,
+                 top_n: int = GROUPED_TOP_N, min_flights: int = GROUPED_MIN_FLIGHTS,
+                 ontime_minutes: float = GROUPED_ONTIME_MINUTES, threads: int = GROUPED_THREADS) -> dict:
+    """Best / worst segments per dimension over a DataFrame or a CSV/Parquet path; {} if no roles fit."""
+    from_file = not isinstance(source, pd.DataFrame)
+    query = build_query(_relation(source) if from_file else "source_frame", roles, schema, ontime_minutes)
+    if query is None:
+        return {}
+    sql, dims, metrics = query
+    t0 = time.perf_counter()
+    con = connect(threads=threads)
+    try:
+        if not from_file:
+            con.register("source_frame", source)
+        table = con.execute(sql).df()
+    finally:
+        con.close()
+
+    metric, higher_is_better = next((m, h) for m, h in RANKING + (("mean_delay", False),) if m in metrics)
+    grouping = table[[f"g_{d}" for d in dims]]
+    overall = table[grouping.eq(1).all(axis=1)]
+    result = {
+        "metric": metric, "higher_is_better": higher_is_better, "ontime_minutes": ontime_minutes,
+        "min_flights": min_flights, "columns": dict(roles), "source": "file" if from_file else "frame",
+        "overall": _records(overall.assign(key="all flights"), "key", metrics)[0] if len(overall) else {},
+        "dimensions": {},
+    }
+    for d in dims:
+        groups = table[table[f"g_{d}"] == 0]
+        groups = groups[groups[d].notna()]
+        ranked = groups[groups["flights"] >= min_flights].dropna(subset=[metric])
+        ranked = ranked.sort_values([metric, "flights"], ascending=[not higher_is_better, False])
+        result["dimensions"][d] = {
+            "groups": int(len(groups)), "ranked": int(len(ranked)),
+            "best": _records(ranked.head(top_n), d, metrics),
+            "worst": _records(ranked.iloc[::-1].head(top_n), d, metrics) if len(ranked) > top_n else [],
+        }
+    result["seconds"] = round(time.perf_counter() - t0, 4)
+    return result
+
+
+def format_segments(grouped: dict, max_rows: int = 3) -> str:
+    """Compact text for the summarizer prompt."""
+    if not grouped:
+        return "No segment breakdown available."
+    metric = grouped["metric"]
+    label = {"on_time_rate": f"on-time rate (<= {grouped['ontime_minutes']:g} min)",
+             "cancellation_rate": "cancellation rate", "load_factor": "load factor",
+             "mean_delay": "mean delay"}[metric]
+    lines = [f"Ranked by {label}; groups with at least {grouped['min_flights']} flights."]
+
+    short = {"on_time_rate": "on-time", "cancellation_rate": "cancelled", "load_factor": "load"}
+
+    def fmt(rec):
+        parts = [f"n={rec['flights']}"]
+        for m in METRICS:
+            if rec.get(m) is None:
+                continue
+            parts.append(f"delay {rec[m]:.1f}m" if m == "mean_delay" else f"{short[m]} {rec[m]:.1%}")
+        return f"{rec['key']} ({', '.join(parts)})"
+
+    if grouped.get("overall"):
+        lines.append("overall: " + fmt(grouped["overall"]))
+    for d, info in grouped["dimensions"].items():
+        if info["worst"]:
+            lines.append(f"worst {d}: " + "; ".join(fmt(r) for r in info["worst"][:max_rows]))
+        if info["best"]:
+            lines.append(f"best {d}: " + "; ".join(fmt(r) for r in info["best"][:max_rows]))
+    return "\n".join(lines)
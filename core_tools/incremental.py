@@ -0,0 +1,310 @@
+# core_tools/incremental.py
+"""
+Append mode: per-dataset pipeline state that is updated batch by batch.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import os
+import pickle
+import re
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from core_tools.anomaly_engine import AnomalyEngine
+from core_tools.report_cache import dataframe_fingerprint
+from core_tools.schema_engine import DatasetSchema, infer_column, infer_schema, name_hints_datetime
+from core_tools.streaming_profiler import StreamingProfiler
+from core_tools.telemetry import traced
+from config.settings import (APPEND_STATE_DIR, APPEND_SAMPLE_ROWS, APPEND_REFIT_GROWTH, APPEND_HEAVY_HITTERS,
+                             APPEND_MAX_CHANGES)
+
+# bump when the pickled layout changes; older states are rebuilt from the next batch
+STATE_VERSION = 1
+
+
+def state_dir(dataset_id: str, root: str = APPEND_STATE_DIR) -> str:
+    safe = re.sub(r"[^\w.-]", "_", str(dataset_id)).strip(".") or "dataset"
+    return os.path.join(root, safe)
+
+
+class DatasetState:
+    def __init__(self, dataset_id: str, contamination: float = 0.03, sample_rows: int = APPEND_SAMPLE_ROWS,
+                 refit_growth: float = APPEND_REFIT_GROWTH, heavy_hitters: int = APPEND_HEAVY_HITTERS):
+        self.version = STATE_VERSION
+        self.dataset_id = dataset_id
+        self.contamination = contamination
+        self.sample_rows = sample_rows
+        self.refit_growth = refit_growth
+        self.heavy_hitters = heavy_hitters
+        self.rows = 0
+        self.profiler = StreamingProfiler(heavy_hitters=heavy_hitters, seed=0)
+        self.schema: Optional[DatasetSchema] = None
+        self.engine: Optional[AnomalyEngine] = None
+        self.rows_at_fit = 0
+        self.anomaly_count = 0
+        self.sample: Optional[pd.DataFrame] = None
+        self.sample_keys = np.empty(0, dtype=np.float64)
+        self.date_range: Dict[str, List[str]] = {}
+        self.batches: List[Dict] = []
+
+    # ---- views ---------------------------------------------------------------------
+
+    @property
+    def date_columns(self) -> List[str]:
+        if self.schema is None:
+            return []
+        # as statistical_engine.detect_date_columns: detected dates only, date-named ones first
+        return sorted(self.schema.datetime_columns, key=lambda c: not name_hints_datetime(c))
+
+    def stats(self, top_n: int = 3) -> Dict:
+        """KPIs, numeric summary and category frequencies of the whole history."""
+        result = self.profiler.result(top_n=top_n)
+        categorical = set(self.schema.categorical_columns) if self.schema is not None else set()
+        result["categorical_freq"] = {c: v for c, v in result["categorical_freq"].items() if c in categorical}
+        result["profile_text"] = f"Rows: {self.rows}, Columns: {len(self.profiler.columns)}"
+        return result
+
+    # ---- update --------------------------------------------------------------------
+
+    def _update_schema(self, batch: pd.DataFrame):
+        if self.schema is None:
+            self.schema = infer_schema(batch)
+        else:
+            rng = np.random.default_rng(len(self.batches))
+            for c in batch.columns:
+                if c not in self.schema.columns:
+                    self.schema.columns[c] = infer_column(c, batch[c], rng=rng)
+        self.schema.n_rows = self.rows + len(batch)
+
+    def _update_sample(self, numeric: pd.DataFrame, rng: np.random.Generator):
+        keys = rng.random(len(numeric))
+        if self.sample is not None and len(self.sample_keys) >= self.sample_rows:
+            # only rows that can displace a kept row are worth copying
+            take = keys < self.sample_keys.max()
+            numeric, keys = numeric[take], keys[take]
+        batch = numeric.astype(np.float32).reset_index(drop=True)
+        sample = batch if self.sample is None else pd.concat([self.sample, batch], ignore_index=True)
+        keys = np.concatenate([self.sample_keys, keys])
+        if len(keys) > self.sample_rows:
+            keep = np.sort(np.argpartition(keys, self.sample_rows - 1)[:self.sample_rows])
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+        self.sample, self.sample_keys = sample, keys
+
+    def _score(self, batch: pd.DataFrame, top_n: int) -> Dict:
+        columns = self.schema.numeric_columns
+        if not columns:
+            return {}
+        refit = self.engine is None or (self.engine.columns != columns
+                                        or self.rows + len(batch) >= (1 + self.refit_growth) * self.rows_at_fit)
+        if refit:
+            self.engine = AnomalyEngine(contamination=self.contamination)
+            self.engine.fit(self.sample if self.sample is not None else batch, columns)
+            self.rows_at_fit = self.rows + len(batch)
+        result = self.engine.detect(batch.reindex(columns=columns), top_n=top_n)
+        result["model_refit"] = refit
+        # positions inside the batch; add row_offset for positions in the whole dataset
+        result["row_offset"] = self.rows
+        return result
+
+    def _date_coverage(self, batch: pd.DataFrame) -> Dict[str, List[str]]:
+        coverage = {}
+        for c in self.date_columns:
+            fmt = self.schema.date_format(c)
+            if c not in batch or (fmt and "%d" not in fmt and "%Y" not in fmt):
+                continue  # time-of-day columns have no date coverage
+            dates = pd.to_datetime(batch[c], format=fmt, errors="coerce")
+            if dates.notna().any():
+                coverage[c] = [str(dates.min()), str(dates.max())]
+        return coverage
+
+    @traced("incremental.apply")
+    def apply(self, batch: pd.DataFrame, top_n: int = 10) -> Dict:
+        """Merge a batch of new rows; returns the batch's anomalies and the changes it brought."""
+        fingerprint = dataframe_fingerprint(batch)
+        if any(b["fingerprint"] == fingerprint for b in self.batches):
+            return {"duplicate": True, "batch": None, "anomalies": {}, "changes": {}, "date_range": {}}
+        batch_no = len(self.batches) + 1
+        rng = np.random.default_rng([batch_no, len(batch)])
+
+        profile = StreamingProfiler(heavy_hitters=self.heavy_hitters, seed=batch_no)
+        profile.update(batch)
+        self._update_schema(batch)
+        coverage = self._date_coverage(batch)
+        changes = compare_batch(self, profile, coverage)
+
+        numeric = self.schema.numeric_columns
+        if numeric:
+            self._update_sample(batch.reindex(columns=numeric), rng)
+        anomalies = self._score(batch, top_n)
+        if anomalies:
+            batch_rate = anomalies["count"] / max(len(batch), 1)
+            prior_rate = self.anomaly_count / self.rows if self.rows else None
+            changes["anomaly_rate"] = {"batch": round(batch_rate, 5),
+                                       "previous": round(prior_rate, 5) if prior_rate is not None else None}
+            self.anomaly_count += anomalies["count"]
+
+        self.profiler.merge(profile)
+        self.rows += len(batch)
+        for c, (lo, hi) in coverage.items():
+            old = self.date_range.get(c)
+            self.date_range[c] = [min(lo, old[0]), max(hi, old[1])] if old else [lo, hi]
+        self.batches.append({"batch": batch_no, "rows": len(batch), "fingerprint": fingerprint,
+                             "applied_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "date_range": coverage,
+                             "anomalies": anomalies.get("count", 0)})
+        return {"duplicate": False, "batch": batch_no, "anomalies": anomalies, "changes": changes,
+                "date_range": coverage}
+
+
+# ---- change detection -----------------------------------------------------------
+
+def compare_batch(state: DatasetState, batch: StreamingProfiler, coverage: Dict[str, List[str]]) -> Dict:
+    """How a profiled batch differs from the state before it is merged."""
+    changes = {"kpi_shifts": [], "new_categories": {}, "category_shifts": [], "dates": {}, "new_columns": []}
+    if state.rows == 0:
+        return changes
+    prior = state.profiler
+    changes["new_columns"] = [c for c in batch.columns if c not in prior.columns]
+
+    for c, b in batch.numeric.items():
+        p = prior.numeric.get(c)
+        if p is None or p.count < 2 or b.count == 0:
+            continue
+        std = p.std or 0.0
+        shift = (b.mean - p.mean) / std if std > 0 else 0.0
+        pct = (b.mean - p.mean) / abs(p.mean) * 100 if p.mean else None
+        changes["kpi_shifts"].append({"column": c, "previous_mean": p.mean, "batch_mean": b.mean,
+                                      "pct_change": pct, "shift_std": shift,
+                                      "batch_max": b.max, "previous_max": p.max})
+    changes["kpi_shifts"].sort(key=lambda k: abs(k["shift_std"]), reverse=True)
+
+    categorical = set(state.schema.categorical_columns) if state.schema is not None else set()
+    for c, b in batch.categorical.items():
+        p = prior.categorical.get(c)
+        if p is None or c not in categorical or b.count == 0 or p.count == 0:
+            continue
+        new = [v for v in b.hitters.top(5) if v not in p.hitters.counts]
+        # only trustworthy while the prior counter is exact
+        if new and p.hitters.error == 0:
+            changes["new_categories"][c] = new
+        for v, n in b.hitters.top(5).items():
+            share, before = n / b.count, p.hitters.counts.get(v, 0) / p.count
+            changes["category_shifts"].append({"column": c, "value": v, "batch_share": share,
+                                               "previous_share": before, "delta": share - before})
+    changes["category_shifts"].sort(key=lambda s: abs(s["delta"]), reverse=True)
+
+    for c, (lo, hi) in coverage.items():
+        old = state.date_range.get(c)
+        if old:
+            changes["dates"][c] = {"batch": [lo, hi], "previous": old, "overlaps_previous": lo < old[1]}
+    return changes
+
+
+def _fmt(v) -> str:
+    return f"{v:.4g}" if isinstance(v, (int, float, np.floating)) else str(v)
+
+
+def describe_changes(result: Dict, state: DatasetState, max_items: int = APPEND_MAX_CHANGES) -> str:
+    """A few plain-text lines on what the latest batch changed, for the summarizer prompt."""
+    if result.get("duplicate"):
+        return "This batch was already applied; nothing changed."
+    last = state.batches[-1]
+    lines = [f"Batch {last['batch']} added {last['rows']} rows ({state.rows} in total over "
+             f"{len(state.batches)} batches)."]
+    changes = result["changes"]
+    if len(state.batches) == 1:
+        return lines[0] + " This is the first batch; there is no previous state to compare with."
+    for c, d in changes["dates"].items():
+        note = " (overlaps earlier data)" if d["overlaps_previous"] else ""
+        lines.append(f"{c}: batch covers {d['batch'][0][:10]} to {d['batch'][1][:10]}{note}.")
+    if changes["new_columns"]:
+        lines.append(f"New columns: {', '.join(map(str, changes['new_columns']))}.")
+    items = []
+    for k in changes["kpi_shifts"]:
+        # heavy-tailed columns have a wide std, so a large relative move also counts
+        weight = max(abs(k["shift_std"]), abs(k["pct_change"] or 0) / 100)
+        if weight >= 0.1:
+            pct = f" ({k['pct_change']:+.1f}%)" if k["pct_change"] is not None else ""
+            items.append((weight, f"{k['column']}: batch mean {_fmt(k['batch_mean'])} vs "
+                                  f"{_fmt(k['previous_mean'])} before{pct}."))
+    for c, values in changes["new_categories"].items():
+        items.append((1.0, f"{c}: new values {', '.join(map(str, values))}."))
+    for s in changes["category_shifts"]:
+        if abs(s["delta"]) >= 0.05:
+            items.append((abs(s["delta"]) * 5, f"{s['column']}={s['value']}: {s['batch_share']:.1%} of the batch "
+                                               f"vs {s['previous_share']:.1%} before."))
+    rate = changes.get("anomaly_rate")
+    if rate and rate["previous"] is not None:
+        items.append((abs(rate["batch"] - rate["previous"]) / max(rate["previous"], 1e-3),
+                      f"Anomaly rate {rate['batch']:.2%} in the batch vs {rate['previous']:.2%} before."))
+    lines += [text for _, text in sorted(items, key=lambda t: t[0], reverse=True)[:max_items]]
+    return "\n".join(lines)
+
+
+# ---- persistence ----------------------------------------------------------------
+
+def load_state(dataset_id: str, root: str = APPEND_STATE_DIR, **kwargs) -> DatasetState:
+    path = os.path.join(state_dir(dataset_id, root), "state.pkl")
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if getattr(state, "version", None) == STATE_VERSION:
+            return state
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+    return DatasetState(dataset_id, **kwargs)
+
+
+def save_state(state: DatasetState, root: str = APPEND_STATE_DIR) -> str:
+    directory = state_dir(state.dataset_id, root)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(directory, "state.pkl"))
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return directory
+
+
+def _lock(f):
+    # fcntl is Unix-only and msvcrt Windows-only, so neither is imported at module level
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK gives up after ~10 s; keep waiting like flock
+                time.sleep(0.1)
+    import fcntl
+    fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def _unlock(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+    import fcntl
+    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked_state(dataset_id: str, root: str = APPEND_STATE_DIR, **kwargs) -> Iterator[DatasetState]:
+    """Load a dataset's state under an exclusive lock; it is saved if the block completes."""
+    directory = state_dir(dataset_id, root)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a+") as lock:
+        _lock(lock)
+        try:
+            state = load_state(dataset_id, root, **kwargs)
+            yield state
+            save_state(state, root)
+        finally:
+            _unlock(lock)
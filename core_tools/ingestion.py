@@ -0,0 +1,171 @@
+# core_tools/ingestion.py
+"""
+Ingestion: reads uploaded or on-disk datasets into DataFrames through Arrow.
+"""
+
+from typing import Iterator, Optional, Sequence
+import hashlib
+import io
+import os
+import tempfile
+import pandas as pd
+from core_tools.telemetry import traced
+from config.settings import INGEST_DTYPE_BACKEND, INGEST_CACHE_DIR, INGEST_CSV_BLOCK_MB, PROFILE_CHUNK_ROWS
+
+CSV_SUFFIXES = (".csv", ".txt")
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+EXCEL_SUFFIXES = (".xlsx", ".xls")
+SUPPORTED_SUFFIXES = CSV_SUFFIXES + PARQUET_SUFFIXES + ARROW_SUFFIXES + EXCEL_SUFFIXES
+
+
+def _name_of(source, name: Optional[str]) -> str:
+    if name:
+        return name
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "") or ""
+
+
+def _bytes_of(source) -> bytes:
+    # Streamlit's UploadedFile and BytesIO both expose getvalue()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    return source.read()
+
+
+def _to_pandas(table, dtype_backend: str) -> pd.DataFrame:
+    if dtype_backend == "pyarrow":
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+def _select(table, columns: Optional[Sequence[str]]):
+    return table if columns is None else table.select(list(columns))
+
+
+def read_csv_arrow(source, columns: Optional[Sequence[str]] = None, dtype_backend: str = INGEST_DTYPE_BACKEND):
+    import pyarrow.csv as pcsv
+    read_opts = pcsv.ReadOptions(use_threads=True, block_size=INGEST_CSV_BLOCK_MB * 1024 * 1024)
+    convert_opts = pcsv.ConvertOptions(include_columns=list(columns) if columns is not None else None)
+    if not isinstance(source, (str, os.PathLike)):
+        source = io.BytesIO(_bytes_of(source))
+    return _to_pandas(pcsv.read_csv(source, read_options=read_opts, convert_options=convert_opts), dtype_backend)
+
+
+def read_parquet(source, columns: Optional[Sequence[str]] = None, dtype_backend: str = INGEST_DTYPE_BACKEND):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if isinstance(source, (str, os.PathLike)):
+        table = pq.read_table(source, columns=columns, memory_map=True)
+    else:
+        table = pq.read_table(pa.BufferReader(_bytes_of(source)), columns=columns)
+    return _to_pandas(table, dtype_backend)
+
+
+def read_arrow_ipc(source, columns: Optional[Sequence[str]] = None, dtype_backend: str = INGEST_DTYPE_BACKEND):
+    import pyarrow as pa
+    if isinstance(source, (str, os.PathLike)):
+        buf = pa.memory_map(os.fspath(source), "r")  # zero-copy: record batches point into the map
+    else:
+        buf = pa.BufferReader(_bytes_of(source))
+    try:
+        table = pa.ipc.open_file(buf).read_all()
+    except pa.ArrowInvalid:
+        # IPC stream format (no footer)
+        buf.seek(0)
+        table = pa.ipc.open_stream(buf).read_all()
+    return _to_pandas(_select(table, columns), dtype_backend)
+
+
+def excel_cache_path(data: bytes, cache_dir: str = INGEST_CACHE_DIR) -> str:
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"excel-{digest}.parquet")
+
+
+def read_excel_cached(source, columns: Optional[Sequence[str]] = None, dtype_backend: str = INGEST_DTYPE_BACKEND,
+                      cache_dir: str = INGEST_CACHE_DIR) -> pd.DataFrame:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        data = _bytes_of(source)
+    path = excel_cache_path(data, cache_dir)
+    if os.path.exists(path):
+        return read_parquet(path, columns=columns, dtype_backend=dtype_backend)
+
+    df = pd.read_excel(io.BytesIO(data))
+    tmp = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        os.close(fd)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except Exception:
+        # mixed-type object columns cannot be written as Parquet; just skip the cache
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return df[list(columns)] if columns is not None else df
+    # return what later runs will see, so the first run is not different from the rest
+    return read_parquet(path, columns=columns, dtype_backend=dtype_backend)
+
+
+@traced()
+def read_table(source, name: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+               dtype_backend: str = INGEST_DTYPE_BACKEND) -> pd.DataFrame:
+    """Read a path or file-like object (e.g. a Streamlit upload); the format follows the file suffix."""
+    suffix = os.path.splitext(_name_of(source, name).lower())[1]
+    if suffix in PARQUET_SUFFIXES:
+        return read_parquet(source, columns, dtype_backend)
+    if suffix in ARROW_SUFFIXES:
+        return read_arrow_ipc(source, columns, dtype_backend)
+    if suffix in EXCEL_SUFFIXES:
+        return read_excel_cached(source, columns, dtype_backend)
+    if suffix in CSV_SUFFIXES:
+        return read_csv_arrow(source, columns, dtype_backend)
+    raise ValueError(f"Unsupported file type '{suffix}'. Expected one of: {', '.join(SUPPORTED_SUFFIXES)}")
+
+
+def iter_batches(source, name: Optional[str] = None, batch_rows: int = PROFILE_CHUNK_ROWS,
+                 dtype_backend: str = INGEST_DTYPE_BACKEND) -> Iterator[pd.DataFrame]:
+    """Yield a path or file-like object as DataFrames of at most `batch_rows` rows.
+
+    Parquet is read row group by row group and IPC files batch by batch, so only one
+    batch is converted to pandas at a time. Excel has no incremental reader and comes
+    back as one frame.
+    """
+    import pyarrow as pa
+    suffix = os.path.splitext(_name_of(source, name).lower())[1]
+    if suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+        if isinstance(source, (str, os.PathLike)):
+            pf = pq.ParquetFile(source, memory_map=True)
+        else:
+            pf = pq.ParquetFile(pa.BufferReader(_bytes_of(source)))
+        for batch in pf.iter_batches(batch_size=batch_rows):
+            yield _to_pandas(pa.Table.from_batches([batch]), dtype_backend)
+    elif suffix in ARROW_SUFFIXES:
+        if isinstance(source, (str, os.PathLike)):
+            buf = pa.memory_map(os.fspath(source), "r")
+        else:
+            buf = pa.BufferReader(_bytes_of(source))
+        try:
+            reader = pa.ipc.open_file(buf)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            buf.seek(0)
+            batches = pa.ipc.open_stream(buf)
+        for batch in batches:
+            for offset in range(0, batch.num_rows, batch_rows):
+                yield _to_pandas(pa.Table.from_batches([batch.slice(offset, batch_rows)]), dtype_backend)
+    elif suffix in EXCEL_SUFFIXES:
+        yield read_excel_cached(source, dtype_backend=dtype_backend)
+    elif suffix in CSV_SUFFIXES:
+        # pandas infers dtypes per chunk; the Arrow streaming reader would fail on a column whose
+        # type changes after the first block
+        kwargs = {"dtype_backend": "pyarrow"} if dtype_backend == "pyarrow" else {}
+        with pd.read_csv(source, chunksize=batch_rows, **kwargs) as reader:
+            yield from reader
+    else:
+        raise ValueError(f"Unsupported file type '{suffix}'. Expected one of: {', '.join(SUPPORTED_SUFFIXES)}")
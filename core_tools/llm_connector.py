@@ -3,25 +3,33 @@
 LLM wrapper: uses OpenAI Python SDK (OpenAI.Client) to generate text.
 """
 
-import streamlit as st
-from openai import OpenAI
-from typing import List
-
-# -----------------------------
-# 🔹 Load OpenAI key from Streamlit secrets
-# -----------------------------
-try:
-    OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-except KeyError:
-    raise RuntimeError(
-        "OPENAI_API_KEY not set in Streamlit secrets. "
-        "Go to app settings → Secrets and add it in TOML format."
-    )
-
-# Optional: Model selection, default to GPT-3.5
-LLM_MODEL = st.secrets.get("LLM_MODEL", "gpt-3.5-turbo")
-
-_client = OpenAI(api_key=OPENAI_API_KEY)
+from typing import Iterator, List
+from config.settings import OPENAI_API_KEY as _ENV_OPENAI_API_KEY, LLM_MODEL as _ENV_LLM_MODEL
+
+
+def _streamlit_secret(name: str):
+    """Read a Streamlit secret if Streamlit and a secrets file are available."""
+    try:
+        import streamlit as st
+        return st.secrets.get(name)
+    except Exception:
+        return None
+
+
+def get_api_key() -> str:
+    key = _ENV_OPENAI_API_KEY or _streamlit_secret("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError(
+            "OPENAI_API_KEY not set. Export it in the environment/.env, or go to "
+            "app settings → Secrets and add it in TOML format."
+        )
+    return key
+
+
+def get_llm_model() -> str:
+    # Streamlit secrets keep precedence over the environment, as before
+    return _streamlit_secret("LLM_MODEL") or _ENV_LLM_MODEL
+
 
 def generate_text(
     prompt: str,
@@ -30,17 +38,18 @@ def generate_text(
     temperature: float = 0.3
 ) -> str:
     """Generate text using OpenAI chat model."""
-    system_msg = system or "You are a helpful expert data analyst who writes concise, reader-friendly reports."
-    resp = _client.chat.completions.create(
-        model=LLM_MODEL,
-        messages=[
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
-    return resp.choices[0].message.content.strip()
+    from core_tools.async_llm import get_connector
+    return get_connector().generate_sync(prompt, system=system, max_tokens=max_tokens, temperature=temperature)
+
+def stream_text(
+    prompt: str,
+    system: str = None,
+    max_tokens: int = 450,
+    temperature: float = 0.3
+) -> Iterator[str]:
+    """Yield the completion token by token as the model produces it."""
+    from core_tools.async_llm import get_connector
+    return get_connector().stream_sync(prompt, system=system, max_tokens=max_tokens, temperature=temperature)
 
 def generate_short_bullets(prompt: str, **kwargs) -> str:
     """Generate a short bullet-style summary using the LLM."""
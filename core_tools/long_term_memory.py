@@ -0,0 +1,371 @@
+# core_tools/long_term_memory.py
+"""
+Long-term memory: persistent vector store for prior reports, insights and SOPs.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import numpy as np
+from config.settings import MEMORY_PERSIST_DIR, MEMORY_EMBEDDING, MEMORY_HNSW_M
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_INDEX_FILE = "index.faiss"
+_VECTORS_FILE = "vectors.f32"
+_DB_FILE = "memory.sqlite"
+
+
+class HashingEmbedder:
+    """Dependency-free embedding: signed feature hashing of words and word bigrams.
+
+    Good enough for keyword-style recall and for tests/benchmarks; use the shared
+    EmbeddingEngine for semantic recall.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for feat in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feat.encode("utf-8"), digest_size=8).digest(), "little")
+                out[i, h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        return out
+
+
+def default_embedding_fn() -> Callable[[Sequence[str]], np.ndarray]:
+    if MEMORY_EMBEDDING == "engine":
+        from core_tools import model_registry
+        engine = model_registry.get_embedding_engine()
+        return engine.encode_array
+    return HashingEmbedder()
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _has_faiss() -> bool:
+    try:
+        import faiss  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class VectorStore:
+    """Interface to the on-disk vector store."""
+
+    def __init__(self, persist_directory: str = MEMORY_PERSIST_DIR,
+                 embedding_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None,
+                 use_index: Optional[bool] = None, rebuild_ratio: float = 0.2):
+        self.persist_directory = persist_directory
+        self.embedding_fn = embedding_fn or default_embedding_fn()
+        self.use_index = _has_faiss() if use_index is None else use_index
+        self.rebuild_ratio = rebuild_ratio
+        self._lock = threading.RLock()
+        os.makedirs(persist_directory, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(persist_directory, _DB_FILE), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS memories (
+                row INTEGER PRIMARY KEY, id TEXT, document TEXT, metadata TEXT, deleted INTEGER DEFAULT 0);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_live_id ON memories(id) WHERE deleted = 0;
+            CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        info = dict(self._db.execute("SELECT key, value FROM store_info").fetchall())
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self.count = int(self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM memories").fetchone()[0])
+        self.deleted = int(self._db.execute("SELECT COUNT(*) FROM memories WHERE deleted = 1").fetchone()[0])
+        self._vectors = None
+        self._index = None
+        self._index_dead = 0
+        if self.dim is not None:
+            self._open_vectors(max(self.count, 1))
+            self._load_index()
+
+    # ---- storage -------------------------------------------------------------------
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.persist_directory, _VECTORS_FILE)
+
+    def _open_vectors(self, min_rows: int):
+        path = self._vectors_path
+        row_bytes = self.dim * 4
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        capacity = size // row_bytes
+        if capacity < min_rows:
+            capacity = max(min_rows, capacity * 2, 1024)
+            self._vectors = None  # release the old mapping before growing the file
+            with open(path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _new_index(self):
+        import faiss
+        hnsw = faiss.IndexHNSWFlat(self.dim, MEMORY_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = 80
+        # ids are row positions, so deleted rows can be left out on rebuild
+        return faiss.IndexIDMap2(hnsw)
+
+    @property
+    def _hnsw(self):
+        import faiss
+        return faiss.downcast_index(self._index.index)
+
+    def _live_rows(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        stop = self.count if stop is None else stop
+        rows = self._db.execute("SELECT row FROM memories WHERE deleted = 0 AND row >= ? AND row < ? ORDER BY row",
+                                (start, stop)).fetchall()
+        return np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+
+    def _index_rows(self, rows: np.ndarray):
+        for i in range(0, len(rows), 65536):
+            batch = rows[i:i + 65536]
+            self._index.add_with_ids(np.ascontiguousarray(self._vectors[batch]), batch)
+
+    def _load_index(self):
+        if not self.use_index:
+            return
+        import faiss
+        path = os.path.join(self.persist_directory, _INDEX_FILE)
+        info = dict(self._db.execute("SELECT key, value FROM store_info").fetchall())
+        indexed = int(info.get("indexed_rows", 0))
+        if os.path.exists(path) and indexed <= self.count:
+            self._index = faiss.read_index(path)
+            # deletions since the index was saved are filtered at query time
+            self._index_dead = self.deleted
+            # rows appended after the index was last saved
+            self._index_rows(self._live_rows(indexed))
+        else:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Rebuild the ANN index from live rows only (drops tombstoned rows)."""
+        if not self.use_index:
+            return
+        self._index = self._new_index()
+        self._index_dead = 0
+        self._index_rows(self._live_rows())
+
+    def persist(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._index is not None:
+                import faiss
+                tmp = os.path.join(self.persist_directory, _INDEX_FILE + ".tmp")
+                faiss.write_index(self._index, tmp)
+                os.replace(tmp, os.path.join(self.persist_directory, _INDEX_FILE))
+                self._db.execute("INSERT OR REPLACE INTO store_info VALUES ('indexed_rows', ?)", (str(self.count),))
+            self._db.commit()
+
+    # ---- writes --------------------------------------------------------------------
+
+    def add_embeddings(self, embeddings: np.ndarray, documents: Sequence[str],
+                       metadatas: Optional[Sequence[Dict]] = None, ids: Optional[Sequence[str]] = None) -> List[str]:
+        emb = _normalise(embeddings)
+        n = len(documents)
+        metadatas = list(metadatas) if metadatas else [{}] * n
+        ids = [i or str(uuid.uuid4()) for i in ids] if ids else [str(uuid.uuid4()) for _ in range(n)]
+        with self._lock:
+            if self.dim is None:
+                self.dim = emb.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO store_info VALUES ('dim', ?)", (str(self.dim),))
+                self._open_vectors(max(n, 1))
+                self._load_index()
+            elif emb.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {emb.shape[1]} does not match store dimension {self.dim}.")
+            # re-adding an id replaces the previous memory
+            self._tombstone(ids)
+            start = self.count
+            self._open_vectors(start + n)
+            self._vectors[start:start + n] = emb
+            self._db.executemany(
+                "INSERT INTO memories (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(start + i, ids[i], documents[i], json.dumps(metadatas[i] or {})) for i in range(n)])
+            self.count += n
+            if self._index is not None:
+                self._index.add_with_ids(emb, np.arange(start, start + n, dtype=np.int64))
+            self._vectors.flush()
+            self._db.commit()
+        return ids
+
+    def add_memories(self, contents: Sequence[str], metadatas: Optional[Sequence[Dict]] = None,
+                     ids: Optional[Sequence[str]] = None, batch_size: int = 256) -> List[str]:
+        """Embed and store many memories, encoding in batches."""
+        out = []
+        for i in range(0, len(contents), batch_size):
+            docs = list(contents[i:i + batch_size])
+            out += self.add_embeddings(np.asarray(self.embedding_fn(docs)), docs,
+                                       metadatas[i:i + batch_size] if metadatas else None,
+                                       ids[i:i + batch_size] if ids else None)
+        return out
+
+    def add_memory(self, content: str, metadata: Dict = None, memory_id: str = None) -> str:
+        return self.add_memories([content], [metadata or {}], [memory_id] if memory_id else None)[0]
+
+    def _tombstone(self, ids: Sequence[str]) -> int:
+        marks = ",".join("?" * len(ids))
+        cur = self._db.execute(f"UPDATE memories SET deleted = 1 WHERE deleted = 0 AND id IN ({marks})", list(ids))
+        self.deleted += cur.rowcount
+        self._index_dead += cur.rowcount
+        return cur.rowcount
+
+    def delete_memory(self, memory_id: str):
+        self.delete_memories([memory_id])
+
+    def delete_memories(self, ids: Sequence[str]):
+        with self._lock:
+            self._tombstone(list(ids))
+            self._db.commit()
+            if self._index is not None and self._index_dead > self.rebuild_ratio * max(1, self._index.ntotal):
+                self._rebuild_index()
+
+    # ---- reads ---------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.count - self.deleted
+
+    def existing_ids(self, ids: Sequence[str]) -> set:
+        marks = ",".join("?" * len(ids))
+        return {r[0] for r in self._db.execute(
+            f"SELECT id FROM memories WHERE deleted = 0 AND id IN ({marks})", list(ids))}
+
+    def _rows(self, rows: Sequence[int]) -> Dict[int, tuple]:
+        found = {}
+        rows = [int(r) for r in rows]
+        for i in range(0, len(rows), 500):
+            batch = rows[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            for row, mid, doc, meta in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM memories WHERE deleted = 0 AND row IN ({marks})", batch):
+                found[row] = (mid, doc, json.loads(meta))
+        return found
+
+    def _filter_rows(self, where: Dict[str, Any]) -> np.ndarray:
+        clauses = " AND ".join("json_extract(metadata, ?) = ?" for _ in where)
+        params = []
+        for k, v in where.items():
+            params += [f"$.{k}", v]
+        rows = self._db.execute(f"SELECT row FROM memories WHERE deleted = 0 AND {clauses}", params).fetchall()
+        return np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+
+    def _exact_search(self, q: np.ndarray, k: int, rows: Optional[np.ndarray] = None):
+        best_s, best_r = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        block = 65536
+        total = self.count if rows is None else len(rows)
+        for start in range(0, total, block):
+            r = np.arange(start, min(total, start + block)) if rows is None else rows[start:start + block]
+            s = self._vectors[r] @ q
+            s_all, r_all = np.concatenate([best_s, s]), np.concatenate([best_r, r])
+            keep = np.argsort(-s_all)[:k]
+            best_s, best_r = s_all[keep], r_all[keep]
+        return best_s, best_r
+
+    def query(self, query_text: str, n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        empty = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        if self.dim is None or len(self) == 0:
+            return empty
+        q = _normalise(np.asarray(self.embedding_fn([query_text])))[0]
+        with self._lock:
+            candidates = None
+            if where:
+                candidates = self._filter_rows(where)
+                if len(candidates) == 0:
+                    return empty
+            elif self.deleted and self._index is None:
+                candidates = self._live_rows()
+
+            # selective filters (or no index) are answered exactly over the candidate rows
+            if self._index is None or (candidates is not None and len(candidates) <= 50000):
+                scores, rows = self._exact_search(q, n_results, candidates)
+                meta = self._rows(rows)
+            else:
+                allowed = None if candidates is None else candidates
+                k = n_results if allowed is None and not self._index_dead else n_results * 4
+                while True:
+                    k = min(k, self._index.ntotal)
+                    self._hnsw.hnsw.efSearch = max(64, 2 * k)
+                    s, r = self._index.search(q[None, :], k)
+                    ok = r[0] >= 0
+                    if allowed is not None:
+                        ok &= np.isin(r[0], allowed)
+                    scores, rows = s[0][ok], r[0][ok]
+                    meta = self._rows(rows)  # also drops rows deleted since indexing
+                    if len(meta) >= n_results or k >= self._index.ntotal:
+                        break
+                    k *= 4
+
+        ids, docs, metas, dists = [], [], [], []
+        for score, row in zip(scores, rows):
+            if int(row) in meta and len(ids) < n_results:
+                mid, doc, md = meta[int(row)]
+                ids.append(mid)
+                docs.append(doc)
+                metas.append(md)
+                dists.append(round(1.0 - float(score), 6))  # cosine distance
+        return {"ids": [ids], "documents": [docs], "metadatas": [metas], "distances": [dists]}
+
+    def retrieve_memory(self, query: str, top_k: int = 5, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.query(query, n_results=top_k, where=where)
+
+    def list_memories(self) -> Dict[str, List]:
+        rows = self._db.execute("SELECT id, document, metadata FROM memories WHERE deleted = 0 ORDER BY row").fetchall()
+        return {"ids": [r[0] for r in rows], "documents": [r[1] for r in rows],
+                "metadatas": [json.loads(r[2]) for r in rows]}
+
+
+class LongTermMemory:
+    def __init__(self, persist_directory: str = MEMORY_PERSIST_DIR,
+                 embedding_fn: Optional[Callable[[Sequence[str]], np.ndarray]] = None):
+        self.store = VectorStore(persist_directory, embedding_fn=embedding_fn)
+        self.initialize_strategic_knowledge()
+
+    def initialize_strategic_knowledge(self):
+        # fixed ids make seeding idempotent across restarts
+        ids = ["kpi_doc", "strategic_goal", "anomaly_sop"]
+        if self.store.existing_ids(ids) == set(ids):
+            return
+        self.store.add_memories(
+            [
+                "Key performance indicators (KPIs) for airlines include On-Time Performance (OTP), Revenue Per Available Seat Mile (RASM), and Load Factor.",
+                "Strategic goal: Reduce passenger delay minutes by 15% in the next quarter via improved ground operations.",
+                "The standard procedure for reporting major anomalies (>$100k cost variance) requires immediate escalation to the Financial Planning team.",
+            ],
+            metadatas=[{"source": "Internal Policy 2024", "id": "kpi_doc"},
+                       {"source": "Executive Mandate", "id": "strategic_goal"},
+                       {"source": "SOP Manual", "id": "anomaly_sop"}],
+            ids=ids,
+        )
+
+    def remember(self, key: str, text: str, metadata: Dict = None):
+        self.store.add_memory(text, {"source": "Agent Insight", "id": key, **(metadata or {})}, memory_id=key)
+
+    def forget(self, key: str):
+        self.store.delete_memory(key)
+
+    def recall(self, query: str, top_k: int = 3, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        results = self.store.retrieve_memory(query, top_k, where=where)
+        context = []
+        if results.get('documents') and results['documents']:
+            for doc_list in results['documents']:
+                context.extend(doc_list)
+        return {"context": context, "raw_results": results}
+
+    def persist(self):
+        self.store.persist()
@@ -0,0 +1,137 @@
+# core_tools/memory_budget.py
+"""
+Memory budget helpers: shrink a DataFrame in place and measure process memory per stage.
+"""
+
+from typing import Dict, Optional
+import os
+import resource
+import threading
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype, is_string_dtype, is_object_dtype
+from core_tools.schema_engine import detect_datetime_format, name_hints_datetime
+from core_tools.telemetry import traced
+from config.settings import MEMORY_CATEGORY_MAX_RATIO, MEMORY_FLOAT32
+
+_MB = 1024 * 1024
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, IndexError, ValueError):
+        # no procfs (macOS): fall back to the process high-water mark
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == "Darwin" else rss * 1024
+
+
+def _column_mb(s: pd.Series) -> float:
+    return s.memory_usage(deep=True, index=False) / _MB
+
+
+def _compact_column(name, s: pd.Series, float32: bool, category_max_ratio: float) -> Optional[pd.Series]:
+    """Smaller replacement for `s`, or None to keep it."""
+    dtype = s.dtype
+    if is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return None
+    if is_integer_dtype(dtype):
+        out = pd.to_numeric(s, downcast="integer")
+        return out if out.dtype != dtype else None
+    if is_float_dtype(dtype):
+        if not float32 or str(dtype) in ("float32", "float[pyarrow]"):
+            return None
+        if isinstance(dtype, pd.ArrowDtype):
+            import pyarrow as pa
+            return s.astype(pd.ArrowDtype(pa.float32()))
+        return s.astype(np.float32)
+    if is_object_dtype(dtype) or is_string_dtype(dtype):
+        n = len(s)
+        if n == 0 or name_hints_datetime(name):
+            return None
+        # cheap check on a sample before hashing the whole column
+        head = s.iloc[:min(n, 10000)].dropna()
+        if head.nunique() > category_max_ratio * max(len(head), 1) and len(head) >= 1000:
+            return None
+        if detect_datetime_format(head.astype(str).head(200)) is not None:
+            return None
+        if s.nunique() > category_max_ratio * n:
+            return None
+        return s.astype("category")
+    return None
+
+
+@traced()
+def compact_frame(df: pd.DataFrame, float32: bool = MEMORY_FLOAT32,
+                  category_max_ratio: float = MEMORY_CATEGORY_MAX_RATIO) -> Dict:
+    """Shrink `df` in place; returns the MB before/after and the converted columns."""
+    before = after = 0.0
+    converted = {}
+    for col in list(df.columns):
+        s = df[col]
+        new = _compact_column(col, s, float32, category_max_ratio)
+        if new is None:
+            continue
+        old_mb, new_mb = _column_mb(s), _column_mb(new)
+        if new_mb >= old_mb:
+            continue
+        df[col] = new
+        before += old_mb
+        after += new_mb
+        converted[col] = f"{s.dtype} -> {new.dtype}"
+        del s, new
+    return {"before_mb": round(before, 2), "after_mb": round(after, 2), "converted": converted}
+
+
+class MemorySampler:
+    """Background RSS poller; begin/end bracket a stage (stages may overlap)."""
+
+    def __init__(self, interval_s: float = 0.01):
+        self.interval_s = interval_s
+        self.peak = 0
+        self._active: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> int:
+        rss = current_rss_bytes()
+        with self._lock:
+            self.peak = max(self.peak, rss)
+            for span in self._active.values():
+                span[1] = max(span[1], rss)
+        return rss
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def start(self) -> "MemorySampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._loop, name="memory-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+
+    def begin(self, name: str):
+        rss = current_rss_bytes()
+        with self._lock:
+            self._active[name] = [rss, rss]
+
+    def end(self, name: str) -> Dict[str, float]:
+        self._sample()
+        with self._lock:
+            start, peak = self._active.pop(name)
+        return {"start_mb": round(start / _MB, 1), "peak_mb": round(peak / _MB, 1),
+                "delta_mb": round((peak - start) / _MB, 1)}
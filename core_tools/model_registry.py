@@ -0,0 +1,56 @@
+# core_tools/model_registry.py
+"""
+Model Registry: process-wide, thread-safe home for expensive objects
+(embedding models, API clients, precomputed concept embeddings).
+"""
+
+from typing import Any, Callable, Dict, Hashable
+import threading
+
+_instances: Dict[Hashable, Any] = {}
+_key_locks: Dict[Hashable, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_or_create(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Return the shared instance for `key`, building it with `factory` on first use.
+
+    A per-key lock means concurrent callers wait for a single build of the same
+    object, while builds of different objects can proceed in parallel.
+    """
+    try:
+        return _instances[key]
+    except KeyError:
+        pass
+    with _registry_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _instances:
+            _instances[key] = factory()
+        return _instances[key]
+
+
+def is_loaded(key: Hashable) -> bool:
+    return key in _instances
+
+
+def clear(key: Hashable = None):
+    """Drop one shared instance (or all of them), e.g. after a settings change."""
+    with _registry_lock:
+        if key is None:
+            _instances.clear()
+        else:
+            _instances.pop(key, None)
+
+
+def get_embedding_engine(backend: str = "auto"):
+    from core_tools.embedding_engine import EmbeddingEngine
+    return get_or_create(("embedding_engine", backend or "auto"), lambda: EmbeddingEngine(backend))
+
+
+def get_openai_client(api_key: str):
+    """Shared synchronous OpenAI client (keeps its HTTP connection pool warm)."""
+    def _build():
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
+    return get_or_create(("openai_client", api_key), _build)
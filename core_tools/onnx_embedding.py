@@ -0,0 +1,139 @@
+# core_tools/onnx_embedding.py
+"""
+ONNX Runtime sentence embeddings: the local MiniLM model without torch.
+"""
+
+from typing import Optional, Sequence
+import argparse
+import importlib.util
+import os
+import shutil
+import numpy as np
+from config.settings import (LOCAL_EMBEDDING_MODEL, ONNX_EMBEDDING_DIR, ONNX_EMBEDDING_QUANTIZED,
+                             ONNX_EMBEDDING_BATCH_SIZE, ONNX_EMBEDDING_MAX_LENGTH, ONNX_INTRA_OP_THREADS)
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# files published with the model on the hub: fp32 and a portable uint8 (AVX2) quantization
+HUB_FILES = {FP32_FILE: "onnx/model.onnx", INT8_FILE: "onnx/model_quint8_avx2.onnx", TOKENIZER_FILE: "tokenizer.json"}
+
+_has_onnxruntime = importlib.util.find_spec("onnxruntime") is not None
+_has_tokenizers = importlib.util.find_spec("tokenizers") is not None
+
+
+def model_file(model_dir: str, quantized: bool) -> str:
+    return os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+
+
+def is_available(model_dir: str = ONNX_EMBEDDING_DIR, quantized: bool = ONNX_EMBEDDING_QUANTIZED) -> bool:
+    """onnxruntime and tokenizers are installed and the model directory is prepared."""
+    return (_has_onnxruntime and _has_tokenizers and os.path.exists(model_file(model_dir, quantized))
+            and os.path.exists(os.path.join(model_dir, TOKENIZER_FILE)))
+
+
+def session_options(intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+    import onnxruntime as ort
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.inter_op_num_threads = 1
+    if intra_op_threads > 0:
+        opts.intra_op_num_threads = intra_op_threads
+    # idle pool threads spin by default, taking CPU from the pipeline stages running alongside
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return opts
+
+
+class OnnxEmbedder:
+    def __init__(self, model_dir: str = ONNX_EMBEDDING_DIR, quantized: bool = ONNX_EMBEDDING_QUANTIZED,
+                 batch_size: int = ONNX_EMBEDDING_BATCH_SIZE, max_length: int = ONNX_EMBEDDING_MAX_LENGTH,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS, normalize: bool = True,
+                 session=None, tokenizer=None):
+        self.model_path = model_file(model_dir, quantized)
+        self.batch_size = batch_size
+        self.normalize = normalize
+        if session is None or tokenizer is None:
+            if not (_has_onnxruntime and _has_tokenizers):
+                raise RuntimeError("The onnx embedding backend needs onnxruntime and tokenizers installed.")
+            if not os.path.exists(self.model_path):
+                raise RuntimeError(f"No ONNX model at {self.model_path}; "
+                                   f"run `python -m core_tools.onnx_embedding --dir {model_dir}` first.")
+        if tokenizer is None:
+            from tokenizers import Tokenizer
+            tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        # padding is per batch (to its longest text), see encode()
+        tokenizer.no_padding()
+        tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer = tokenizer
+        if session is None:
+            import onnxruntime as ort
+            session = ort.InferenceSession(self.model_path, session_options(intra_op_threads),
+                                           providers=["CPUExecutionProvider"])
+        self.session = session
+        self.input_names = [i.name for i in session.get_inputs()]
+
+    def _run(self, encodings) -> np.ndarray:
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for i, e in enumerate(encodings):
+            ids[i, :len(e.ids)] = e.ids
+            mask[i, :len(e.ids)] = e.attention_mask
+        feed = {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+        out = self.session.run(None, {k: feed[k] for k in self.input_names})[0]
+        if out.ndim == 3:
+            # mean pooling over real tokens
+            m = mask[:, :, None].astype(np.float32)
+            out = (out * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        return out.astype(np.float32, copy=False)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        texts = [str(t) for t in texts]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        encodings = self.tokenizer.encode_batch(texts)
+        order = np.argsort([len(e.ids) for e in encodings], kind="stable")
+        out: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            vecs = self._run([encodings[i] for i in idx])
+            if out is None:
+                out = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+            out[idx] = vecs
+        if self.normalize:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
+
+
+def prepare_onnx_model(model_dir: str = ONNX_EMBEDDING_DIR,
+                       repo_id: str = f"sentence-transformers/{LOCAL_EMBEDDING_MODEL}") -> str:
+    """Download the tokenizer and the fp32 and int8 ONNX files of `repo_id` into `model_dir`."""
+    from huggingface_hub import hf_hub_download
+    os.makedirs(model_dir, exist_ok=True)
+    for local, remote in HUB_FILES.items():
+        target = os.path.join(model_dir, local)
+        if not os.path.exists(target):
+            shutil.copyfile(hf_hub_download(repo_id, remote), target)
+    return model_dir
+
+
+def quantize_onnx_model(model_dir: str = ONNX_EMBEDDING_DIR) -> str:
+    """Write model_int8.onnx next to model.onnx with int8 dynamic quantization (needs the onnx package)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    target = model_file(model_dir, True)
+    quantize_dynamic(model_file(model_dir, False), target, weight_type=QuantType.QInt8)
+    return target
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Prepare the ONNX embedding model directory.")
+    ap.add_argument("--dir", default=ONNX_EMBEDDING_DIR)
+    ap.add_argument("--repo", default=f"sentence-transformers/{LOCAL_EMBEDDING_MODEL}")
+    ap.add_argument("--quantize-local", action="store_true",
+                    help="quantize model.onnx here instead of using the hub's int8 file")
+    args = ap.parse_args()
+    prepare_onnx_model(args.dir, args.repo)
+    if args.quantize_local:
+        quantize_onnx_model(args.dir)
+    print(f"ONNX embedding model ready in {args.dir}")
@@ -0,0 +1,156 @@
+# core_tools/prompt_builder.py
+"""
+Prompt Builder: assembles the summarizer prompt under an explicit token budget.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import math
+import re
+from core_tools.telemetry import traced
+from config.settings import PROMPT_TOKEN_BUDGET
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_encoder = None
+
+
+def _heuristic_tokens(text: str) -> int:
+    # BPE vocabularies split long words/numbers into ~4-character pieces
+    return sum(max(1, math.ceil(len(t) / 4)) for t in _WORD_RE.findall(text))
+
+
+def count_tokens(text: str) -> int:
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding("cl100k_base")
+            _encoder = lambda t: len(enc.encode(t))
+        except Exception:
+            _encoder = _heuristic_tokens
+    return _encoder(text)
+
+
+def _fmt(v) -> str:
+    if v is None:
+        return "-"
+    try:
+        return f"{float(v):.4g}"
+    except (TypeError, ValueError):
+        return str(v)
+
+
+def _truncate(text: str, max_tokens: int, counter: Callable[[str], int]) -> str:
+    """Leading lines of `text` within max_tokens, plus a note on how many lines were cut."""
+    lines = text.splitlines()
+    kept, used = [], 0
+    for line in lines:
+        cost = counter(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + [f"({len(lines) - len(kept)} more lines truncated)"])
+
+
+def rank_columns(semantic_map: dict, kpis: dict, anomalies: dict) -> List[str]:
+    """Most informative columns first."""
+    mapping = semantic_map.get("mapping", {})
+    drivers: Dict[str, float] = {}
+    for a in anomalies.get("top", []):
+        for rank, (col, _z) in enumerate(a.get("contributors", [])):
+            drivers[col] = drivers.get(col, 0.0) + 1.0 / (rank + 1)
+    max_driver = max(drivers.values(), default=1.0)
+
+    scores = {}
+    for col in list(mapping) + [c for c in kpis if c not in mapping]:
+        s = float(mapping.get(col, {}).get("score", 0.0))
+        k = kpis.get(col)
+        if k and k.get("std") is not None and k.get("mean") not in (None, 0):
+            cv = abs(k["std"] / k["mean"])
+            if math.isfinite(cv):
+                s += min(cv, 2.0) / 2.0
+        s += drivers.get(col, 0.0) / max_driver
+        scores[col] = s
+    return sorted(scores, key=lambda c: scores[c], reverse=True)
+
+
+@dataclass
+class PromptBuild:
+    prompt: str
+    tokens: int
+    budget: int
+    columns: List[str] = field(default_factory=list)
+    omitted_columns: List[str] = field(default_factory=list)
+    kpi_block: str = ""
+    anomaly_block: str = ""
+    truncated_blocks: List[str] = field(default_factory=list)
+    overflow: int = 0  # tokens over budget left after truncation (e.g. a template longer than the budget)
+
+
+@traced()
+def build_prompt(template: str, profile: str, semantic_map: dict, kpis: dict, anomalies: dict,
+                 correlations: Optional[List[dict]] = None, segments: Optional[str] = None,
+                 budget: int = PROMPT_TOKEN_BUDGET,
+                 max_anomalies: int = 5, max_correlations: int = 5,
+                 counter: Callable[[str], int] = count_tokens) -> PromptBuild:
+    anomaly_lines = [f"Anomaly count: {anomalies.get('count', 0)}"]
+    for a in anomalies.get("top", [])[:max_anomalies]:
+        drivers = ", ".join(f"{c} z={z:+.1f}" for c, z in a["contributors"])
+        anomaly_lines.append(f"row {a['index']} (score {a['score']:.2f}): {drivers}")
+    anomaly_block = "\n".join(anomaly_lines)
+    corr_block = "\n".join(f"{c['a']} ~ {c['b']}: r={c['r']:+.2f}"
+                           for c in (correlations or [])[:max_correlations]) or "None reported."
+    fixed = {"profile": profile, "anomalies": anomaly_block, "correlations": corr_block,
+             "segments": segments or "No segment breakdown available."}
+
+    mapping = semantic_map.get("mapping", {})
+    kpi_header = "column|mean|median|std|min|max"
+    semantic_lines: List[str] = []
+    kpi_lines: List[str] = []
+
+    def render(omitted: int) -> str:
+        kpi_block = "\n".join([kpi_header] + kpi_lines) if kpi_lines else "No numeric KPIs."
+        semantic_block = "\n".join(semantic_lines)
+        if omitted:
+            semantic_block += f"\n({omitted} lower-ranked columns omitted)"
+        # extra keys are ignored by templates without a {correlations} / {segments} placeholder
+        return template.format(profile=fixed["profile"], semantic=semantic_block, kpis=kpi_block,
+                               anomalies=fixed["anomalies"], correlations=fixed["correlations"],
+                               segments=fixed["segments"])
+
+    ranked = rank_columns(semantic_map, kpis, anomalies)
+    included: List[str] = []
+    used = counter(render(len(ranked)))
+    truncated: List[str] = []
+    for name in sorted(fixed, key=lambda n: counter(fixed[n]), reverse=True):
+        if used <= budget:
+            break
+        fixed[name] = _truncate(fixed[name], counter(fixed[name]) - (used - budget), counter)
+        truncated.append(name)
+        used = counter(render(len(ranked)))
+    for col in ranked:
+        new_lines = []
+        if col in mapping:
+            m = mapping[col]
+            new_lines.append(("semantic", f"{col} -> {m['best_match']} ({m['score']:.2f})"))
+        if col in kpis:
+            v = kpis[col]
+            new_lines.append(("kpi", "|".join([str(col)] + [_fmt(v.get(k)) for k in
+                                                             ("mean", "median", "std", "min", "max")])))
+        cost = sum(counter(line) + 1 for _, line in new_lines)
+        if used + cost > budget:
+            continue
+        for kind, line in new_lines:
+            (semantic_lines if kind == "semantic" else kpi_lines).append(line)
+        included.append(col)
+        used += cost
+
+    kept = set(included)
+    omitted = [c for c in ranked if c not in kept]
+    prompt = render(len(omitted))
+    tokens = counter(prompt)
+    return PromptBuild(prompt=prompt, tokens=tokens, budget=budget, columns=included,
+                       omitted_columns=omitted,
+                       kpi_block="\n".join([kpi_header] + kpi_lines) if kpi_lines else "No numeric KPIs.",
+                       anomaly_block=anomaly_block, truncated_blocks=truncated, overflow=max(0, tokens - budget))
@@ -0,0 +1,120 @@
+# core_tools/report_cache.py
+"""
+Report Cache: content-addressed store for finished pipeline results.
+"""
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from core_tools.telemetry import traced
+from config.settings import REPORT_CACHE_DIR, REPORT_CACHE_MAX_MB, REPORT_CACHE_TTL_S
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(np.int64(len(df)).tobytes())
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@traced()
+def cache_key(df: pd.DataFrame, config: Dict[str, Any]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(dataframe_fingerprint(df).encode("ascii"))
+    h.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ReportCache:
+    def __init__(self, directory: str = REPORT_CACHE_DIR, max_bytes: int = REPORT_CACHE_MAX_MB * 1024 * 1024,
+                 ttl_s: float = REPORT_CACHE_TTL_S):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    @traced()
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            written = os.stat(path).st_mtime
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._discard(path)  # truncated or unreadable entry
+            return None
+        if not isinstance(entry, dict) or time.time() - entry.get("created", written) > self.ttl_s:
+            self._discard(path)
+            return None
+        try:
+            os.utime(path, (time.time(), written))  # last use for eviction; mtime keeps the write time
+        except FileNotFoundError:
+            pass
+        if entry.get("figures") is not None:
+            import plotly.io as pio
+            entry["plots"] = [pio.from_json(fj) for fj in entry.pop("figures")]
+        return entry
+
+    @traced()
+    def put(self, key: str, report: str, stats: dict, semantic_map: dict, plots: list):
+        # per-row anomaly scores are large and only needed while the run is live
+        anomalies = dict(stats.get("anomalies") or {})
+        anomalies.pop("scores", None)
+        stats = {k: v for k, v in stats.items() if k != "plots"}
+        stats["anomalies"] = anomalies
+        entry = {"report": report, "stats": stats, "semantic_map": semantic_map,
+                 "figures": [fig.to_json() for fig in plots], "created": time.time()}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def _discard(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - st.st_mtime > self.ttl_s:
+                    self._discard(path)
+                else:
+                    entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            total = sum(e[1] for e in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._discard(path)
+                total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,212 @@
+# core_tools/scheduler.py
+"""
+Work Scheduler: one per process, shared by every Streamlit session.
+"""
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import collections
+import itertools
+import math
+import threading
+import time
+from core_tools import model_registry, telemetry
+from config.settings import (SCHEDULER_WORKERS, SCHEDULER_MAX_QUEUE, SCHEDULER_MAX_PER_SESSION, SCHEDULER_CPU_SLOTS,
+                             SCHEDULER_EMBEDDING_SLOTS, SCHEDULER_LLM_SLOTS)
+
+# stage name -> slot class; stages not listed are light and run without a slot
+STAGE_CLASSES = {
+    "semantic_map": "embedding",
+    "anomalies": "cpu",
+    "correlation": "cpu",
+    "grouped": "cpu",
+    "append": "cpu",
+    "report": "llm",
+}
+
+
+class SchedulerBusy(Exception):
+    """Raised by submit() when the queue (or the session's share of it) is full."""
+
+
+class Ticket:
+    """Handle on a submitted job: a Future plus its place in the queue."""
+
+    def __init__(self, scheduler: "WorkScheduler", session_id: str, fn: Callable, args, kwargs):
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def position(self) -> int:
+        """Jobs dispatched before this one (0 = next); -1 once it has started."""
+        return self.scheduler.position(self)
+
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the job finishes; None before any job has finished."""
+        return self.scheduler.eta(self)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None):
+        return self.future.result(timeout)
+
+    @property
+    def wait_s(self) -> Optional[float]:
+        return None if self.started_at is None else self.started_at - self.submitted_at
+
+
+class WorkScheduler:
+    def __init__(self, workers: int = SCHEDULER_WORKERS, max_queue: int = SCHEDULER_MAX_QUEUE,
+                 max_per_session: int = SCHEDULER_MAX_PER_SESSION, cpu_slots: int = SCHEDULER_CPU_SLOTS,
+                 embedding_slots: int = SCHEDULER_EMBEDDING_SLOTS, llm_slots: int = SCHEDULER_LLM_SLOTS):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self.slots = {"cpu": threading.BoundedSemaphore(max(1, cpu_slots)),
+                      "embedding": threading.BoundedSemaphore(max(1, embedding_slots)),
+                      "llm": threading.BoundedSemaphore(max(1, llm_slots))}
+        self._queues: "collections.OrderedDict[str, collections.deque]" = collections.OrderedDict()
+        self._cond = threading.Condition()
+        self._running: List[Ticket] = []
+        self._threads: List[threading.Thread] = []
+        self._avg_s: Optional[float] = None
+        self._closed = False
+        self.counters = collections.Counter()
+
+    # -- admission ---------------------------------------------------------------------
+
+    def submit(self, session_id: str, fn: Callable, *args, **kwargs) -> Ticket:
+        """Queue fn(*args, **kwargs) for `session_id`; raises SchedulerBusy when full."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down.")
+            waiting = sum(len(q) for q in self._queues.values())
+            if waiting >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise SchedulerBusy(f"{waiting} analyses are already waiting; please retry shortly.")
+            mine = len(self._queues.get(session_id, ())) + sum(t.session_id == session_id for t in self._running)
+            if mine >= self.max_per_session:
+                self.counters["rejected"] += 1
+                raise SchedulerBusy(f"This session already has {mine} analyses queued or running.")
+            ticket = Ticket(self, session_id, fn, args, kwargs)
+            self._queues.setdefault(session_id, collections.deque()).append(ticket)
+            self.counters["submitted"] += 1
+            self._start_workers()
+            self._cond.notify()
+            return ticket
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"scheduler-{len(self._threads)}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    # -- dispatch ----------------------------------------------------------------------
+
+    def _order(self) -> List[Ticket]:
+        """Waiting tickets in dispatch order: round-robin over sessions, oldest session first."""
+        queues = [list(q) for q in self._queues.values()]
+        return [t for batch in itertools.zip_longest(*queues) for t in batch if t is not None]
+
+    def _next(self) -> Ticket:
+        session_id, queue = next(iter(self._queues.items()))
+        ticket = queue.popleft()
+        # the session goes to the back of the rotation (and leaves it when it has nothing waiting)
+        del self._queues[session_id]
+        if queue:
+            self._queues[session_id] = queue
+        return ticket
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queues and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queues:
+                    return
+                ticket = self._next()
+                ticket.started_at = time.perf_counter()
+                self._running.append(ticket)
+            if ticket.future.set_running_or_notify_cancel():
+                with telemetry.span("scheduler.job", session=ticket.session_id,
+                                    **{"scheduler.wait_s": round(ticket.wait_s, 4)}):
+                    try:
+                        ticket.future.set_result(ticket.fn(*ticket.args, **ticket.kwargs))
+                    except BaseException as e:
+                        ticket.future.set_exception(e)
+            ticket.finished_at = time.perf_counter()
+            with self._cond:
+                self._running.remove(ticket)
+                took = ticket.finished_at - ticket.started_at
+                # moving average of job durations for the ETA
+                self._avg_s = took if self._avg_s is None else 0.8 * self._avg_s + 0.2 * took
+                self.counters["completed"] += 1
+
+    # -- visibility --------------------------------------------------------------------
+
+    def position(self, ticket: Ticket) -> int:
+        with self._cond:
+            if ticket.started_at is not None:
+                return -1
+            order = self._order()
+            return order.index(ticket) if ticket in order else -1
+
+    def eta(self, ticket: Ticket) -> Optional[float]:
+        with self._cond:
+            avg = self._avg_s
+            if avg is None or ticket.finished_at is not None:
+                return None if ticket.finished_at is None else 0.0
+            now = time.perf_counter()
+            if ticket.started_at is not None:
+                return max(0.0, avg - (now - ticket.started_at))
+            # running jobs free their workers in turn; this job starts in the wave its position falls in
+            order = self._order()
+            ahead = order.index(ticket) if ticket in order else 0
+            frees = sorted(max(0.0, avg - (now - t.started_at)) for t in self._running)
+            frees += [0.0] * (self.workers - len(frees))
+            start = frees[ahead % self.workers] + math.floor(ahead / self.workers) * avg
+            return start + avg
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {"waiting": sum(len(q) for q in self._queues.values()), "running": len(self._running),
+                    "sessions_waiting": len(self._queues), "avg_job_s": self._avg_s, **self.counters}
+
+    # -- stage slots -------------------------------------------------------------------
+
+    @contextmanager
+    def stage_slot(self, stage: str):
+        """Hold the slot for `stage`'s class (see STAGE_CLASSES) while the stage runs."""
+        kind = STAGE_CLASSES.get(stage)
+        if kind is None:
+            yield
+            return
+        slot = self.slots[kind]
+        t0 = time.perf_counter()
+        slot.acquire()
+        try:
+            waited = time.perf_counter() - t0
+            if waited > 0.001:
+                self.counters[f"{kind}_slot_waits"] += 1
+            yield
+        finally:
+            slot.release()
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+
+def get_scheduler() -> WorkScheduler:
+    """The process-wide scheduler (built on first use)."""
+    return model_registry.get_or_create(("work_scheduler",), WorkScheduler)
@@ -0,0 +1,171 @@
+# core_tools/schema_engine.py
+"""
+Schema Engine: one sampled pass that classifies every column, shared by all stages.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+from core_tools.telemetry import traced
+from config.settings import SCHEMA_SAMPLE_ROWS, SCHEMA_CATEGORICAL_MAX_UNIQUE
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    guess_datetime_format = None
+
+NUMERIC = "numeric"
+BOOLEAN = "boolean"
+DATETIME = "datetime"
+CATEGORICAL = "categorical"
+IDENTIFIER = "identifier"
+TEXT = "text"
+
+# tried after pandas' own guess; all contain a day-of-month or a clock component
+_DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d",
+    "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d-%b-%Y", "%d %b %Y", "%b %d %Y",
+    "%Y%m%d", "%H:%M:%S", "%H:%M",
+]
+# coarser formats only trusted for columns named like dates/times ("2024-03", "0605")
+_HINTED_FORMATS = ["%Y-%m", "%Y/%m", "%m/%Y", "%Y%m", "%H%M"]
+_PROBE_SIZE = 20
+_DATE_PARSE_THRESHOLD = 0.5
+_TEXT_MIN_AVG_LEN = 30
+
+
+@dataclass
+class ColumnSchema:
+    name: str
+    kind: str
+    dtype: str
+    date_format: Optional[str] = None
+    sample_unique: int = 0
+    null_fraction: float = 0.0
+
+
+@dataclass
+class DatasetSchema:
+    n_rows: int
+    columns: Dict[str, ColumnSchema] = field(default_factory=dict)
+
+    def of_kind(self, *kinds: str) -> List[str]:
+        return [c for c, cs in self.columns.items() if cs.kind in kinds]
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return self.of_kind(NUMERIC)
+
+    @property
+    def datetime_columns(self) -> List[str]:
+        return self.of_kind(DATETIME)
+
+    @property
+    def categorical_columns(self) -> List[str]:
+        return self.of_kind(CATEGORICAL, IDENTIFIER)
+
+    def date_format(self, column: str) -> Optional[str]:
+        cs = self.columns.get(column)
+        return cs.date_format if cs else None
+
+
+def name_hints_datetime(name) -> bool:
+    low = str(name).lower()
+    return "date" in low or "time" in low
+
+
+def _format_is_specific(fmt: str) -> bool:
+    # reject formats such as "%Y" that would turn any 4-digit code into a date
+    return ("%d" in fmt and any(m in fmt for m in ("%m", "%b", "%B"))) or "%H" in fmt
+
+
+def detect_datetime_format(values: pd.Series, threshold: float = _DATE_PARSE_THRESHOLD,
+                           hinted: bool = False) -> Optional[str]:
+    """Return a strptime format that parses more than `threshold` of the (string) values.
+
+    hinted (the column is named like a date/time): the coarser _HINTED_FORMATS are tried
+    too, and the format parsing the most values wins instead of the first that passes.
+    """
+    if values.empty:
+        return None
+    probe = values.head(_PROBE_SIZE)
+    lengths = probe.str.len()
+    if probe.str.contains(r"\d", regex=True).mean() <= threshold or ((lengths < 4) | (lengths > 40)).mean() > threshold:
+        return None
+
+    candidates = []
+    if guess_datetime_format is not None:
+        guessed = guess_datetime_format(probe.iloc[0])
+        if guessed:
+            candidates.append(guessed)
+    candidates += [f for f in _DATE_FORMATS if f not in candidates]
+    if hinted:
+        candidates += [f for f in _HINTED_FORMATS if f not in candidates]
+
+    best, best_rate = None, threshold
+    for fmt in candidates:
+        if not (_format_is_specific(fmt) or (hinted and fmt in _HINTED_FORMATS)):
+            continue
+        if pd.to_datetime(probe, format=fmt, errors="coerce").notna().mean() <= threshold:
+            continue
+        rate = pd.to_datetime(values, format=fmt, errors="coerce").notna().mean()
+        if rate > best_rate:
+            if not hinted:
+                return fmt
+            best, best_rate = fmt, rate
+    return best
+
+
+def _sample(s: pd.Series, sample_size: int, rng: np.random.Generator) -> pd.Series:
+    n = len(s)
+    if n > sample_size:
+        s = s.iloc[np.sort(rng.choice(n, size=sample_size, replace=False))]
+    return s
+
+
+def infer_column(name, s: pd.Series, sample_size: int = SCHEMA_SAMPLE_ROWS,
+                 max_categories: int = SCHEMA_CATEGORICAL_MAX_UNIQUE,
+                 rng: Optional[np.random.Generator] = None) -> ColumnSchema:
+    rng = rng or np.random.default_rng(0)
+    dtype = str(s.dtype)
+    if is_bool_dtype(s.dtype):
+        return ColumnSchema(name, BOOLEAN, dtype)
+    if is_numeric_dtype(s.dtype):
+        return ColumnSchema(name, NUMERIC, dtype)
+    if is_datetime64_any_dtype(s.dtype):
+        return ColumnSchema(name, DATETIME, dtype)
+
+    sample = _sample(s, sample_size, rng)
+    null_fraction = float(sample.isna().mean()) if len(sample) else 0.0
+    values = sample.dropna()
+    if values.empty and len(s) > len(sample):
+        values = s.dropna().head(sample_size)
+    values = values.astype(str)
+    n_unique = int(values.nunique())
+
+    # pandas categoricals (e.g. from memory-budget compaction) are classified by their values
+    # like any other column, so compaction does not change a column's kind
+    fmt = detect_datetime_format(values, hinted=name_hints_datetime(name))
+    if fmt is not None:
+        return ColumnSchema(name, DATETIME, dtype, date_format=fmt, sample_unique=n_unique,
+                            null_fraction=null_fraction)
+
+    if n_unique <= max_categories or n_unique <= 0.05 * len(values):
+        kind = CATEGORICAL
+    elif values.str.len().mean() >= _TEXT_MIN_AVG_LEN:
+        kind = TEXT
+    else:
+        kind = IDENTIFIER
+    return ColumnSchema(name, kind, dtype, sample_unique=n_unique, null_fraction=null_fraction)
+
+
+@traced()
+def infer_schema(df: pd.DataFrame, sample_size: int = SCHEMA_SAMPLE_ROWS,
+                 max_categories: int = SCHEMA_CATEGORICAL_MAX_UNIQUE, seed: int = 0) -> DatasetSchema:
+    rng = np.random.default_rng(seed)
+    schema = DatasetSchema(n_rows=len(df))
+    for c in df.columns:
+        schema.columns[c] = infer_column(c, df[c], sample_size, max_categories, rng)
+    return schema
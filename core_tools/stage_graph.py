@@ -0,0 +1,213 @@
+# core_tools/stage_graph.py
+"""
+Stage Graph: a small dependency-graph executor for pipeline stages.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+import threading
+import time
+from core_tools import telemetry
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    args: Tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    deps: Tuple[str, ...] = ()
+    process: bool = False  # run in the process pool (fn and arguments must be picklable)
+
+
+class SharedProcessPool:
+    """A ProcessPoolExecutor started on first use and reused by every graph given it."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def discard(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool so the next get() starts a fresh one."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+class StageGraph:
+    def __init__(self, max_workers: int = 4, process_workers: int = 0, track_memory: bool = False,
+                 profile_dir: Optional[str] = None, limiter: Optional[Callable[[str], Any]] = None,
+                 process_pool: Optional[SharedProcessPool] = None):
+        self.max_workers = max(1, max_workers)
+        self.process_workers = process_workers
+        self.process_pool = process_pool
+        self.track_memory = track_memory
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+        self.memory: Dict[str, Dict[str, float]] = {}
+        self.waits: Dict[str, float] = {}
+        self.limiter = limiter
+        self.profile_dir = profile_dir
+        self._sampler = None
+        self._profiler = None
+        self._parent = None
+        self.wall_time: Optional[float] = None
+
+    def add(self, name: str, fn: Callable, *args, deps: Tuple[str, ...] = (), process: bool = False, **kwargs):
+        """Register fn(*args, **kwargs, **{dep_name: dep_result}) to run once `deps` are done."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered.")
+        self.stages[name] = Stage(name, fn, args, kwargs, tuple(deps), process)
+        return self
+
+    def _check(self):
+        for st in self.stages.values():
+            for d in st.deps:
+                if d not in self.stages:
+                    raise ValueError(f"Stage '{st.name}' depends on unknown stage '{d}'.")
+        # Kahn's algorithm to reject cycles before anything is submitted
+        indeg = {n: len(st.deps) for n, st in self.stages.items()}
+        ready = [n for n, k in indeg.items() if k == 0]
+        seen = 0
+        while ready:
+            n = ready.pop()
+            seen += 1
+            for other in self.stages.values():
+                if n in other.deps:
+                    indeg[other.name] -= 1
+                    if indeg[other.name] == 0:
+                        ready.append(other.name)
+        if seen != len(self.stages):
+            raise ValueError("Stage graph contains a dependency cycle.")
+
+    def _timed_call(self, st: Stage, dep_results: Dict[str, Any]):
+        with telemetry.span(f"stage.{st.name}", parent=self._parent, **{"stage.deps": list(st.deps)}) as sp, \
+                self._slot(st.name, sp):
+            if self._sampler is not None:
+                self._sampler.begin(st.name)
+            if self._profiler is not None:
+                self._profiler.begin(st.name)
+            t0 = time.perf_counter()
+            try:
+                return st.fn(*st.args, **st.kwargs, **dep_results)
+            finally:
+                self.timings[st.name] = time.perf_counter() - t0
+                if self._profiler is not None:
+                    self._profiler.end(st.name)
+                if self._sampler is not None:
+                    self.memory[st.name] = mem = self._sampler.end(st.name)
+                    sp.set_attributes({"memory.peak_mb": mem["peak_mb"], "memory.delta_mb": mem["delta_mb"]})
+
+    def _process_call(self, procs: ProcessPoolExecutor, st: Stage, dep_results: Dict[str, Any]):
+        # the child process is not traced; the span and timing cover submit to result, pickling included
+        with telemetry.span(f"stage.{st.name}", parent=self._parent,
+                            **{"stage.deps": list(st.deps), "stage.process": True}) as sp, self._slot(st.name, sp):
+            t0 = time.perf_counter()
+            try:
+                return procs.submit(st.fn, *st.args, **st.kwargs, **dep_results).result()
+            except BrokenProcessPool:
+                if self.process_pool is not None:
+                    self.process_pool.discard(procs)
+                raise
+            finally:
+                self.timings[st.name] = time.perf_counter() - t0
+
+    @contextmanager
+    def _slot(self, name: str, sp):
+        if self.limiter is None:
+            yield
+            return
+        t0 = time.perf_counter()
+        with self.limiter(name):
+            self.waits[name] = time.perf_counter() - t0
+            sp.set_attribute("stage.slot_wait_s", round(self.waits[name], 4))
+            yield
+
+    def run(self, on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """Execute all stages and return {stage_name: result}.
+
+        `on_result(name, result)` is called in the calling thread as each stage finishes,
+        for callers that show results progressively.
+
+        The first stage exception is re-raised once in-flight stages have finished;
+        stages depending on a failed stage are never started.
+        """
+        self._check()
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+        t_start = time.perf_counter()
+        self._parent = telemetry.capture()
+        if self.track_memory:
+            from core_tools.memory_budget import MemorySampler
+            self._sampler = MemorySampler().start()
+        if self.profile_dir:
+            self._profiler = telemetry.StageProfiler().start()
+
+        threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        procs = None
+        if self.process_pool is not None:
+            procs = self.process_pool.get()
+        elif self.process_workers > 0:
+            procs = ProcessPoolExecutor(max_workers=self.process_workers)
+        error: Optional[BaseException] = None
+        try:
+            while pending or running:
+                if error is None:
+                    for name in [n for n, st in pending.items() if all(d in results for d in st.deps)]:
+                        st = pending.pop(name)
+                        deps = {d: results[d] for d in st.deps}
+                        if st.process and procs is not None:
+                            # a thread holds the stage's slot while the process pool runs it
+                            fut = threads.submit(self._process_call, procs, st, deps)
+                        else:
+                            fut = threads.submit(self._timed_call, st, deps)
+                        running[fut] = st
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    st = running.pop(fut)
+                    try:
+                        results[st.name] = fut.result()
+                    except BaseException as e:
+                        if error is None:
+                            error = e
+                        continue
+                    if on_result is not None and error is None:
+                        on_result(st.name, results[st.name])
+        finally:
+            threads.shutdown(wait=True)
+            if procs is not None and self.process_pool is None:
+                procs.shutdown(wait=True)
+            self.wall_time = time.perf_counter() - t_start
+            self.timings["total"] = self.wall_time
+            if self._sampler is not None:
+                self._sampler.stop()
+                self.memory["total"] = {"peak_mb": round(self._sampler.peak / 1024 / 1024, 1)}
+                self._sampler = None
+            if self._profiler is not None:
+                self._profiler.stop()
+                self._profiler.dump(self.profile_dir)
+                self._profiler = None
+
+        if error is not None:
+            raise error
+        return results
@@ -3,64 +3,66 @@
 Statistical helpers: KPIs, anomaly detection, simple clustering utilities.
 """
 
+from typing import Optional
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
+from core_tools.schema_engine import DatasetSchema, infer_schema, name_hints_datetime
+from core_tools.telemetry import traced
 
-def summarize_numeric(df: pd.DataFrame) -> pd.DataFrame:
-    numeric = df.select_dtypes(include=[np.number])
-    if numeric.empty:
+def _schema(df: pd.DataFrame, schema: Optional[DatasetSchema]) -> DatasetSchema:
+    return schema if schema is not None else infer_schema(df)
+
+@traced()
+def summarize_numeric(df: pd.DataFrame, schema: Optional[DatasetSchema] = None) -> pd.DataFrame:
+    cols = _schema(df, schema).numeric_columns
+    if not cols or df.empty:
         return pd.DataFrame()
-    summary = numeric.describe().T
-    summary["missing"] = numeric.isna().sum()
-    summary["skew"] = numeric.skew()
-    return summary
+    # column by column: df[cols] would copy every numeric column at once
+    rows = {}
+    for c in cols:
+        s = df[c]
+        row = s.describe()
+        row["missing"] = s.isna().sum()
+        row["skew"] = s.skew()
+        rows[c] = row
+    return pd.DataFrame(rows).T.astype(float)
+
+def detect_outliers_isolationforest(df: pd.DataFrame, contamination: float = 0.03,
+                                    schema: Optional[DatasetSchema] = None, n_jobs: Optional[int] = None) -> dict:
+    """IsolationForest outliers over the numeric columns.
 
-def detect_outliers_isolationforest(df: pd.DataFrame, contamination: float = 0.03) -> dict:
-    numeric = df.select_dtypes(include=[np.number]).fillna(0)
-    if numeric.shape[1] == 0:
-        return {}
-    iso = IsolationForest(contamination=contamination, random_state=42)
-    preds = iso.fit_predict(numeric)
-    outlier_idxs = np.where(preds == -1)[0].tolist()
-    return {"indices": outlier_idxs, "count": len(outlier_idxs)}
+    Returns positional "indices" and "count" as before, plus per-row "scores" and the
+    "top" rows with their most unusual columns (see anomaly_engine.AnomalyEngine).
+    n_jobs overrides ANOMALY_N_JOBS.
+    """
+    from core_tools.anomaly_engine import detect_anomalies
+    engine_kwargs = {"n_jobs": n_jobs} if n_jobs is not None else {}
+    return detect_anomalies(df, _schema(df, schema).numeric_columns, contamination=contamination, **engine_kwargs)
 
-def top_categorical_frequencies(df: pd.DataFrame, top_n: int = 3) -> dict:
-    cats = df.select_dtypes(include=["object", "category"])
+@traced()
+def top_categorical_frequencies(df: pd.DataFrame, top_n: int = 3, schema: Optional[DatasetSchema] = None) -> dict:
+    # categorical and identifier columns; dates and free text carry no useful top-N
     result = {}
-    for c in cats.columns:
-        vc = cats[c].value_counts().head(top_n)
+    for c in _schema(df, schema).categorical_columns:
+        vc = df[c].value_counts().head(top_n)
         result[c] = vc.to_dict()
     return result
 
-def detect_date_columns(df: pd.DataFrame) -> list:
-    date_cols = []
-    for c in df.columns:
-        low = c.lower()
-        if "date" in low or "time" in low:
-            date_cols.append(c)
-    # Also try parsing columns that look like dates
-    for c in df.columns:
-        if c in date_cols:
-            continue
-        try:
-            parsed = pd.to_datetime(df[c], errors='coerce')
-            if parsed.notna().sum() > len(df) * 0.5:
-                date_cols.append(c)
-        except Exception:
-            pass
-    return date_cols
+def detect_date_columns(df: pd.DataFrame, schema: Optional[DatasetSchema] = None) -> list:
+    # only columns the schema found to hold dates; those named like dates/times first
+    return sorted(_schema(df, schema).datetime_columns, key=lambda c: not name_hints_datetime(c))
 
-def compute_basic_kpis(df: pd.DataFrame) -> dict:
-    numeric = df.select_dtypes(include=[np.number])
+@traced()
+def compute_basic_kpis(df: pd.DataFrame, schema: Optional[DatasetSchema] = None) -> dict:
     kpis = {}
-    for c in numeric.columns:
-        series = numeric[c].dropna()
+    for c in _schema(df, schema).numeric_columns:
+        series = df[c]  # reductions skip NaN; dropna() would copy the column
+        has_values = series.count() > 0
         kpis[c] = {
-            "mean": float(series.mean()) if len(series) else None,
-            "median": float(series.median()) if len(series) else None,
-            "std": float(series.std()) if len(series) else None,
-            "min": float(series.min()) if len(series) else None,
-            "max": float(series.max()) if len(series) else None,
+            "mean": float(series.mean()) if has_values else None,
+            "median": float(series.median()) if has_values else None,
+            "std": float(series.std()) if has_values else None,
+            "min": float(series.min()) if has_values else None,
+            "max": float(series.max()) if has_values else None,
         }
     return kpis
@@ -0,0 +1,386 @@
+# core_tools/streaming_profiler.py
+"""
+Streaming profiler: single-pass, chunked column statistics for files larger than RAM.
+"""
+
+from typing import Dict, Iterable, Optional, Union
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, is_string_dtype
+from core_tools.ingestion import iter_batches
+from config.settings import PROFILE_CHUNK_ROWS, PROFILE_SAMPLE_ROWS
+
+
+def _is_numeric(s: pd.Series) -> bool:
+    return is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype)
+
+
+def _is_categorical(s: pd.Series) -> bool:
+    # is_string_dtype also covers Arrow-backed strings from ingestion
+    return s.dtype == object or isinstance(s.dtype, pd.CategoricalDtype) or is_string_dtype(s.dtype)
+
+
+class HyperLogLog:
+    """Distinct-count estimator over pandas-hashed values (mergeable by register max)."""
+
+    def __init__(self, precision: int = 12):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values: pd.Series):
+        if len(values) == 0:
+            return
+        h = pd.util.hash_array(np.asarray(values, dtype=object) if values.dtype == object
+                               else values.to_numpy()).astype(np.uint64)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest_bits = 64 - self.p
+        w = h & np.uint64((1 << rest_bits) - 1)
+        # rank = position of the leftmost 1-bit in the remaining bits (1-based)
+        with np.errstate(divide="ignore"):
+            lz = rest_bits - 1 - np.floor(np.log2(w.astype(np.float64)))
+        rank = np.where(w == 0, rest_bits + 1, lz + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(est))
+
+
+class QuantileSketch:
+    """Bottom-k sample: every value gets a random key and the k smallest keys are kept.
+
+    The kept values are a uniform sample of everything seen, and two sketches merge by
+    taking the k smallest keys of their union.
+    """
+
+    def __init__(self, size: int = 4096, rng: Optional[np.random.Generator] = None):
+        self.size = size
+        self.rng = rng or np.random.default_rng(42)
+        self.keys = np.empty(0, dtype=np.float64)
+        self.values = np.empty(0, dtype=np.float64)
+
+    def _keep_smallest(self, keys: np.ndarray, values: np.ndarray):
+        if len(keys) > self.size:
+            sel = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, values = keys[sel], values[sel]
+        self.keys, self.values = keys, values
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        keys = self.rng.random(len(values))
+        self._keep_smallest(np.concatenate([self.keys, keys]),
+                            np.concatenate([self.values, values.astype(np.float64, copy=False)]))
+
+    def merge(self, other: "QuantileSketch"):
+        self._keep_smallest(np.concatenate([self.keys, other.keys]),
+                            np.concatenate([self.values, other.values]))
+
+    def quantile(self, q):
+        if len(self.values) == 0:
+            return None
+        return np.quantile(self.values, q)
+
+
+class RowSample:
+    """Bottom-k sample of DataFrame rows, kept in file order."""
+
+    def __init__(self, size: int = PROFILE_SAMPLE_ROWS, rng: Optional[np.random.Generator] = None):
+        self.size = size
+        self.rng = rng or np.random.default_rng(42)
+        self.seen = 0
+        self.keys = np.empty(0, dtype=np.float64)
+        self.frame: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame):
+        keys = self.rng.random(len(chunk))
+        chunk = chunk.set_axis(pd.RangeIndex(self.seen, self.seen + len(chunk)))
+        self.seen += len(chunk)
+        if len(self.keys) >= self.size:
+            # only rows that beat the current k-th key can enter; skips the concat for most chunks
+            keep = keys < self.keys.max()
+            chunk, keys = chunk[keep], keys[keep]
+            if not len(keys):
+                return
+        frame = chunk if self.frame is None else pd.concat([self.frame, chunk])
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            sel = np.sort(np.argpartition(keys, self.size - 1)[:self.size])
+            frame, keys = frame.iloc[sel], keys[sel]
+        self.frame, self.keys = frame, keys
+
+    def result(self) -> pd.DataFrame:
+        if self.frame is None:
+            return pd.DataFrame()
+        return self.frame.reset_index(drop=True)
+
+
+class HeavyHitters:
+    """Misra-Gries summary: counts are exact while the column has <= capacity distinct
+    values, otherwise lower bounds with error at most `error` (= n / (capacity + 1))."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counts: Dict = {}
+        self.error = 0
+
+    def _add_counts(self, counts: Dict):
+        for k, v in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + int(v)
+        if len(self.counts) > self.capacity:
+            ordered = sorted(self.counts.values(), reverse=True)
+            cut = ordered[self.capacity]
+            self.counts = {k: v - cut for k, v in self.counts.items() if v > cut}
+            self.error += cut
+
+    def update(self, values: pd.Series):
+        self._add_counts(values.value_counts(dropna=True).to_dict())
+
+    def merge(self, other: "HeavyHitters"):
+        self.error += other.error
+        self._add_counts(other.counts)
+
+    def top(self, n: int) -> Dict:
+        return dict(sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n])
+
+
+class NumericColumnState:
+    def __init__(self, sketch_size: int, hll_precision: int, rng: np.random.Generator):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(sketch_size, rng)
+        self.hll = HyperLogLog(hll_precision)
+
+    def _merge_moments(self, n_b: int, mean_b: float, m2_b: float, m3_b: float):
+        n_a = self.count
+        if n_b == 0:
+            return
+        if n_a == 0:
+            self.count, self.mean, self.m2, self.m3 = n_b, mean_b, m2_b, m3_b
+            return
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.m3 = (self.m3 + m3_b
+                   + delta ** 3 * n_a * n_b * (n_a - n_b) / (n * n)
+                   + 3.0 * delta * (n_a * m2_b - n_b * self.m2) / n)
+        self.m2 = self.m2 + m2_b + delta * delta * n_a * n_b / n
+        self.mean = self.mean + delta * n_b / n
+        self.count = n
+
+    def update(self, s: pd.Series):
+        if not _is_numeric(s):
+            s = pd.to_numeric(s, errors="coerce")
+        x = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = x[~np.isnan(x)]
+        self.missing += len(x) - len(valid)
+        if len(valid) == 0:
+            return
+        mean_b = float(valid.mean())
+        d = valid - mean_b
+        self._merge_moments(len(valid), mean_b, float(np.dot(d, d)), float(np.sum(d * d * d)))
+        self.min = min(self.min, float(valid.min()))
+        self.max = max(self.max, float(valid.max()))
+        self.sketch.update(valid)
+        self.hll.update(pd.Series(valid))
+
+    def merge(self, other: "NumericColumnState"):
+        self.missing += other.missing
+        self._merge_moments(other.count, other.mean, other.m2, other.m3)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        self.hll.merge(other.hll)
+
+    @property
+    def std(self) -> Optional[float]:
+        if self.count < 2:
+            return None if self.count == 0 else float("nan")
+        return float(np.sqrt(self.m2 / (self.count - 1)))
+
+    @property
+    def skew(self) -> float:
+        # adjusted Fisher-Pearson coefficient, same as pandas.Series.skew
+        n = self.count
+        if n < 3 or self.m2 == 0:
+            return float("nan") if n < 3 else 0.0
+        g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+        return float(np.sqrt(n * (n - 1)) / (n - 2) * g1)
+
+
+class CategoricalColumnState:
+    def __init__(self, heavy_hitters: int, hll_precision: int):
+        self.count = 0
+        self.missing = 0
+        self.hitters = HeavyHitters(heavy_hitters)
+        self.hll = HyperLogLog(hll_precision)
+
+    def update(self, s: pd.Series):
+        valid = s.dropna()
+        self.missing += len(s) - len(valid)
+        self.count += len(valid)
+        self.hitters.update(valid)
+        self.hll.update(valid.astype(str))
+
+    def merge(self, other: "CategoricalColumnState"):
+        self.count += other.count
+        self.missing += other.missing
+        self.hitters.merge(other.hitters)
+        self.hll.merge(other.hll)
+
+
+class StreamingProfiler:
+    """Accumulates per-column state over DataFrame chunks in a single pass.
+
+    A column's kind is fixed by the first chunk in which it has a value; later chunks
+    are coerced to that kind so a stray string in a numeric column counts as missing.
+    Until then (e.g. a sparse text column whose first chunk is empty and so reads as
+    float64) the column only counts missing values and is re-typed by the first chunk
+    with values.
+    """
+
+    def __init__(self, sketch_size: int = 4096, heavy_hitters: int = 256,
+                 hll_precision: int = 12, seed: int = 42):
+        self.sketch_size = sketch_size
+        self.heavy_hitters = heavy_hitters
+        self.hll_precision = hll_precision
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.columns: list = []
+        self.numeric: Dict[str, NumericColumnState] = {}
+        self.categorical: Dict[str, CategoricalColumnState] = {}
+
+    def _new_state(self, s: pd.Series):
+        if _is_numeric(s):
+            return NumericColumnState(self.sketch_size, self.hll_precision, self.rng)
+        if _is_categorical(s):
+            return CategoricalColumnState(self.heavy_hitters, self.hll_precision)
+        return None
+
+    def _set_state(self, c, state, missing: int = 0):
+        self.numeric.pop(c, None)
+        self.categorical.pop(c, None)
+        state.missing += missing
+        (self.numeric if isinstance(state, NumericColumnState) else self.categorical)[c] = state
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for c in chunk.columns:
+            s = chunk[c]
+            current = self.numeric.get(c) or self.categorical.get(c)
+            if current is None or (current.count == 0 and s.notna().any()):
+                if c not in self.columns:
+                    self.columns.append(c)
+                state = self._new_state(s)
+                if state is not None and (current is None or type(state) is not type(current)):
+                    self._set_state(c, state, current.missing if current is not None else 0)
+            if c in self.numeric:
+                self.numeric[c].update(s)
+            elif c in self.categorical:
+                self.categorical[c].update(s)
+
+    def merge(self, other: "StreamingProfiler"):
+        self.rows += other.rows
+        for c in other.columns:
+            if c not in self.columns:
+                self.columns.append(c)
+        for c, st in [*other.numeric.items(), *other.categorical.items()]:
+            mine = self.numeric.get(c) or self.categorical.get(c)
+            if mine is None:
+                self._set_state(c, st)
+            elif type(mine) is type(st):
+                mine.merge(st)
+            elif mine.count == 0:
+                self._set_state(c, st, mine.missing)
+            else:
+                # kinds disagree: keep ours and count the other side's values as missing
+                mine.missing += st.missing + st.count
+
+    def result(self, top_n: int = 3) -> dict:
+        kpis = {}
+        rows = {}
+        for c in self.columns:
+            st = self.numeric.get(c)
+            if st is None:
+                continue
+            has = st.count > 0
+            q = st.sketch.quantile([0.25, 0.5, 0.75]) if has else [np.nan] * 3
+            kpis[c] = {
+                "mean": float(st.mean) if has else None,
+                "median": float(q[1]) if has else None,
+                "std": st.std,
+                "min": st.min if has else None,
+                "max": st.max if has else None,
+            }
+            rows[c] = {
+                "count": float(st.count),
+                "mean": st.mean if has else np.nan,
+                "std": st.std if has else np.nan,
+                "min": st.min if has else np.nan,
+                "25%": float(q[0]),
+                "50%": float(q[1]),
+                "75%": float(q[2]),
+                "max": st.max if has else np.nan,
+                "missing": st.missing,
+                "skew": st.skew,
+            }
+        numeric_summary = pd.DataFrame.from_dict(rows, orient="index") if rows else pd.DataFrame()
+
+        cat_freq = {c: self.categorical[c].hitters.top(top_n)
+                    for c in self.columns if c in self.categorical}
+        distinct = {c: (self.numeric.get(c) or self.categorical.get(c)).hll.estimate()
+                    for c in self.columns if c in self.numeric or c in self.categorical}
+
+        return {
+            "rows": self.rows,
+            "profile_text": f"Rows: {self.rows}, Columns: {len(self.columns)}",
+            "numeric_summary": numeric_summary,
+            "kpis": kpis,
+            "categorical_freq": cat_freq,
+            "distinct_counts": distinct,
+        }
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], top_n: int = 3, **profiler_kwargs) -> dict:
+    """Profile an iterable of DataFrame chunks in one pass."""
+    profiler = StreamingProfiler(**profiler_kwargs)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.result(top_n=top_n)
+
+
+def profile_csv(source: Union[str, object], chunksize: int = PROFILE_CHUNK_ROWS,
+                top_n: int = 3, **read_csv_kwargs) -> dict:
+    """Profile a CSV path or file-like object without loading it fully into memory."""
+    reader = pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs)
+    with reader:
+        return profile_chunks(reader, top_n=top_n)
+
+
+def profile_file(source, name: Optional[str] = None, chunksize: int = PROFILE_CHUNK_ROWS,
+                 sample_rows: int = PROFILE_SAMPLE_ROWS, top_n: int = 3) -> dict:
+    """Profile a CSV / Parquet / Arrow path or upload in one pass, reading it chunk by chunk.
+
+    The result is profile_chunks' plus "sample": up to `sample_rows` rows drawn uniformly.
+    """
+    profiler = StreamingProfiler()
+    sample = RowSample(sample_rows)
+    for chunk in iter_batches(source, name, batch_rows=chunksize):
+        profiler.update(chunk)
+        sample.update(chunk)
+    result = profiler.result(top_n=top_n)
+    result["sample"] = sample.result()
+    return result
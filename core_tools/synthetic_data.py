@@ -0,0 +1,179 @@
+# core_tools/synthetic_data.py
+"""
+Synthetic airline tables for benchmarks and tests.
+"""
+
+from typing import Iterator
+import os
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 65536
+START_DATE = np.datetime64("2023-01-01")
+
+# code, latitude, longitude, relative traffic weight
+AIRPORTS = [
+    ("ATL", 33.64, -84.43, 10), ("DFW", 32.90, -97.04, 8), ("DEN", 39.86, -104.67, 8), ("ORD", 41.98, -87.90, 9),
+    ("LAX", 33.94, -118.41, 8), ("JFK", 40.64, -73.78, 7), ("LAS", 36.08, -115.15, 5), ("MCO", 28.43, -81.31, 5),
+    ("MIA", 25.80, -80.29, 5), ("CLT", 35.21, -80.94, 6), ("SEA", 47.45, -122.31, 5), ("PHX", 33.43, -112.01, 5),
+    ("EWR", 40.69, -74.17, 5), ("SFO", 37.62, -122.38, 6), ("IAH", 29.98, -95.34, 5), ("BOS", 42.37, -71.01, 4),
+    ("FLL", 26.07, -80.15, 3), ("MSP", 44.88, -93.22, 4), ("LGA", 40.78, -73.87, 4), ("DTW", 42.21, -83.35, 4),
+    ("PHL", 39.87, -75.24, 3), ("SLC", 40.79, -111.98, 3), ("DCA", 38.85, -77.04, 3), ("SAN", 32.73, -117.19, 3),
+    ("BWI", 39.18, -76.67, 3), ("TPA", 27.98, -82.53, 3), ("AUS", 30.19, -97.67, 2), ("BNA", 36.12, -86.68, 2),
+    ("HNL", 21.32, -157.92, 2), ("PDX", 45.59, -122.60, 2),
+]
+CARRIERS = ["AA", "DL", "UA", "WN", "B6", "AS", "NK", "F9"]
+CARRIER_WEIGHTS = np.array([18, 18, 16, 20, 6, 6, 8, 8], dtype=float)
+FLEET_SEATS = np.array([76, 128, 150, 160, 180, 190, 220, 280, 340])
+
+CORE_COLUMNS = [
+    "FLIGHT_DATE", "CARRIER", "FLIGHT_NO", "ORIGIN", "DEST", "ROUTE", "SCHED_DEP", "DEP_DELAY", "ARR_DELAY",
+    "CANCELLED", "DIVERTED", "DISTANCE", "SEATS", "PAX", "LOAD_FACTOR", "FARE", "REVENUE",
+]
+
+
+def _distances() -> np.ndarray:
+    lat = np.radians([a[1] for a in AIRPORTS])
+    lon = np.radians([a[2] for a in AIRPORTS])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 3958.8 * 2 * np.arcsin(np.sqrt(h))  # statute miles
+
+
+_DIST = _distances()
+_CODES = np.array([a[0] for a in AIRPORTS])
+_AIRPORT_P = np.array([a[3] for a in AIRPORTS], dtype=float) / sum(a[3] for a in AIRPORTS)
+
+
+def _block(seed: int, block: int, n: int, first_row: int, total_rows: int, days: int, columns: int,
+           anomaly_rate: float, label: bool) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, block])
+    rows = np.arange(first_row, first_row + n)
+
+    # dates advance with the row index so files are roughly time ordered
+    day = (rows * days // max(total_rows, 1)).astype("timedelta64[D]")
+    carrier = rng.choice(len(CARRIERS), n, p=CARRIER_WEIGHTS / CARRIER_WEIGHTS.sum())
+    origin = rng.choice(len(AIRPORTS), n, p=_AIRPORT_P)
+    dest = (origin + rng.integers(1, len(AIRPORTS), n)) % len(AIRPORTS)
+    distance = np.round(_DIST[origin, dest])
+    sched_minutes = np.clip(rng.normal(13 * 60, 4 * 60, n), 5 * 60, 23 * 60 + 59).astype(int)
+
+    # heavy-tailed delays: most flights a few minutes either way, a Pareto tail of long delays
+    dep_delay = rng.lognormal(1.5, 1.0, n) - 6.0
+    tail = rng.random(n) < 0.08
+    dep_delay[tail] += 15 * (rng.pareto(1.8, tail.sum()) + 1)
+    arr_delay = dep_delay + rng.normal(-4, 9, n) + distance / 1000
+    cancelled = rng.random(n) < np.where(dep_delay > 120, 0.06, 0.015)
+    diverted = ~cancelled & (rng.random(n) < 0.002)
+
+    seats = FLEET_SEATS[np.clip((distance / 400).astype(int) + rng.integers(0, 3, n), 0, len(FLEET_SEATS) - 1)]
+    load = np.clip(rng.beta(8, 2, n), 0.2, 1.0)
+    pax = np.round(seats * load).astype(np.int64)
+    fare = np.round(60 + distance * rng.uniform(0.09, 0.16, n) * rng.lognormal(0, 0.25, n), 2)
+
+    anomaly = rng.random(n) < anomaly_rate
+    k = int(anomaly.sum())
+    if k:
+        kind = rng.integers(0, 3, k)
+        idx = np.flatnonzero(anomaly)
+        dep_delay[idx[kind == 0]] = rng.uniform(600, 1800, (kind == 0).sum())  # 10-30 hour delays
+        arr_delay[idx[kind == 0]] = dep_delay[idx[kind == 0]] + rng.normal(0, 10, (kind == 0).sum())
+        pax[idx[kind == 1]] = (seats[idx[kind == 1]] * rng.uniform(1.3, 2.0, (kind == 1).sum())).astype(np.int64)
+        fare[idx[kind == 2]] *= rng.uniform(8, 20, (kind == 2).sum())
+    dep_delay[cancelled] = np.nan
+    arr_delay[cancelled | diverted] = np.nan
+    pax[cancelled] = 0
+    load_factor = np.round(pax / seats, 4)
+
+    data = {
+        "FLIGHT_DATE": np.datetime_as_string(START_DATE + day, unit="D"),
+        "CARRIER": np.array(CARRIERS)[carrier],
+        "FLIGHT_NO": (np.array(CARRIERS)[carrier].astype(object)
+                      + (100 + (origin * 37 + dest * 11 + carrier * 5) % 4900).astype(str).astype(object)),
+        "ORIGIN": _CODES[origin],
+        "DEST": _CODES[dest],
+        "ROUTE": np.char.add(np.char.add(_CODES[origin], "-"), _CODES[dest]),
+        "SCHED_DEP": np.char.add(np.char.add(np.char.zfill((sched_minutes // 60).astype(str), 2), ":"),
+                                 np.char.zfill((sched_minutes % 60).astype(str), 2)),
+        "DEP_DELAY": np.round(dep_delay, 1),
+        "ARR_DELAY": np.round(arr_delay, 1),
+        "CANCELLED": cancelled,
+        "DIVERTED": diverted,
+        "DISTANCE": distance,
+        "SEATS": seats,
+        "PAX": pax,
+        "LOAD_FACTOR": load_factor,
+        "FARE": fare,
+        "REVENUE": np.round(fare * pax, 2),
+    }
+    names = CORE_COLUMNS[:columns]
+    df = pd.DataFrame({c: data[c] for c in names})
+    for c in ("FLIGHT_NO", "ORIGIN", "DEST", "ROUTE", "SCHED_DEP", "CARRIER", "FLIGHT_DATE"):
+        if c in df:
+            df[c] = df[c].astype(object)
+
+    # extra width: every 5th extra column is a segment code, the rest are noisy metric mixes
+    base = np.column_stack([np.nan_to_num(dep_delay), pax, fare, distance]).astype(np.float64)
+    base = (base - base.mean(axis=0)) / (base.std(axis=0) + 1e-9)
+    extra = {}
+    for j in range(max(0, columns - len(CORE_COLUMNS))):
+        col_rng = np.random.default_rng([seed, block, 1_000_000 + j])
+        if j % 5 == 4:
+            extra[f"SEGMENT_{j:04d}"] = np.char.add("S", col_rng.integers(0, 12 + j % 40, n).astype(str)).astype(object)
+        else:
+            w = np.random.default_rng([seed, 2_000_000 + j]).normal(0, 1, base.shape[1])  # per column, not per block
+            extra[f"METRIC_{j:04d}"] = np.round(base @ w + col_rng.normal(0, 1 + j % 3, n), 3)
+    if extra:
+        df = pd.concat([df, pd.DataFrame(extra)], axis=1)
+    if label:
+        df["IS_ANOMALY"] = anomaly
+    return df
+
+
+def iter_airline_chunks(rows: int, columns: int = len(CORE_COLUMNS), seed: int = 0, days: int = 365,
+                        anomaly_rate: float = 0.005, chunk_rows: int = 1_000_000,
+                        label: bool = False) -> Iterator[pd.DataFrame]:
+    """Yield the table in chunks of about `chunk_rows` rows (a multiple of BLOCK_ROWS)."""
+    per_chunk = max(1, chunk_rows // BLOCK_ROWS)
+    n_blocks = -(-rows // BLOCK_ROWS)
+    for first in range(0, n_blocks, per_chunk):
+        parts = []
+        for b in range(first, min(n_blocks, first + per_chunk)):
+            start = b * BLOCK_ROWS
+            parts.append(_block(seed, b, min(BLOCK_ROWS, rows - start), start, rows, days, columns,
+                                anomaly_rate, label))
+        chunk = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        chunk.index = pd.RangeIndex(first * BLOCK_ROWS, first * BLOCK_ROWS + len(chunk))
+        yield chunk
+
+
+def generate_airline_table(rows: int, columns: int = len(CORE_COLUMNS), seed: int = 0, days: int = 365,
+                           anomaly_rate: float = 0.005, label: bool = False) -> pd.DataFrame:
+    """The whole table in memory; use iter_airline_chunks / write_airline_dataset for large sizes."""
+    chunk_rows = -(-max(rows, 1) // BLOCK_ROWS) * BLOCK_ROWS
+    chunks = list(iter_airline_chunks(rows, columns, seed, days, anomaly_rate, chunk_rows=chunk_rows, label=label))
+    return chunks[0] if chunks else pd.DataFrame(columns=CORE_COLUMNS[:columns])
+
+
+def write_airline_dataset(path: str, rows: int, columns: int = len(CORE_COLUMNS), seed: int = 0,
+                          chunk_rows: int = 1_000_000, **kwargs) -> str:
+    """Stream the table to .parquet or .csv one chunk at a time."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_airline_chunks(rows, columns, seed, chunk_rows=chunk_rows, **kwargs)):
+            if path.endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
@@ -0,0 +1,255 @@
+# core_tools/telemetry.py
+"""
+Telemetry: OpenTelemetry tracing and an opt-in sampling profiler for pipeline stages.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Optional
+import functools
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from config.settings import (TRACING_ENABLED, TRACING_EXPORTER, TRACING_FILE, TRACING_SERVICE_NAME,
+                             PROFILE_DIR, PROFILE_INTERVAL_MS)
+
+_has_otel = importlib.util.find_spec("opentelemetry.sdk") is not None
+_tracer = None
+_provider = None
+_tracer_lock = threading.Lock()
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class JsonLinesSpanExporter:
+    """SpanExporter writing one compact JSON object per finished span."""
+
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        lines = [json.dumps(json.loads(s.to_json()), separators=(",", ":")) for s in spans]
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def _make_exporter(kind: str):
+    if kind == "file":
+        return JsonLinesSpanExporter()
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if kind == "otlp":
+        if importlib.util.find_spec("opentelemetry.exporter.otlp.proto.grpc") is None:
+            raise RuntimeError("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-grpc.")
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()  # endpoint from OTEL_EXPORTER_OTLP_ENDPOINT
+    raise ValueError(f"Unknown TRACING_EXPORTER '{kind}' (expected file, otlp or console).")
+
+
+def setup_tracing(exporter=None, enabled: bool = TRACING_ENABLED):
+    """Install the tracer provider (once per process). Returns the tracer, or None when off."""
+    global _tracer, _provider
+    if not enabled or not _has_otel:
+        return None
+    with _tracer_lock:
+        if _tracer is None or exporter is not None:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            if _provider is not None:
+                _provider.shutdown()
+            _provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+            _provider.add_span_processor(BatchSpanProcessor(exporter or _make_exporter(TRACING_EXPORTER)))
+            # a private provider: the global one may belong to the host application
+            _tracer = _provider.get_tracer("airline-summarizer")
+    return _tracer
+
+
+def shutdown_tracing():
+    """Flush and drop the tracer (exporters are flushed on shutdown)."""
+    global _tracer, _provider
+    with _tracer_lock:
+        if _provider is not None:
+            _provider.shutdown()
+        _tracer = _provider = None
+
+
+def enabled() -> bool:
+    return (_tracer if _tracer is not None else setup_tracing()) is not None
+
+
+def _attr(value):
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)) and all(isinstance(v, (bool, int, float, str)) for v in value):
+        return list(value)
+    return str(value)
+
+
+def span(name: str, parent=None, **attributes):
+    """Context manager for a span named `name`; `parent` is a context from capture()."""
+    tracer = _tracer if _tracer is not None else setup_tracing()
+    if tracer is None:
+        return _NOOP
+    return tracer.start_as_current_span(name, context=parent,
+                                        attributes={k: _attr(v) for k, v in attributes.items() if v is not None})
+
+
+def start_span(name: str, parent=None, **attributes):
+    """Span that is not made current (ended explicitly with .end()), for work tracked from afar."""
+    tracer = _tracer if _tracer is not None else setup_tracing()
+    if tracer is None:
+        return _NOOP
+    return tracer.start_span(name, context=parent,
+                             attributes={k: _attr(v) for k, v in attributes.items() if v is not None})
+
+
+def capture():
+    """Current trace context, to hand to another thread or event loop."""
+    if _tracer is None:
+        return None
+    from opentelemetry import context
+    return context.get_current()
+
+
+def attach(ctx):
+    if ctx is None:
+        return None
+    from opentelemetry import context
+    return context.attach(ctx)
+
+
+def detach(token):
+    if token is not None:
+        from opentelemetry import context
+        context.detach(token)
+
+
+def frame_attributes(df) -> Dict[str, int]:
+    return {"data.rows": int(len(df)), "data.columns": int(len(df.columns))}
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function in a span; the first DataFrame argument adds rows/columns."""
+    def wrap(fn: Callable):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _tracer is None and setup_tracing() is None:
+                return fn(*args, **kwargs)
+            attrs = {}
+            for a in args[:2]:
+                if hasattr(a, "columns") and hasattr(a, "__len__"):
+                    attrs = frame_attributes(a)
+                    break
+            with span(span_name, **attrs):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# ---- sampling profiler ----------------------------------------------------------------
+
+class StageProfiler:
+    """One sampler thread for all stages; begin/end register the calling thread."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, max_depth: int = 64):
+        self.interval_s = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self.stacks: Dict[str, Counter] = {}
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                for tid, stage in self._threads.items():
+                    frame = frames.get(tid)
+                    if frame is None:
+                        continue
+                    names = []
+                    while frame is not None and len(names) < self.max_depth:
+                        code = frame.f_code
+                        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    self.stacks.setdefault(stage, Counter())[";".join(reversed(names))] += 1
+
+    def start(self) -> "StageProfiler":
+        self._thread = threading.Thread(target=self._loop, name="stage-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def begin(self, stage: str):
+        with self._lock:
+            self._threads[threading.get_ident()] = stage
+
+    def end(self, stage: str):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def top_functions(self, stage: str, n: int = 10) -> list:
+        """Functions by share of samples in which they were the innermost frame."""
+        own = Counter()
+        stacks = self.stacks.get(stage, Counter())
+        total = sum(stacks.values())
+        for stack, count in stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": f, "samples": c, "share": round(c / total, 3)} for f, c in own.most_common(n)]
+
+    def dump(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        for stage, stacks in self.stacks.items():
+            with open(os.path.join(directory, f"{stage}.folded"), "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        summary = {stage: {"samples": sum(c.values()), "interval_ms": self.interval_s * 1000,
+                           "top": self.top_functions(stage)} for stage, c in self.stacks.items()}
+        with open(os.path.join(directory, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return directory
+
+
+def new_profile_dir(root: str = PROFILE_DIR) -> str:
+    return os.path.join(root, time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}")
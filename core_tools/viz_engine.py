@@ -1,25 +1,158 @@
 # core_tools/viz_engine.py
-import plotly.express as px
+"""
+Plot builders: data is reduced before it reaches Plotly so figures stay small at any row count.
+"""
+
+from typing import Optional
+import numpy as np
 import pandas as pd
+from core_tools.schema_engine import DatasetSchema
+from core_tools.correlation_engine import CorrelationResult, compute_correlations
+from core_tools.telemetry import traced
+from config.settings import VIZ_MAX_POINTS, VIZ_HIST_BINS, VIZ_TS_METHOD, VIZ_CORR_MAX_COLUMNS
+
+# candidate grains for "resample", finest first
+_GRAINS = ["1min", "5min", "15min", "1h", "6h", "1D", "7D", "30D", "90D", "365D"]
+
+def _px():
+    # plotly is imported on first plot, not at app startup
+    import plotly.express as px
+    return px
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points kept by largest-triangle-three-buckets downsampling."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 inner buckets
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point) is the third triangle vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the min and max point in each of n_out // 2 equal-count buckets."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(1, n_out // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            keep.extend(sorted({lo + int(np.argmin(seg)), lo + int(np.argmax(seg))}))
+    return np.asarray(keep, dtype=np.int64)
+
+def _resample(dates: pd.Series, values: pd.Series, max_points: int) -> tuple:
+    span = dates.iloc[-1] - dates.iloc[0]
+    grain = next((g for g in _GRAINS if span / pd.Timedelta(g) <= max_points), _GRAINS[-1])
+    agg = values.groupby(dates.dt.floor(grain)).mean()
+    return agg.index, agg.to_numpy(), grain
 
-def plot_numeric_histogram(df: pd.DataFrame, column: str):
-    fig = px.histogram(df, x=column, nbins=30, title=f"Distribution - {column}")
+@traced()
+def plot_numeric_histogram(df: pd.DataFrame, column: str, nbins: int = VIZ_HIST_BINS):
+    px = _px()
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=nbins) if len(values) else (np.zeros(0), np.zeros(1))
+    fig = px.bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, title=f"Distribution - {column}",
+                 labels={"x": column, "y": "count"})
+    fig.update_traces(width=np.diff(edges), hovertemplate=f"{column}: %{{x:.4g}}<br>count: %{{y}}<extra></extra>")
+    fig.update_layout(bargap=0)
     return fig
 
-def plot_correlation(df: pd.DataFrame):
-    numeric = df.select_dtypes(include=["number"])
-    if numeric.shape[1] < 2:
+@traced()
+def plot_correlation(df: pd.DataFrame, schema: Optional[DatasetSchema] = None,
+                     corr: Optional[CorrelationResult] = None, max_columns: int = VIZ_CORR_MAX_COLUMNS):
+    px = _px()
+    if corr is None:
+        numeric_cols = schema.numeric_columns if schema is not None else list(df.select_dtypes(include=["number"]).columns)
+        corr = compute_correlations(df, numeric_cols)
+    if len(corr.columns) < 2:
         # placeholder empty figure
         fig = px.imshow([[0]], text_auto=True, title="Correlation: not enough numeric columns")
         return fig
-    corr = numeric.corr()
-    fig = px.imshow(corr, text_auto=True, title="Correlation heatmap (numeric columns)")
+    cols = corr.heatmap_columns(max_columns)
+    title = "Correlation heatmap (numeric columns)"
+    if len(cols) < len(corr.columns):
+        title += f" - {len(cols)} most correlated of {len(corr.columns)}"
+    # cell labels only while they stay legible
+    fig = px.imshow(corr.to_frame(cols), text_auto=".2f" if len(cols) <= 15 else False,
+                    zmin=-1, zmax=1, color_continuous_scale="RdBu_r", title=title)
     return fig
 
-def plot_time_series(df: pd.DataFrame, date_col: str, value_col: str):
-    # ensure parsed
-    series = df.copy()
-    series[date_col] = pd.to_datetime(series[date_col], errors="coerce")
-    series = series.dropna(subset=[date_col])
-    fig = px.line(series.sort_values(date_col), x=date_col, y=value_col, title=f"{value_col} over {date_col}")
+def _epoch_ns(dates: pd.Series) -> np.ndarray:
+    """int64 nanoseconds of a naive or tz-aware datetime Series (tz-aware to_numpy() gives objects)."""
+    return dates.array.asi8
+
+@traced()
+def plot_time_series(df: pd.DataFrame, date_col: str, value_col: str, date_format: Optional[str] = None,
+                     max_points: int = VIZ_MAX_POINTS, method: str = VIZ_TS_METHOD):
+    px = _px()
+    # parse only the two columns involved (a format detected by the schema stage avoids
+    # per-element guessing) instead of copying the whole frame; offset-aware values (e.g.
+    # across a DST change) go on one UTC axis instead of parsing to an object column
+    utc = bool(date_format and "%z" in date_format)
+    dates = pd.to_datetime(df[date_col], format=date_format, errors="coerce", utc=utc)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, utc=True, errors="coerce")
+    values = pd.to_numeric(df[value_col], errors="coerce")
+    mask = dates.notna() & values.notna()
+    order = np.argsort(_epoch_ns(dates[mask]), kind="stable")
+    dates = dates[mask].iloc[order].reset_index(drop=True)
+    values = values[mask].iloc[order].reset_index(drop=True)
+
+    title = f"{value_col} over {date_col}"
+    if len(dates) > max_points:
+        if method == "resample":
+            x, y, grain = _resample(dates, values, max_points)
+            title += f" (mean per {grain})"
+        else:
+            yv = values.to_numpy(dtype=np.float64)
+            if method == "minmax":
+                idx = minmax_indices(yv, max_points)
+            else:
+                idx = lttb_indices(_epoch_ns(dates).astype(np.float64), yv, max_points)
+            x, y = dates.iloc[idx], yv[idx]
+            title += f" ({len(idx)} of {len(dates)} points)"
+    else:
+        x, y = dates, values
+    fig = px.line(x=x, y=y, title=title, labels={"x": date_col, "y": value_col})
+    return fig
+
+_METRIC_LABELS = {"on_time_rate": "on-time rate", "mean_delay": "mean delay (min)",
+                  "cancellation_rate": "cancellation rate", "load_factor": "load factor"}
+
+@traced()
+def plot_segments(grouped: dict, dimension: Optional[str] = None):
+    """Horizontal bars of the worst and best groups of one grouped_kpis dimension (route first)."""
+    px = _px()
+    dims = grouped.get("dimensions", {})
+    if dimension is None:
+        dimension = next((d for d in dims if dims[d]["best"]), None)
+    if dimension is None:
+        return None
+    metric = grouped["metric"]
+    info = dims[dimension]
+    rows = [(r["key"], r[metric], r["flights"], "worst") for r in info["worst"]]
+    seen = {r[0] for r in rows}
+    rows += [(r["key"], r[metric], r["flights"], "best") for r in info["best"] if r["key"] not in seen]
+    frame = pd.DataFrame(rows, columns=[dimension, metric, "flights", "group"]).sort_values(
+        metric, ascending=grouped["higher_is_better"])
+    fig = px.bar(frame, x=metric, y=dimension, color="group", orientation="h", hover_data=["flights"],
+                 color_discrete_map={"worst": "#d62728", "best": "#2ca02c"},
+                 title=f"{_METRIC_LABELS[metric].capitalize()} by {dimension.replace('_', ' ')} "
+                       f"({info['ranked']} of {info['groups']} with >= {grouped['min_flights']} flights)",
+                 labels={metric: _METRIC_LABELS[metric]})
+    fig.update_yaxes(type="category")
     return fig
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from core_tools.anomaly_engine import AnomalyEngine, detect_anomalies
+
+
+def _frame(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "DEP_DELAY": rng.normal(10, 5, n),
+        "ARR_DELAY": rng.normal(8, 5, n),
+        "PAX": rng.normal(150, 20, n),
+    })
+    planted = rng.choice(n, 5, replace=False)
+    df.loc[planted, ["DEP_DELAY", "ARR_DELAY"]] = [400.0, 390.0]
+    return df, set(planted.tolist())
+
+
+def test_subsample_fit_scores_every_row_with_stable_top_n():
+    df, planted = _frame()
+    columns = ["DEP_DELAY", "ARR_DELAY", "PAX"]
+    engine = AnomalyEngine(max_fit_rows=2_000, chunk_rows=3_000, n_jobs=1).fit(df, columns)
+    result = engine.detect(df, top_n=5)
+    # fitted on 2,000 rows, scored in chunks over all 20,000
+    assert engine.model.max_samples_ <= 2_000 and len(result["scores"]) == len(df)
+    assert {t["index"] for t in result["top"]} == planted
+    assert all({c for c, _ in t["contributors"][:2]} == {"DEP_DELAY", "ARR_DELAY"} for t in result["top"])
+    scores = [t["score"] for t in result["top"]]
+    assert scores == sorted(scores, reverse=True)
+    again = AnomalyEngine(max_fit_rows=2_000, chunk_rows=7_000, n_jobs=1).fit(df, columns).detect(df, top_n=5)
+    assert again["top"] == result["top"] and np.allclose(again["scores"], result["scores"])
+
+
+def test_persisted_model_is_reused(tmp_path):
+    df, _ = _frame(5_000, seed=1)
+    columns = ["DEP_DELAY", "PAX"]
+    first = detect_anomalies(df, columns, reuse_model=True, model_dir=str(tmp_path), n_jobs=1)
+    second = detect_anomalies(df, columns, reuse_model=True, model_dir=str(tmp_path), n_jobs=1)
+    assert not first["model_reused"] and second["model_reused"]
+    assert first["model_key"] == second["model_key"] and len(list(tmp_path.iterdir())) == 1
+    assert np.array_equal(first["scores"], second["scores"]) and first["top"] == second["top"]
+    # another column set is another model
+    third = detect_anomalies(df, ["ARR_DELAY", "PAX"], reuse_model=True, model_dir=str(tmp_path), n_jobs=1)
+    assert not third["model_reused"] and third["model_key"] != first["model_key"]
+
+
+def test_empty_and_constant_columns_are_scored():
+    df, planted = _frame(3_000, seed=2)
+    df["EMPTY"] = np.nan
+    df["CONST"] = 1.0
+    result = detect_anomalies(df, ["DEP_DELAY", "EMPTY", "CONST"], n_jobs=1, top_n=5)
+    assert np.isfinite(result["scores"]).all()
+    assert {t["index"] for t in result["top"]} == planted
+    for t in result["top"]:
+        assert all(np.isfinite(z) for _, z in t["contributors"])
+        assert t["contributors"][0][0] == "DEP_DELAY"
+    assert detect_anomalies(df, []) == {}
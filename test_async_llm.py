@@ -0,0 +1,51 @@
+import asyncio
+
+from core_tools.async_llm import AsyncLLMConnector, LLMRateLimitError, LocalBackend
+
+
+class FlakyBackend(LocalBackend):
+    """Rate-limits the first `failures` calls, then behaves like LocalBackend."""
+
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(latency_s=0.01, latency_sigma=0.0, tokens_per_s=10000, **kwargs)
+        self.failures = failures
+
+    async def _first_token_delay(self):
+        await super()._first_token_delay()
+        if self.calls <= self.failures:
+            raise LLMRateLimitError("429", retry_after=0.0)
+
+
+def test_retries_rate_limits_then_succeeds():
+    conn = AsyncLLMConnector(FlakyBackend(failures=2), max_retries=3)
+    text = asyncio.run(conn.generate("delay minutes by route"))
+    assert "delay minutes by route" in text
+    assert conn.stats["retries"] == 2
+
+
+def test_identical_inflight_prompts_are_coalesced():
+    backend = LocalBackend(latency_s=0.05, latency_sigma=0.0, tokens_per_s=10000)
+    conn = AsyncLLMConnector(backend, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(conn.generate("same prompt") for _ in range(5)),
+                                    conn.generate("other prompt"))
+
+    results = asyncio.run(run())
+    assert len(set(results[:5])) == 1
+    assert backend.calls == 2
+    assert conn.stats["coalesced"] == 4
+
+
+def test_timeout_and_sync_streaming():
+    slow = AsyncLLMConnector(LocalBackend(latency_s=1.0, latency_sigma=0.0), timeout=0.05, max_retries=0)
+    try:
+        slow.generate_sync("too slow")
+        assert False, "expected a timeout"
+    except asyncio.TimeoutError:
+        pass
+
+    conn = AsyncLLMConnector(LocalBackend(latency_s=0.01, latency_sigma=0.0, tokens_per_s=10000,
+                                          responder=lambda p: "on time performance improved"))
+    tokens = list(conn.stream_sync("anything"))
+    assert len(tokens) == 4 and "".join(tokens).strip() == "on time performance improved"
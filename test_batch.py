@@ -0,0 +1,125 @@
+import json
+import os
+import pathlib
+
+import batch
+from core_tools import model_registry
+from core_tools.ingestion import read_table
+from core_tools.long_term_memory import HashingEmbedder
+from core_tools.synthetic_data import generate_airline_table
+
+
+class _Engine:
+    backend, model_name = "hashing", "hashing-64"
+
+    def __init__(self):
+        self._embed = HashingEmbedder(64)
+
+    def encode_array(self, texts):
+        return self._embed([str(t) for t in texts])
+
+
+original_init = batch._init_worker
+
+
+def _init_worker(memory_budget=False, threads=None):
+    model_registry._instances[("embedding_engine", "auto")] = _Engine()
+    try:
+        original_init(memory_budget, threads)
+    finally:
+        model_registry.clear(("embedding_engine", "auto"))
+    batch._agent.scheduler = batch._agent.cache = None
+    batch._agent.summarizer.complete = lambda prompt, fallback, tokens=None: "## Summary\n\nAll good."
+
+
+def _init_crashing_worker(memory_budget=False, threads=None):
+    # a file named crash.csv kills its worker process, as an out-of-memory kill would
+    _init_worker(memory_budget, threads)
+    process_file = batch.process_file
+
+    def crash_on(path, out_dir):
+        if path.endswith("crash.csv"):
+            os._exit(1)
+        return process_file(path, out_dir)
+    batch.process_file = crash_on
+
+
+def test_rerun_skips_files_already_done(tmp_path):
+    data, out = tmp_path / "data", tmp_path / "out"
+    data.mkdir()
+    for i in range(2):
+        generate_airline_table(500, seed=i).to_csv(data / f"day_{i}.csv", index=False)
+    batch._init_worker = _init_worker
+    try:
+        first = batch.run_batch([str(data)], str(out), workers=1, log=lambda msg: None)
+        assert [e["status"] for e in first] == ["ok", "ok"], [e.get("error") for e in first]
+        assert all(os.path.exists(os.path.join(e["output"], "result.json")) for e in first)
+        messages = []
+        assert batch.run_batch([str(data)], str(out), workers=1, log=messages.append) == []
+        assert messages[0].startswith("2 files, 2 already done, 0 to run"), messages
+        # a changed file is run again
+        generate_airline_table(600, seed=5).to_csv(data / "day_1.csv", index=False)
+        again = batch.run_batch([str(data)], str(out), workers=1, log=lambda msg: None)
+        assert [os.path.basename(e["source"]) for e in again] == ["day_1.csv"] and again[0]["rows"] == 600
+    finally:
+        batch._init_worker = original_init
+        batch._agent = None
+    lines = (out / batch.MANIFEST).read_text().splitlines()
+    assert len(lines) == 3 and all(json.loads(line)["status"] == "ok" for line in lines)
+
+
+def test_workers_cap_inner_parallelism():
+    from threadpoolctl import threadpool_info
+    cpus = os.cpu_count() or 1
+    assert batch.inner_threads(1) == cpus and batch.inner_threads(cpus * 4) == 1
+    try:
+        _init_worker(False, 1)
+        agent = batch._agent
+        assert agent.max_workers == 1 and agent.process_workers == 0
+        assert agent.pattern.n_jobs == 1 and agent.pattern.grouped_threads == 1
+        assert all(pool["num_threads"] == 1 for pool in threadpool_info())
+    finally:
+        if batch._thread_limits is not None:
+            batch._thread_limits.restore_original_limits()
+        batch._agent = batch._thread_limits = None
+
+
+def test_worker_pool_survives_a_crashing_file(tmp_path):
+    data, out = tmp_path / "data", tmp_path / "out"
+    data.mkdir()
+    for name in ("a", "b", "crash", "d"):
+        generate_airline_table(300, seed=len(name)).to_csv(data / f"{name}.csv", index=False)
+    try:
+        batch._init_worker = _init_crashing_worker
+        entries = batch.run_batch([str(data)], str(out), workers=2, log=lambda msg: None)
+        status = {os.path.basename(e["source"]): e["status"] for e in entries}
+        assert status == {"a.csv": "ok", "b.csv": "ok", "crash.csv": "error", "d.csv": "ok"}
+        assert next(e for e in entries if e["status"] == "error")["error"].startswith("BrokenProcessPool")
+        # only the failed file is run again
+        batch._init_worker = _init_worker
+        again = batch.run_batch([str(data)], str(out), workers=2, log=lambda msg: None)
+        assert [(os.path.basename(e["source"]), e["status"]) for e in again] == [("crash.csv", "ok")]
+    finally:
+        batch._init_worker = original_init
+        batch._agent = None
+
+
+def test_large_files_are_streamed(tmp_path):
+    data, out = tmp_path / "data", tmp_path / "out"
+    data.mkdir()
+    generate_airline_table(2000, seed=3).to_parquet(data / "big.parquet", index=False, row_group_size=300)
+    threshold = batch.PROFILE_STREAM_MIN_MB
+    batch._init_worker = _init_worker
+    batch.PROFILE_STREAM_MIN_MB = 0
+    batch.read_table = None  # the file must not be loaded whole
+    try:
+        entries = batch.run_batch([str(data)], str(out), workers=1, log=lambda msg: None)
+        assert [e["status"] for e in entries] == ["ok"], [e.get("error") for e in entries]
+        assert entries[0]["rows"] == 2000 and "stream_profile" in entries[0]["timings"]
+        result = json.loads((pathlib.Path(entries[0]["output"]) / "result.json").read_text())
+        assert result["stats"]["profile_text"].startswith("Rows: 2000,") and result["columns"]
+    finally:
+        batch.PROFILE_STREAM_MIN_MB = threshold
+        batch.read_table = read_table
+        batch._init_worker = original_init
+        batch._agent = None
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from core_tools import model_registry
+from core_tools.concept_index import load_dictionary, load_or_build
+from core_tools.long_term_memory import HashingEmbedder
+
+
+class _Engine:
+    backend, model_name = "hashing", "hashing-256"
+
+    def __init__(self):
+        self._embed = HashingEmbedder(256)
+        self.calls = 0
+
+    def encode_array(self, texts):
+        self.calls += 1
+        return self._embed([str(t).replace("_", " ") for t in texts])
+
+
+def test_index_matches_brute_force_and_is_memory_mapped(tmp_path):
+    path = tmp_path / "dictionary.csv"
+    path.write_text("concept,synonyms\n"
+                    "delay,departure delay|minutes late\n"
+                    "revenue,ticket revenue|sales\n"
+                    "carrier,airline|operating carrier\n"
+                    "delay,arrival delay\n", encoding="utf-8")
+    dictionary = load_dictionary(str(path))
+    assert dictionary["delay"] == ["departure delay", "minutes late", "arrival delay"]
+    engine = _Engine()
+    index = load_or_build(dictionary, engine.encode_array, "hashing", str(tmp_path / "index"))
+    assert isinstance(index.matrix, np.memmap) and index.concepts == ["delay", "revenue", "carrier"]
+    np.testing.assert_allclose(np.linalg.norm(index.matrix, axis=1), 1.0, rtol=1e-5)
+
+    queries = engine.encode_array(["ARR_DELAY", "airline code", "total sales", "gate"])
+    sims = index.similarities(queries)
+    q = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    full = q @ np.asarray(index.matrix).T
+    brute = np.stack([full[:, index.offsets[j]:(index.offsets[j + 1] if j + 1 < len(index) else None)].max(axis=1)
+                      for j in range(len(index))], axis=1)
+    np.testing.assert_allclose(sims, brute, atol=1e-6)
+    top = index.match(queries, k=2)
+    assert [t[0][0] for t in top[:3]] == ["delay", "carrier", "revenue"]
+    assert all(len(t) == 2 and t[0][1] >= t[1][1] for t in top)
+
+    calls = engine.calls
+    again = load_or_build(dictionary, engine.encode_array, "hashing", str(tmp_path / "index"))
+    assert engine.calls == calls and again.version == index.version
+
+
+def test_semantic_agent_uses_dictionary_and_value_signal(tmp_path):
+    path = tmp_path / "concepts.yaml"
+    path.write_text("concepts:\n  delay: [departure delay]\n  origin: [departure airport, JFK LAX ORD]\n"
+                    "  revenue: [sales]\n", encoding="utf-8")
+    engine = _Engine()
+    model_registry._instances[("embedding_engine", "auto")] = engine
+    try:
+        from agents.semantic_agent import SemanticAgent
+        names_only = SemanticAgent(concept_path=str(path), index_dir=str(tmp_path / "idx"), value_weight=0.0)
+        with_values = SemanticAgent(concept_path=str(path), index_dir=str(tmp_path / "idx"), value_weight=0.6)
+    finally:
+        model_registry.clear(("embedding_engine", "auto"))
+    df = pd.DataFrame({"DEP_DELAY": [5.0, 12.0], "STN": ["JFK", "LAX"], "SALES": [100.0, None]})
+    calls = engine.calls
+    plain = names_only.infer_columns(df)
+    blended = with_values.infer_columns(df)
+    assert engine.calls == calls + 2  # one batched encode per call, values included
+    assert plain["mapping"]["DEP_DELAY"]["best_match"] == "delay"
+    assert plain["mapping"]["SALES"]["best_match"] == "revenue"
+    assert plain["mapping"]["STN"]["score"] < 0.1
+    assert blended["mapping"]["STN"]["best_match"] == "origin" and blended["mapping"]["STN"]["score"] > 0.3
+    assert blended["samples"]["STN"] == ["JFK", "LAX"]
+    assert len(plain["mapping"]["DEP_DELAY"]["top_matches"]) == 3
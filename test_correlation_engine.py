@@ -0,0 +1,54 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from core_tools.correlation_engine import compute_correlations
+
+
+def _frame(n=5_000, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.normal(size=n)
+    return pd.DataFrame({
+        "a": a,
+        "b": 0.8 * a + 0.6 * rng.normal(size=n),
+        "c": rng.normal(size=n),
+        "d": -a + 0.3 * rng.normal(size=n),
+        "const": np.ones(n),
+    })
+
+
+def test_matches_pandas_without_missing_values():
+    df = _frame()
+    result = compute_correlations(df, df.columns, block_size=2)
+    expected = df.corr().fillna(0.0)
+    np.fill_diagonal(expected.values, 1.0)
+    assert np.allclose(result.to_frame(), expected, atol=1e-5)
+    assert result.top_pairs[0] == {"a": "a", "b": "d", "r": round(float(result.to_frame().loc["a", "d"]), 4)}
+    assert result.rows_used == len(df)
+
+
+def test_missing_values_are_mean_imputed():
+    df = _frame(seed=1)
+    missing = 0.1
+    df.loc[np.random.default_rng(2).random(len(df)) < missing, "b"] = np.nan
+    got, expected = compute_correlations(df, ["a", "b", "c", "d"]).to_frame(), df[["a", "b", "c", "d"]].corr()
+    # pairs without the gappy column are unaffected
+    assert np.allclose(got.loc[["a", "c", "d"], ["a", "c", "d"]], expected.loc[["a", "c", "d"], ["a", "c", "d"]], atol=1e-5)
+    # pairs with it are shrunk, not computed on the pairwise-complete rows as pandas does
+    shrink = got.loc["a", "b"] / expected.loc["a", "b"]
+    assert abs(shrink - np.sqrt(1 - missing)) < 0.02
+    assert abs(got.loc["b", "d"]) < abs(expected.loc["b", "d"])
+
+
+def test_row_sample_bounds_memory():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.normal(size=(500_000, 10)), columns=[f"c{i}" for i in range(10)])  # 40 MB
+    tracemalloc.start()
+    try:
+        result = compute_correlations(df, df.columns, max_rows=20_000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert result.rows_used == 20_000
+    assert peak < 8 * 1024 * 1024, peak  # the 20,000-row sample, not a copy of the frame
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from core_tools.embedding_cache import EmbeddingCache, cache_key
+
+
+def _encoder(calls):
+    def encode(texts):
+        calls.append(list(texts))
+        rng = np.random.default_rng(len(calls))
+        v = rng.normal(size=(len(texts), 384)).astype(np.float32)
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+    return encode
+
+
+def test_float16_round_trip_hits_and_misses(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    calls = []
+    cache = EmbeddingCache(path, dtype="float16")
+    texts = ["DEP_DELAY", "ORIGIN", "DEP_DELAY", "TAIL_NUM"]
+    first = cache.encode("st", "mini", texts, _encoder(calls))
+    assert calls == [["DEP_DELAY", "ORIGIN", "TAIL_NUM"]] and first.dtype == np.float32
+    assert np.array_equal(first[0], first[2])
+    # a new process reads the same vectors back without encoding
+    again = EmbeddingCache(path, dtype="float16").encode("st", "mini", texts, _encoder(calls))
+    assert len(calls) == 1 and np.array_equal(again, first)
+    # float16 storage stays within rounding of the encoder output
+    exact = _encoder([])(["DEP_DELAY", "ORIGIN", "TAIL_NUM"])  # same seed as the first call
+    assert np.allclose(first[[0, 1, 3]], exact, atol=1e-3)
+    cos = np.sum(first[[0, 1, 3]] * exact, axis=1) / np.linalg.norm(first[[0, 1, 3]], axis=1)
+    assert cos.min() > 0.99999
+    # model and backend are part of the key
+    assert cache_key("st", "mini", "x") != cache_key("st", "other", "x")
+    cache.encode("st", "other", ["ORIGIN"], _encoder(calls))
+    assert len(calls) == 2
+    try:
+        EmbeddingCache(":memory:", dtype="int8")
+        assert False, "expected an unsupported dtype to be rejected"
+    except ValueError:
+        pass
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = EmbeddingCache(":memory:", max_entries=5, dtype="float32")
+    calls = []
+    cache.encode("st", "mini", [f"c{i}" for i in range(5)], _encoder(calls))
+    time.sleep(0.01)
+    cache.get_many([cache_key("st", "mini", t) for t in ("c0", "c1")])  # used again
+    time.sleep(0.01)
+    cache.encode("st", "mini", ["n0", "n1", "n2"], _encoder(calls))
+    assert len(cache) == 5
+    kept = cache.get_many([cache_key("st", "mini", t) for t in ("c0", "c1", "c2", "c3", "c4", "n0", "n1", "n2")])
+    assert set(kept) == {cache_key("st", "mini", t) for t in ("c0", "c1", "n0", "n1", "n2")}
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from core_tools.grouped_kpis import format_segments, grouped_kpis, resolve_roles
+from core_tools.schema_engine import infer_schema
+from core_tools.synthetic_data import generate_airline_table
+
+
+def _semantic_map(concepts: dict) -> dict:
+    return {"mapping": {c: {"best_match": k, "score": 0.8, "top_matches": [(k, 0.8), ("fare", 0.1)]}
+                        for c, k in concepts.items()}}
+
+
+def test_grouped_kpis_match_pandas_groupby():
+    df = generate_airline_table(30_000, columns=17, seed=5)
+    schema = infer_schema(df)
+    roles = {"route": "ROUTE", "carrier": "CARRIER", "date": "FLIGHT_DATE", "delay": "DEP_DELAY",
+             "cancelled": "CANCELLED", "load_factor": "LOAD_FACTOR"}
+    grouped = grouped_kpis(df, roles, schema, top_n=3, min_flights=10)
+
+    delay = df["DEP_DELAY"]
+    on_time = pd.Series(np.where(delay.isna(), np.nan, (delay <= 15).astype(float)), index=df.index)
+    expected = df.assign(on_time=on_time).groupby("CARRIER").agg(
+        flights=("ROUTE", "size"), on_time=("on_time", "mean"), cancelled=("CANCELLED", "mean"))
+    carriers = grouped["dimensions"]["carrier"]
+    assert carriers["groups"] == len(expected)
+    for rec in carriers["best"] + carriers["worst"]:
+        assert rec["flights"] == expected.loc[rec["key"], "flights"]
+        assert abs(rec["on_time_rate"] - expected.loc[rec["key"], "on_time"]) < 1e-4
+        assert abs(rec["cancellation_rate"] - expected.loc[rec["key"], "cancelled"]) < 1e-4
+    best = [r["on_time_rate"] for r in carriers["best"]]
+    assert best == sorted(best, reverse=True) and best[0] == round(expected["on_time"].max(), 4)
+    assert grouped["overall"]["flights"] == len(df)
+    assert grouped["dimensions"]["day"]["groups"] == df["FLIGHT_DATE"].nunique()
+    assert "flight_number" not in grouped["dimensions"]
+
+
+def test_grouped_kpis_over_parquet_file_with_semantic_roles(tmp_path):
+    df = generate_airline_table(20_000, columns=17, seed=6)
+    path = tmp_path / "flights.parquet"
+    df.to_parquet(path)
+    schema = infer_schema(df)
+    semantic_map = _semantic_map({"FLIGHT_DATE": "date", "SCHED_DEP": "date", "ORIGIN": "origin",
+                                  "DEST": "destination", "FLIGHT_NO": "flight number", "ARR_DELAY": "delay",
+                                  "CANCELLED": "cancel", "PAX": "passengers", "SEATS": "seat_capacity"})
+    roles = resolve_roles(semantic_map, schema)
+    # a time-of-day column cannot give a day; origin and destination make the route
+    assert roles["date"] == "FLIGHT_DATE" and "route" not in roles and roles["origin"] == "ORIGIN"
+
+    from_file = grouped_kpis(str(path), roles, schema)
+    from_frame = grouped_kpis(df, roles, schema)
+    assert from_file["source"] == "file" and from_frame["source"] == "frame"
+    assert from_file["overall"] == from_frame["overall"]
+    assert from_file["dimensions"]["route"]["best"] == from_frame["dimensions"]["route"]["best"]
+    assert "-" in from_file["dimensions"]["route"]["best"][0]["key"]
+    load = df["PAX"].sum() / df["SEATS"].sum()
+    assert abs(from_file["overall"]["load_factor"] - load) < 1e-4
+    text = format_segments(from_file)
+    assert "worst route:" in text and "best flight_number:" in text
+    assert grouped_kpis(df, {"carrier": "CARRIER"}, schema) == {}
@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from core_tools.incremental import describe_changes, load_state, locked_state
+from core_tools.statistical_engine import compute_basic_kpis, top_categorical_frequencies
+
+
+def _batch(n, seed, delay_scale=15.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "FLIGHT_DATE": pd.date_range(f"2024-0{seed}-01", periods=n, freq="min").strftime("%Y-%m-%d").astype(object),
+        "ORIGIN": rng.choice(["JFK", "LAX", "ORD"], n),
+        "DEP_DELAY": rng.exponential(delay_scale, n),
+        "PAX": rng.integers(50, 300, n),
+        "AIR_TIME": rng.integers(30, 400, n),
+        "TIMEZONE": rng.choice(["EST", "PST"], n),
+    })
+
+
+def test_appends_match_full_history_and_persist(tmp_path):
+    batches = [_batch(4000, 1), _batch(3000, 2), _batch(5000, 3)]
+    for b in batches:
+        with locked_state("flights", root=str(tmp_path)) as state:
+            result = state.apply(b)
+    full = pd.concat(batches, ignore_index=True)
+
+    state = load_state("flights", root=str(tmp_path))
+    stats = state.stats()
+    for col, k in compute_basic_kpis(full).items():
+        for key in ("mean", "std", "min", "max"):
+            assert np.isclose(stats["kpis"][col][key], k[key]), (col, key)
+    assert stats["categorical_freq"]["ORIGIN"] == top_categorical_frequencies(full)["ORIGIN"]
+    assert state.rows == len(full) and len(state.batches) == 3
+    assert state.date_range["FLIGHT_DATE"][0].startswith("2024-01-01")
+    # only the new rows are scored; positions are relative to the batch
+    assert len(result["anomalies"]["scores"]) == 5000 and result["anomalies"]["row_offset"] == 7000
+
+    with locked_state("flights", root=str(tmp_path)) as state:
+        assert state.apply(batches[1])["duplicate"]
+    assert load_state("flights", root=str(tmp_path)).rows == len(full)
+
+
+def test_changes_highlight_shifted_kpis_and_new_categories(tmp_path):
+    with locked_state("flights", root=str(tmp_path)) as state:
+        state.apply(_batch(5000, 1))
+        shifted = _batch(2000, 2, delay_scale=45.0)
+        shifted.loc[:500, "ORIGIN"] = "SEA"
+        result = state.apply(shifted)
+    text = describe_changes(result, state)
+    assert result["changes"]["kpi_shifts"][0]["column"] == "DEP_DELAY"
+    # date-named columns without dates (AIR_TIME, TIMEZONE) get no date coverage
+    assert state.date_columns == ["FLIGHT_DATE"] and list(result["date_range"]) == ["FLIGHT_DATE"]
+    assert result["changes"]["new_categories"]["ORIGIN"] == ["SEA"]
+    assert "DEP_DELAY: batch mean" in text and "ORIGIN: new values SEA" in text
+
+
+def test_imports_without_fcntl():
+    # fcntl does not exist on Windows; the lock only needs it when a batch is applied
+    code = "import sys; sys.modules['fcntl'] = None; import agents.orchestrator_agent"
+    root = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+def test_report_is_written_after_the_dataset_lock_is_released(tmp_path, monkeypatch):
+    import functools
+    import threading
+    import agents.orchestrator_agent as orchestrator_agent
+    from core_tools import model_registry
+    from core_tools.long_term_memory import HashingEmbedder
+
+    class _Engine:
+        backend, model_name = "hashing", "hashing-64"
+
+        def encode_array(self, texts):
+            return HashingEmbedder(64)([str(t) for t in texts])
+
+    monkeypatch.setattr(orchestrator_agent, "locked_state", functools.partial(locked_state, root=str(tmp_path)))
+    model_registry._instances[("embedding_engine", "auto")] = _Engine()
+    try:
+        agent = orchestrator_agent.OrchestratorAgent(max_workers=2, scheduler=None)
+    finally:
+        model_registry.clear(("embedding_engine", "auto"))
+
+    def complete(prompt, fallback, tokens=None):
+        # another writer must be able to take the lock while the LLM is working
+        def take_lock():
+            with locked_state("flights", root=str(tmp_path)):
+                pass
+        other = threading.Thread(target=take_lock, daemon=True)
+        other.start()
+        other.join(timeout=5)
+        assert not other.is_alive(), "the dataset lock is still held during the report"
+        return "report"
+    agent.summarizer.complete = complete
+
+    report, plots = agent.run_append(_batch(2000, 1), "flights")
+    assert report == "report" and plots
+    assert load_state("flights", root=str(tmp_path)).rows == 2000
+    assert agent.last_stats["append"]["batch"] == 1
@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+
+from core_tools import ingestion
+
+
+def _frame():
+    return pd.DataFrame({"ORIGIN": ["JFK", "LAX", "ORD"], "PAX": [120, 180, 95], "DEP_DELAY": [3.5, None, 41.0]})
+
+
+def test_formats_round_trip_with_column_selection(tmp_path):
+    df = _frame()
+    df.to_csv(tmp_path / "f.csv", index=False)
+    df.to_parquet(tmp_path / "f.parquet")
+    df.to_feather(tmp_path / "f.feather")
+    for name in ("f.csv", "f.parquet", "f.feather"):
+        out = ingestion.read_table(str(tmp_path / name), columns=["ORIGIN", "PAX"])
+        assert list(out.columns) == ["ORIGIN", "PAX"]
+        assert out["PAX"].tolist() == [120, 180, 95]
+        assert isinstance(out["PAX"].dtype, pd.ArrowDtype)
+    upload = io.BytesIO((tmp_path / "f.parquet").read_bytes())
+    assert ingestion.read_table(upload, name="upload.parquet", dtype_backend="numpy")["DEP_DELAY"].isna().sum() == 1
+
+
+def test_excel_is_parsed_once(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(pd, "read_excel", lambda buf: calls.append(1) or _frame())
+    for _ in range(2):
+        out = ingestion.read_excel_cached(io.BytesIO(b"workbook bytes"), cache_dir=str(tmp_path))
+        assert out["ORIGIN"].tolist() == ["JFK", "LAX", "ORD"]
+    assert len(calls) == 1
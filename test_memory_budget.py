@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from core_tools.memory_budget import compact_frame
+from core_tools.stage_graph import StageGraph
+
+
+def test_compact_frame_shrinks_in_place():
+    n = 20000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "ORIGIN": rng.choice(["JFK", "LAX", "ORD"], n),
+        "FLIGHT_DATE": pd.date_range("2024-01-01", periods=n, freq="h").strftime("%Y-%m-%d").astype(object),
+        "PAX": rng.integers(50, 300, n),
+        "DEP_DELAY": rng.exponential(12, n),
+    })
+    pax, origin = df["PAX"].copy(), df["ORIGIN"].copy()
+    report = compact_frame(df)
+    assert isinstance(df["ORIGIN"].dtype, pd.CategoricalDtype)
+    assert df["PAX"].dtype == np.int16 and df["DEP_DELAY"].dtype == np.float32
+    assert df["FLIGHT_DATE"].dtype == object  # date strings stay detectable as dates
+    assert (df["PAX"] == pax).all() and (df["ORIGIN"].astype(str) == origin).all()
+    assert report["after_mb"] < report["before_mb"]
+
+
+def test_stage_graph_records_memory():
+    graph = StageGraph(max_workers=1, track_memory=True)
+
+    def alloc():
+        data = np.ones(8_000_000)  # 64 MB, held long enough for the 10 ms sampler to see it
+        time.sleep(0.1)
+        return data.sum()
+
+    graph.add("alloc", alloc)
+    graph.add("after", lambda alloc: alloc, deps=("alloc",))
+    graph.run()
+    # peak_mb is the process RSS; the stage's own allocation shows in the delta
+    assert graph.memory["alloc"]["delta_mb"] >= 50, graph.memory["alloc"]
+    assert graph.memory["alloc"]["peak_mb"] >= graph.memory["alloc"]["start_mb"] + 50
+    assert graph.memory["after"]["delta_mb"] < 50, graph.memory["after"]
+    assert set(graph.memory) == {"alloc", "after", "total"}
@@ -0,0 +1,28 @@
+from core_tools.long_term_memory import HashingEmbedder, LongTermMemory
+
+
+def test_remember_recall_filter_and_forget(tmp_path):
+    mem = LongTermMemory(str(tmp_path), embedding_fn=HashingEmbedder())
+    assert len(mem.store) == 3
+    mem.remember("ord_weather", "Departure delay minutes spiked at ORD during winter storms", {"airport": "ORD"})
+    mem.remember("jfk_load", "Load factor on JFK routes improved after schedule changes", {"airport": "JFK"})
+
+    assert mem.recall("delay minutes at ORD", top_k=1)["context"] == [
+        "Departure delay minutes spiked at ORD during winter storms"]
+    filtered = mem.recall("delay minutes", top_k=5, where={"airport": "JFK"})
+    assert filtered["raw_results"]["ids"] == [["jfk_load"]]
+
+    mem.forget("ord_weather")
+    assert "ord_weather" not in mem.recall("delay minutes at ORD", top_k=5)["raw_results"]["ids"][0]
+
+
+def test_store_survives_reopen(tmp_path):
+    mem = LongTermMemory(str(tmp_path), embedding_fn=HashingEmbedder())
+    mem.remember("otp_note", "On-time performance dropped on Monday mornings")
+    mem.remember("gone", "temporary note")
+    mem.forget("gone")
+    mem.persist()
+
+    reopened = LongTermMemory(str(tmp_path), embedding_fn=HashingEmbedder())
+    assert reopened.store.list_memories()["ids"] == ["kpi_doc", "strategic_goal", "anomaly_sop", "otp_note"]
+    assert reopened.recall("on-time performance monday", top_k=1)["raw_results"]["ids"] == [["otp_note"]]
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from core_tools import embedding_engine, model_registry
+from core_tools.long_term_memory import HashingEmbedder
+
+
+def test_concurrent_callers_share_one_build():
+    builds = []
+    start = threading.Barrier(8)
+
+    def factory():
+        builds.append(threading.get_ident())
+        time.sleep(0.1)  # every caller arrives while the first build is running
+        return object()
+
+    results = []
+
+    def call():
+        start.wait()
+        results.append(model_registry.get_or_create(("test", "shared"), factory))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(builds) == 1 and len(results) == 8
+        assert all(r is results[0] for r in results)
+        assert model_registry.is_loaded(("test", "shared"))
+    finally:
+        model_registry.clear(("test", "shared"))
+    assert not model_registry.is_loaded(("test", "shared"))
+
+
+def test_semantic_agents_share_the_embedding_engine(tmp_path, monkeypatch):
+    from agents.semantic_agent import CONCEPT_INDEX_PATH, SemanticAgent
+    built = []
+
+    class _Engine:
+        model_name = "hashing-64"
+
+        def __init__(self, backend):
+            self.backend = backend
+            self._embed = HashingEmbedder(64)
+            built.append(self)
+
+        def encode_array(self, texts):
+            return self._embed([str(t) for t in texts])
+
+    monkeypatch.setattr(embedding_engine, "EmbeddingEngine", _Engine)
+    try:
+        agents = [SemanticAgent(backend="registry-test", index_dir=str(tmp_path)) for _ in range(3)]
+        assert len(built) == 1
+        assert all(a.engine is built[0] for a in agents) and all(a.index is agents[0].index for a in agents)
+    finally:
+        model_registry.clear(("embedding_engine", "registry-test"))
+        model_registry.clear(("concept_index", "registry-test", "hashing-64", CONCEPT_INDEX_PATH, str(tmp_path)))
+
+
+def test_orchestrator_import_loads_no_model_library():
+    # records import attempts, so the check holds whether or not the libraries are installed
+    code = """
+import sys
+HEAVY = ("torch", "sentence_transformers", "onnxruntime")
+attempted = []
+
+class Finder:
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        if name.split(".")[0] in HEAVY:
+            attempted.append(name)
+        return None
+
+sys.meta_path.insert(0, Finder)
+import agents.orchestrator_agent
+print(",".join(attempted))
+"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True, text=True)
+    assert out.stdout.strip() == "", out.stdout
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from core_tools.onnx_embedding import OnnxEmbedder
+
+
+class WordTokenizer:
+    """Stands in for tokenizers.Tokenizer: one id per word."""
+
+    def no_padding(self):
+        pass
+
+    def enable_truncation(self, max_length):
+        self.max_length = max_length
+
+    def encode_batch(self, texts):
+        out = []
+        for t in texts:
+            ids = [1 + sum(map(ord, w)) % 97 for w in t.split()][:self.max_length]
+            out.append(SimpleNamespace(ids=ids, attention_mask=[1] * len(ids)))
+        return out
+
+
+class EchoSession:
+    """Stands in for onnxruntime.InferenceSession: token id as a one-hot hidden state; padding is garbage."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, outputs, feed):
+        ids, mask = feed["input_ids"], feed["attention_mask"]
+        self.batches.append(ids.shape)
+        hidden = np.eye(100, dtype=np.float32)[ids]
+        hidden[mask == 0] = 50.0
+        return [hidden]
+
+
+def test_onnx_embedder_pools_batches_and_restores_order():
+    session = EchoSession()
+    emb = OnnxEmbedder(batch_size=2, max_length=3, session=session, tokenizer=WordTokenizer())
+    texts = ["dep delay minutes extra words", "fare", "origin airport", "pax"]
+    out = emb.encode(texts)
+
+    assert out.shape == (4, 100) and np.allclose(np.linalg.norm(out, axis=1), 1.0)
+    # shortest texts are batched together, so padding stays small
+    assert session.batches == [(2, 1), (2, 3)]
+    # mean over real tokens only: padding never leaks into the vector
+    tok = WordTokenizer()
+    tok.enable_truncation(3)
+    for text, vec in zip(texts, out):
+        ids = tok.encode_batch([text])[0].ids
+        expected = np.bincount(ids, minlength=100).astype(np.float32)
+        assert np.allclose(vec, expected / np.linalg.norm(expected))
@@ -0,0 +1,60 @@
+import time
+
+from core_tools import model_registry
+from core_tools.long_term_memory import HashingEmbedder
+from core_tools.report_cache import ReportCache
+from core_tools.synthetic_data import generate_airline_table
+
+TOKENS = ["On-time ", "performance ", "held ", "steady."]
+
+
+class _Engine:
+    backend, model_name = "hashing", "hashing-64"
+
+    def __init__(self):
+        self._embed = HashingEmbedder(64)
+
+    def encode_array(self, texts):
+        return self._embed([str(t) for t in texts])
+
+
+def _agent(cache=None):
+    model_registry._instances[("embedding_engine", "auto")] = _Engine()
+    try:
+        from agents.orchestrator_agent import OrchestratorAgent
+        agent = OrchestratorAgent(max_workers=4, cache=cache, scheduler=None)
+    finally:
+        model_registry.clear(("embedding_engine", "auto"))
+    agent.scheduler = None
+
+    def stream(prompt, fallback):
+        time.sleep(0.3)  # the LLM is the slowest stage
+        yield from TOKENS
+    agent.summarizer.stream_prompt = stream
+    agent.summarizer.complete = lambda prompt, fallback, tokens=None: "".join(TOKENS)
+    return agent
+
+
+def test_progressive_run_yields_stats_and_figures_before_tokens():
+    df = generate_airline_table(5_000, seed=7)
+    updates = list(_agent().run_progressive(df))
+    kinds = [u.kind for u in updates]
+    first_token = kinds.index("token")
+    assert {"schema", "semantic_map", "kpis", "anomalies", "figure"} <= set(kinds[:first_token])
+    assert "".join(u.value for u in updates if u.kind == "token") == "".join(TOKENS)
+    assert kinds[-2:] == ["report", "done"]
+    report, plots = updates[-1].value
+    assert report == "".join(TOKENS)
+    assert plots and len(plots) == kinds.count("figure")
+    assert len(_agent().run(df)[1]) == len(plots)
+
+
+def test_progressive_run_replays_cached_results(tmp_path):
+    df = generate_airline_table(3_000, seed=8)
+    agent = _agent(ReportCache(str(tmp_path)))
+    report, plots = agent.run(df)
+    updates = list(agent.run_progressive(df))
+    assert agent.last_cache_hit
+    assert [u.kind for u in updates][-3:] == ["token", "report", "done"]
+    assert updates[-1].value[0] == report and len(updates[-1].value[1]) == len(plots)
+    assert next(u.value for u in updates if u.kind == "kpis") == agent.last_stats["kpis"]
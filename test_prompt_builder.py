@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from agents.summarizer_agent import SummarizerAgent
+from config.settings import PROMPT_TOKEN_BUDGET
+from core_tools.prompt_builder import build_prompt, count_tokens, rank_columns
+
+TEMPLATE = ("Profile:\n{profile}\n\nSemantic:\n{semantic}\n\nKPIs:\n{kpis}\n\nAnomalies:\n{anomalies}\n\n"
+            "Correlations:\n{correlations}\n\nSegments:\n{segments}")
+
+
+def _inputs(n_columns=300, seed=0):
+    rng = np.random.default_rng(seed)
+    kpis, mapping = {}, {}
+    for i in range(n_columns):
+        mean = float(rng.uniform(1, 100))
+        kpis[f"COL_{i}"] = {"mean": mean, "median": mean, "std": float(rng.uniform(0, 2)) * mean,
+                            "min": 0.0, "max": 3 * mean}
+        mapping[f"COL_{i}"] = {"best_match": "delay", "score": float(rng.uniform(0, 1))}
+    anomalies = {"count": 3, "top": [{"index": 7, "score": 0.21, "contributors": [("COL_5", 9.0), ("COL_9", 4.0)]}]}
+    return {"semantic_map": {"mapping": mapping}, "kpis": kpis, "anomalies": anomalies}
+
+
+def test_prompt_fits_the_budget_with_highest_ranked_columns_first():
+    inputs = _inputs()
+    ranked = rank_columns(inputs["semantic_map"], inputs["kpis"], inputs["anomalies"])
+    assert ranked[0] == "COL_5"  # the strongest anomaly driver
+    for budget in (400, 1_000, PROMPT_TOKEN_BUDGET):
+        built = build_prompt(TEMPLATE, "Rows: 10, Columns: 300", budget=budget, **inputs)
+        assert built.tokens == count_tokens(built.prompt) <= budget
+        # kept in rank order; everything else is reported as omitted
+        assert built.columns == [c for c in ranked if c in built.columns]
+        assert built.omitted_columns == [c for c in ranked if c not in built.columns]
+        assert built.columns and built.omitted_columns
+        assert f"({len(built.omitted_columns)} lower-ranked columns omitted)" in built.prompt
+        rows = [line.split("|")[0] for line in built.kpi_block.splitlines()[1:]]
+        assert rows == built.columns
+    small, large = (build_prompt(TEMPLATE, "", budget=b, **inputs) for b in (400, 1_000))
+    assert set(small.columns) <= set(large.columns) and len(large.columns) > len(small.columns)
+
+
+def test_summarizer_returns_the_prompt_size_with_the_prompt():
+    agent = SummarizerAgent(token_budget=600)
+    jobs = [_inputs(n, seed=n) for n in (5, 50, 300)]
+
+    def build(inputs):
+        return agent.build_prompt("Rows: 10", inputs["semantic_map"], inputs["kpis"], inputs["anomalies"])
+
+    # one agent serves concurrent runs: each gets the size of its own prompt
+    with ThreadPoolExecutor(3) as pool:
+        built = list(pool.map(build, jobs * 4))
+    for (prompt, fallback, tokens) in built:
+        assert tokens == count_tokens(prompt) <= 600 and "KPIs:" in fallback
+    assert len({t for _, _, t in built}) == 3
+
+
+def test_a_wide_column_does_not_stop_narrower_ones():
+    inputs = _inputs(n_columns=20)
+    ranked = rank_columns(inputs["semantic_map"], inputs["kpis"], inputs["anomalies"])
+    wide = ranked[0] + "_" + "X" * 400
+    inputs["kpis"][wide] = inputs["kpis"].pop(ranked[0])
+    inputs["semantic_map"]["mapping"][wide] = inputs["semantic_map"]["mapping"].pop(ranked[0])
+    built = build_prompt(TEMPLATE, "Rows: 10", budget=300, **inputs)
+    assert wide in built.omitted_columns and len(built.columns) >= 5
+    assert built.tokens <= 300
+
+
+def test_oversized_fixed_blocks_are_truncated_to_the_budget():
+    inputs = _inputs(n_columns=20)
+    segments = "\n".join(f"ROUTE_{i}: delay {i:.1f} min over {i * 7} flights" for i in range(2000))
+    built = build_prompt(TEMPLATE, "Rows: 10", segments=segments, budget=800, **inputs)
+    assert built.tokens == count_tokens(built.prompt) <= 800 and built.overflow == 0
+    assert built.truncated_blocks == ["segments"] and "more lines truncated)" in built.prompt
+    assert "ROUTE_0:" in built.prompt
+    # a template longer than the budget cannot fit: the overflow is reported
+    tiny = build_prompt(TEMPLATE, "Rows: 10", segments=segments, budget=20, **inputs)
+    assert tiny.overflow == tiny.tokens - 20 > 0 and not tiny.columns
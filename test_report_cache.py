@@ -0,0 +1,43 @@
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from core_tools.report_cache import ReportCache, cache_key
+
+
+def _put(cache, key, text="report"):
+    cache.put(key, text, {"kpis": {"rows": 1}, "anomalies": {"scores": [0.1] * 1000}}, {}, [])
+
+
+def test_entries_expire_from_write_time_even_when_read():
+    cache = ReportCache(tempfile.mkdtemp(), ttl_s=0.4)
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    key = cache_key(df, {"model": "m"})
+    assert key == cache_key(df.copy(), {"model": "m"}) != cache_key(df, {"model": "n"})
+    _put(cache, key)
+    entry = cache.get(key)
+    assert entry["report"] == "report" and "scores" not in entry["stats"]["anomalies"]
+    deadline = time.time() + 0.6
+    while time.time() < deadline:  # a hot entry is still read past its TTL
+        hit = cache.get(key)
+        time.sleep(0.05)
+    assert hit is None and not os.path.exists(cache._path(key))
+
+
+def test_size_eviction_is_lru_and_corrupt_files_are_dropped(tmp_path):
+    cache = ReportCache(str(tmp_path), max_bytes=10**9)
+    for key in ("a", "b", "c"):
+        _put(cache, key, key * 2000)
+        time.sleep(0.02)
+    size = os.path.getsize(cache._path("a"))
+    cache.max_bytes = int(size * 3.5)
+    assert cache.get("a")["report"].startswith("a")  # "b" is now the least recently used
+    _put(cache, "d", "d" * 2000)
+    assert [cache.get(k) is not None for k in "abcd"] == [True, False, True, True]
+
+    with open(cache._path("broken"), "wb") as f:
+        f.write(b"\x80\x05not a pickle")
+    assert cache.get("broken") is None and not os.path.exists(cache._path("broken"))
+    assert cache.get("missing") is None
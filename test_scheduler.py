@@ -0,0 +1,72 @@
+import threading
+import time
+
+from core_tools.scheduler import SchedulerBusy, WorkScheduler
+from core_tools.stage_graph import StageGraph
+
+
+def test_round_robin_positions_and_admission():
+    scheduler = WorkScheduler(workers=1, max_queue=4, max_per_session=3)
+    gate = threading.Event()
+    order = []
+    try:
+        first = scheduler.submit("a", gate.wait)
+        while first.position() != -1:
+            time.sleep(0.01)
+        tickets = {name: scheduler.submit(name[0], order.append, name) for name in ("a2", "a3", "b1", "c1")}
+        # round-robin over sessions, not arrival order
+        assert [tickets[n].position() for n in ("a2", "b1", "c1", "a3")] == [0, 1, 2, 3]
+        try:
+            scheduler.submit("d", order.append, "d1")
+            assert False, "expected the full queue to reject"
+        except SchedulerBusy:
+            pass
+        gate.set()
+        for t in tickets.values():
+            t.result(timeout=5)
+        assert order == ["a2", "b1", "c1", "a3"]
+        assert tickets["a3"].wait_s >= tickets["a2"].wait_s and first.eta() == 0.0
+        failing = scheduler.submit("e", lambda: 1 / 0)
+        try:
+            failing.result(timeout=5)
+            assert False, "expected the job's exception"
+        except ZeroDivisionError:
+            pass
+        # the counter is updated just after the result is delivered
+        assert scheduler.stats()["rejected"] == 1 and scheduler.stats()["completed"] >= 5
+    finally:
+        gate.set()
+        scheduler.shutdown()
+
+
+def test_stage_slots_cap_concurrency_across_graphs():
+    scheduler = WorkScheduler(workers=2, cpu_slots=1, llm_slots=2)
+    lock, active, peak = threading.Lock(), {"cpu": 0, "llm": 0}, {"cpu": 0, "llm": 0}
+
+    def work(kind):
+        with lock:
+            active[kind] += 1
+            peak[kind] = max(peak[kind], active[kind])
+        time.sleep(0.05)
+        with lock:
+            active[kind] -= 1
+        return kind
+
+    def pipeline():
+        graph = StageGraph(max_workers=4, limiter=scheduler.stage_slot)
+        graph.add("anomalies", work, "cpu")
+        graph.add("correlation", work, "cpu")
+        graph.add("report", work, "llm")
+        graph.add("profile_text", lambda: "light")
+        graph.run()
+        return graph.waits
+
+    try:
+        tickets = [scheduler.submit(f"s{i}", pipeline) for i in range(2)]
+        waits = [t.result(timeout=10) for t in tickets]
+    finally:
+        scheduler.shutdown()
+    # four CPU stages from two runs went through one slot; the LLM stages could overlap
+    assert peak["cpu"] == 1 and peak["llm"] <= 2
+    assert max(max(w["anomalies"], w["correlation"]) for w in waits) > 0.03
+    assert all(w["profile_text"] < 0.01 for w in waits)
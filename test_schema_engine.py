@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from core_tools.schema_engine import CATEGORICAL, DATETIME, IDENTIFIER, NUMERIC, TEXT, infer_schema
+from core_tools.statistical_engine import detect_date_columns
+
+
+def test_sampled_inference_classifies_columns():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({
+        "DEP_DELAY": rng.normal(10, 5, n),
+        "ORIGIN": rng.choice(["JFK", "LAX", "ORD"], n),
+        "TAIL_NUM": [f"N{i:05d}" for i in rng.permutation(n)],
+        "REMARKS": [f"crew reported minor issue number {i} at the gate" for i in range(n)],
+        "FL_DATE": pd.date_range("2024-01-01", periods=n, freq="h").strftime("%d/%m/%Y"),
+        "LOGGED": pd.date_range("2024-01-01", periods=n, freq="min").strftime("%Y-%m-%d %H:%M"),
+    })
+    schema = infer_schema(df, sample_size=500)
+    kinds = {c: cs.kind for c, cs in schema.columns.items()}
+    assert kinds == {"DEP_DELAY": NUMERIC, "ORIGIN": CATEGORICAL, "TAIL_NUM": IDENTIFIER, "REMARKS": TEXT,
+                     "FL_DATE": DATETIME, "LOGGED": DATETIME}
+    # day-first dates are told apart from month-first ones by the values
+    assert schema.date_format("FL_DATE") == "%d/%m/%Y"
+    assert schema.date_format("LOGGED") == "%Y-%m-%d %H:%M"
+    assert schema.columns["ORIGIN"].sample_unique == 3
+
+
+def test_date_named_columns_need_parsable_values():
+    rng = np.random.default_rng(1)
+    n = 5_000
+    df = pd.DataFrame({
+        "TIMEZONE": rng.choice(["EST", "CST", "PST"], n),
+        "DEP_TIME_BLK": rng.choice(["0600-0659", "0700-0759", "1800-1859"], n),
+        "FL_MONTH_DATE": rng.choice(["2024-01", "2024-02", "2024-03"], n),
+        "CRS_DEP_TIME": rng.choice(["0605", "1230", "2355"], n),
+        "PERIOD": rng.choice(["202401", "202402"], n),
+    })
+    schema = infer_schema(df)
+    assert set(schema.categorical_columns) == {"TIMEZONE", "DEP_TIME_BLK", "PERIOD"}
+    # the name hint admits coarser formats, but only when the values parse with them
+    assert schema.date_format("FL_MONTH_DATE") == "%Y-%m" and schema.date_format("CRS_DEP_TIME") == "%H%M"
+    assert schema.date_format("TIMEZONE") is None
+    # numeric or unparsable date-named columns are never offered as a date axis
+    df["AIR_TIME"] = rng.integers(30, 400, n)
+    df["LOGGED"] = pd.date_range("2024-01-01", periods=n, freq="min").strftime("%Y-%m-%d %H:%M")
+    assert detect_date_columns(df) == ["FL_MONTH_DATE", "CRS_DEP_TIME", "LOGGED"]
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from core_tools.stage_graph import SharedProcessPool, StageGraph
+
+
+def test_stages_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def stage(name, value=0, **deps):
+        with lock:
+            order.append(name)
+        return value + sum(deps.values())
+
+    graph = StageGraph(max_workers=3)
+    graph.add("c", stage, "c", deps=("a", "b"))
+    graph.add("a", stage, "a", 1)
+    graph.add("b", stage, "b", 2, deps=("a",))
+    graph.add("d", stage, "d", 10)
+    seen = []
+    results = graph.run(lambda name, result: seen.append(name))
+    assert results == {"a": 1, "b": 3, "c": 4, "d": 10}
+    assert order.index("a") < order.index("b") < order.index("c")
+    assert sorted(seen) == ["a", "b", "c", "d"] and set(graph.timings) == {"a", "b", "c", "d", "total"}
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    started = []
+    graph = StageGraph()
+    graph.add("free", started.append, "free")
+    graph.add("a", lambda b: b, deps=("b",))
+    graph.add("b", lambda a: a, deps=("a",))
+    try:
+        graph.run()
+        assert False, "expected the cycle to be rejected"
+    except ValueError as e:
+        assert "cycle" in str(e)
+    assert started == []  # rejected before anything was submitted
+
+    graph = StageGraph()
+    graph.add("a", lambda missing: missing, deps=("missing",))
+    try:
+        graph.run()
+        assert False, "expected the unknown dependency to be rejected"
+    except ValueError as e:
+        assert "unknown stage 'missing'" in str(e)
+
+
+def test_first_error_is_raised_and_dependents_are_skipped():
+    started = []
+    slow_done = threading.Event()
+
+    def fail(message, delay=0.0):
+        time.sleep(delay)
+        raise RuntimeError(message)
+
+    def slow():
+        time.sleep(0.2)
+        slow_done.set()
+        return "slow"
+
+    graph = StageGraph(max_workers=3)
+    graph.add("first", fail, "first")
+    graph.add("second", fail, "second", 0.1)
+    graph.add("slow", slow)
+    graph.add("after_first", lambda first: started.append("after_first"), deps=("first",))
+    graph.add("after_slow", lambda slow: started.append("after_slow"), deps=("slow",))
+    try:
+        graph.run()
+        assert False, "expected the stage error"
+    except RuntimeError as e:
+        assert str(e) == "first"
+    # in-flight stages finish, but nothing new starts after the failure
+    assert slow_done.is_set() and started == []
+
+
+def test_process_stages_take_a_slot_on_a_pool_kept_across_runs():
+    slots = []
+
+    @contextmanager
+    def limiter(name):
+        slots.append(name)
+        yield
+
+    pool = SharedProcessPool(1)
+    try:
+        pids = []
+        for _ in range(2):
+            graph = StageGraph(max_workers=2, limiter=limiter, process_pool=pool)
+            graph.add("pid", os.getpid, process=True)
+            graph.add("power", pow, 2, 10, process=True)
+            results = graph.run()
+            assert results["power"] == 1024 and results["pid"] != os.getpid()
+            assert set(graph.waits) == {"pid", "power"}
+            pids.append(results["pid"])
+        assert sorted(slots) == ["pid", "pid", "power", "power"]
+        assert pids[0] == pids[1]  # the same worker process served both runs
+    finally:
+        pool.shutdown()
@@ -0,0 +1,87 @@
+import io
+import numpy as np
+import pandas as pd
+
+from core_tools.statistical_engine import compute_basic_kpis, summarize_numeric, top_categorical_frequencies
+from core_tools.streaming_profiler import StreamingProfiler, profile_csv, profile_file
+
+
+def _make_df(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "DEP_DELAY": np.where(rng.random(n) < 0.05, np.nan, rng.exponential(15, n)),
+        "PAX": rng.integers(50, 300, n),
+        "ORIGIN": rng.choice(["JFK", "LAX", "ORD", "ATL", "DFW"], n, p=[0.4, 0.3, 0.15, 0.1, 0.05]),
+    })
+
+
+def test_streaming_profile_matches_in_memory():
+    df = _make_df(n=3000)
+    result = profile_csv(io.StringIO(df.to_csv(index=False)), chunksize=700)
+
+    expected = compute_basic_kpis(df)
+    for col, k in expected.items():
+        got = result["kpis"][col]
+        for key in ("mean", "std", "min", "max"):
+            assert np.isclose(got[key], k[key]), (col, key, got[key], k[key])
+        # sketch holds every value for small inputs, so the median is exact
+        assert np.isclose(got["median"], k["median"])
+
+    summary = summarize_numeric(df)
+    assert np.allclose(result["numeric_summary"].loc[summary.index, "skew"], summary["skew"])
+    assert (result["numeric_summary"]["missing"] == summary["missing"]).all()
+    assert result["categorical_freq"] == top_categorical_frequencies(df)
+    assert result["profile_text"] == f"Rows: {len(df)}, Columns: {len(df.columns)}"
+
+
+def test_profilers_merge_like_a_single_pass():
+    df = _make_df(n=20000, seed=1)
+    left, right, whole = StreamingProfiler(sketch_size=512), StreamingProfiler(sketch_size=512), StreamingProfiler()
+    left.update(df.iloc[:7000])
+    right.update(df.iloc[7000:])
+    whole.update(df)
+    left.merge(right)
+
+    merged, single = left.result(), whole.result()
+    assert np.isclose(merged["kpis"]["DEP_DELAY"]["std"], single["kpis"]["DEP_DELAY"]["std"])
+    # bounded sample: median within a few percent of the exact value
+    exact = df["DEP_DELAY"].median()
+    assert abs(merged["kpis"]["DEP_DELAY"]["median"] - exact) / exact < 0.1
+    assert abs(merged["distinct_counts"]["PAX"] - df["PAX"].nunique()) <= 5
+    assert merged["distinct_counts"]["ORIGIN"] == 5
+
+
+def test_sparse_text_column_is_typed_by_its_first_values():
+    # the first 1000 rows are empty, so the first two chunks read the column as float64
+    df = pd.DataFrame({"GATE": [None] * 1000 + ["A", "B", "A"] * 100, "N": np.arange(1300)})
+    result = profile_csv(io.StringIO(df.to_csv(index=False)), chunksize=500)
+    assert result["categorical_freq"] == {"GATE": {"A": 200, "B": 100}}
+    assert "GATE" not in result["kpis"] and result["distinct_counts"]["GATE"] == 2
+
+    # the same when the empty and the filled parts were profiled separately and merged
+    empty, filled = StreamingProfiler(), StreamingProfiler()
+    empty.update(df.iloc[:1000].astype({"GATE": float}))
+    filled.update(df.iloc[1000:])
+    empty.merge(filled)
+    assert empty.result()["categorical_freq"] == result["categorical_freq"]
+    assert empty.categorical["GATE"].missing == 1000
+
+
+def test_profile_file_reads_each_format_by_batch(tmp_path):
+    df = _make_df(n=3000, seed=2)
+    df["ROW"] = np.arange(len(df))
+    df.to_csv(tmp_path / "f.csv", index=False)
+    df.to_parquet(tmp_path / "f.parquet", index=False, row_group_size=700)
+    df.to_feather(tmp_path / "f.feather", chunksize=700)
+    expected = compute_basic_kpis(df)
+    for name in ("f.csv", "f.parquet", "f.feather"):
+        result = profile_file(str(tmp_path / name), chunksize=700, sample_rows=500)
+        assert result["rows"] == 3000, name
+        assert np.isclose(result["kpis"]["DEP_DELAY"]["mean"], expected["DEP_DELAY"]["mean"]), name
+        assert result["categorical_freq"] == top_categorical_frequencies(df), name
+        # a bounded sample of whole rows, in file order
+        sample = result["sample"]
+        assert len(sample) == 500 and list(sample.columns) == list(df.columns), name
+        ids = sample["ROW"].astype(int).to_numpy()
+        assert (np.diff(ids) > 0).all(), name
+        assert (sample["ORIGIN"].astype(str).to_numpy() == df["ORIGIN"].to_numpy()[ids]).all(), name
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from core_tools.synthetic_data import CORE_COLUMNS, generate_airline_table, iter_airline_chunks
+
+
+def test_generator_is_deterministic_across_chunk_sizes():
+    whole = generate_airline_table(150_000, columns=30, seed=3)
+    chunked = pd.concat(iter_airline_chunks(150_000, columns=30, seed=3, chunk_rows=65536), ignore_index=True)
+    assert whole.equals(chunked)
+    assert not whole.equals(generate_airline_table(150_000, columns=30, seed=4))
+    assert list(whole.columns[:len(CORE_COLUMNS)]) == CORE_COLUMNS and whole.shape == (150_000, 30)
+
+
+def test_generator_injects_labelled_anomalies():
+    df = generate_airline_table(50_000, seed=1, anomaly_rate=0.01, label=True)
+    assert 300 < df["IS_ANOMALY"].sum() < 700
+    assert df.loc[df["IS_ANOMALY"], "DEP_DELAY"].max() > 600  # extreme delays among them
+    assert (df.loc[~df["IS_ANOMALY"], "PAX"] <= df.loc[~df["IS_ANOMALY"], "SEATS"]).all()
+    assert df["DEP_DELAY"].isna().mean() == df["CANCELLED"].mean()
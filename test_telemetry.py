@@ -0,0 +1,38 @@
+import json
+import os
+import time
+
+from core_tools import telemetry
+from core_tools.stage_graph import StageGraph
+
+
+def test_stage_spans_nest_under_caller(tmp_path):
+    path = str(tmp_path / "spans.jsonl")
+    telemetry.setup_tracing(telemetry.JsonLinesSpanExporter(path), enabled=True)
+    try:
+        with telemetry.span("run"):
+            graph = StageGraph(max_workers=2)
+            graph.add("a", lambda: 1)
+            graph.add("b", lambda a: a + 1, deps=("a",))
+            graph.run()
+    finally:
+        telemetry.shutdown_tracing()
+    spans = {s["name"]: s for s in map(json.loads, open(path))}
+    root = spans["run"]["context"]["span_id"]
+    assert spans["stage.a"]["parent_id"] == root and spans["stage.b"]["parent_id"] == root
+    assert spans["stage.b"]["attributes"]["stage.deps"] == ["a"]
+
+
+def test_profiler_writes_collapsed_stacks(tmp_path):
+    def busy():
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            sum(range(1000))
+
+    graph = StageGraph(max_workers=1, profile_dir=str(tmp_path))
+    graph.add("busy", busy)
+    graph.run()
+    assert os.path.exists(tmp_path / "busy.folded")
+    summary = json.load(open(tmp_path / "summary.json"))
+    assert summary["busy"]["samples"] > 0
+    assert any("busy" in line for line in open(tmp_path / "busy.folded"))
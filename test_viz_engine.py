@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from core_tools.viz_engine import lttb_indices, minmax_indices, plot_time_series
+
+
+def test_downsampling_keeps_endpoints_and_extremes():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000, dtype=np.float64)
+    y = rng.normal(size=10_000)
+    y[4321], y[8765] = 50.0, -50.0
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == 9_999
+    assert np.all(np.diff(idx) > 0) and 4321 in idx and 8765 in idx
+    idx = minmax_indices(y, 500)
+    assert len(idx) <= 500 and np.all(np.diff(idx) > 0)
+    assert 4321 in idx and 8765 in idx
+    # nothing to reduce
+    assert len(lttb_indices(x[:100], y[:100], 500)) == 100 and len(minmax_indices(y[:100], 500)) == 100
+
+
+def test_time_series_downsamples_naive_and_tz_aware_dates():
+    n = 5_000
+    stamps = pd.date_range("2024-03-01", periods=n, freq="h", tz="UTC").tz_convert("America/New_York")
+    values = np.random.default_rng(1).random(n)
+    frames = {
+        "%Y-%m-%dT%H:%M:%S%z": pd.DataFrame({"ts": stamps.strftime("%Y-%m-%dT%H:%M:%S%z"), "v": values}),
+        "%Y-%m-%d %H:%M:%S": pd.DataFrame({"ts": stamps.tz_localize(None).strftime("%Y-%m-%d %H:%M:%S"),
+                                           "v": values}),
+    }
+    for fmt, df in frames.items():
+        for method in ("lttb", "minmax"):
+            fig = plot_time_series(df, "ts", "v", date_format=fmt, max_points=2_000, method=method)
+            assert f"of {n} points" in fig.layout.title.text
+            assert len(fig.data[0].x) <= 2_000